@@ -8,16 +8,74 @@ class Settings(BaseSettings):
     # Ollama Configuration
     ollama_base_url: str = "http://127.0.0.1:11434"
     ollama_model: str = "llama3"
+    ollama_timeout: float = 120.0
+    ollama_connect_timeout: float = 5.0
+    ollama_max_retries: int = 2
+    ollama_retry_backoff: float = 0.5
+    ollama_max_concurrency: int = 4
+    ollama_max_connections: int = 8
+    ollama_keepalive_expiry: float = 60.0
+    ollama_keep_alive: str = "30m"
+    ollama_num_ctx: int = 0
+    ollama_num_thread: int = 0
+    ollama_warmup_languages: str = "en"
+    ollama_hedge_after: float = 0.0
+    ollama_eject_after_failures: int = 3
+    ollama_eject_seconds: float = 30.0
+    llm_prompt_prefix_file: str = ""
+    
+    # Prompt Context
+    context_token_budget: int = 1200
+    context_tokenizer: str = ""
+    context_dedup_threshold: float = 0.85
     
     # Vector Database
     vector_db_type: str = "chroma"
     chroma_persist_dir: str = "./data/chroma_db"
+    vector_index_dir: str = "./data/vector_index"
+    vector_index_dtype: str = "float32"
+    vector_index_mmap: bool = True
+    faiss_index_type: str = "HNSW"
+    faiss_nlist: int = 100
+    faiss_nprobe: int = 10
+    faiss_hnsw_m: int = 32
+    faiss_hnsw_ef_search: int = 64
+    faiss_pq_m: int = 0
+    hybrid_search_enabled: bool = True
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+    bm25_weight: float = 1.0
+    rrf_k: int = 60
+    hybrid_candidates: int = 20
+    
+    # Reranking (cross-encoder on CPU)
+    reranker_enabled: bool = False
+    reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20
+    rerank_top_n: int = 3
+    reranker_batch_size: int = 32
+    reranker_cache_size: int = 4096
     
     # Embedding Model
     embedding_model: str = "BAAI/bge-small-en-v1.5"
+    embedding_cache_size: int = 4096
+    embedding_cache_dir: str = ""
+    embedding_batch_size: int = 32
+    embedding_batch_wait_ms: float = 5.0
+    ingest_batch_size: int = 64
+    chunking_enabled: bool = True
+    chunk_max_tokens: int = 256
+    chunk_overlap_tokens: int = 32
     
     # Translation Model (NLLB)
     nllb_model: str = "facebook/nllb-200-distilled-600M"
+    translator_backend: str = "torch"
+    translator_model_dir: str = ""
+    translator_num_beams: int = 5
+    translator_num_threads: int = 0
+    translation_cache_size: int = 2048
+    translation_batch_size: int = 16
+    translation_batch_wait_ms: float = 10.0
     
     # Supported Languages (ISO 639-1 codes)
     supported_languages: str = "en,ta,te,hi,ml,bn,mr,gu,kn,pa"
@@ -25,8 +83,52 @@ class Settings(BaseSettings):
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    serve_workers: int = 0
+    serve_threads_per_worker: int = 0
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
     
+    # Answer Cache
+    answer_cache_enabled: bool = True
+    answer_cache_similarity: float = 0.95
+    answer_cache_max_entries: int = 1024
+    answer_cache_ttl_seconds: float = 3600.0
+    
+    # Conversation Sessions
+    sessions_enabled: bool = True
+    session_max_sessions: int = 10000
+    session_ttl_seconds: float = 1800.0
+    session_max_turns: int = 10
+    session_store_path: str = ""
+    session_followup_fetch_k: int = 2
+    
+    # Request Concurrency
+    pipeline_max_workers: int = 4
+    pipeline_max_queue: int = 16
+    pipeline_queue_timeout: float = 30.0
+    
+    # Batch Chat
+    batch_max_queries: int = 1000
+    batch_max_parallel: int = 4
+    batch_chunk_size: int = 32
+    
+    # Startup
+    background_model_loading: bool = True
+    startup_load_workers: int = 4
+    startup_warmup_enabled: bool = True
+    translator_lazy_load: bool = False
+    
+    # Inference worker processes (translation and embedding outside the web process)
+    inference_workers_enabled: bool = False
+    inference_translator_processes: int = 1
+    inference_embedder_processes: int = 1
+    inference_threads_per_process: int = 0
+    inference_max_pending: int = 64
+    inference_timeout: float = 60.0
+    
+    # Health checks (probed in the background, /health reads the last result)
+    health_check_interval: float = 5.0
+    health_check_timeout: float = 3.0
+    
     # Logging
     log_level: str = "INFO"
     
@@ -34,6 +136,14 @@ class Settings(BaseSettings):
     def supported_languages_list(self) -> List[str]:
         return [lang.strip() for lang in self.supported_languages.split(",")]
     
+    @property
+    def ollama_base_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.ollama_base_url.split(",") if url.strip()]
+    
+    @property
+    def ollama_warmup_languages_list(self) -> List[str]:
+        return [lang.strip() for lang in self.ollama_warmup_languages.split(",") if lang.strip()]
+    
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 
 
 class ChatRequest(BaseModel):
@@ -8,6 +8,28 @@ class ChatRequest(BaseModel):
     language: Optional[str] = Field(None, description="Force specific language (ISO code)")
     top_k: int = Field(5, ge=1, le=10, description="Number of documents to retrieve")
     temperature: float = Field(0.7, ge=0.0, le=1.0, description="LLM temperature")
+    include_timing: bool = Field(False, description="Return per-stage timings and LLM token usage")
+    session_id: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Za-z0-9_-]{8,64}$",
+        description="Conversation to continue; follow-ups reuse its language and retrieved documents"
+    )
+
+
+class BatchChatItem(BaseModel):
+    """One query of a batch chat request"""
+    id: Optional[str] = Field(None, max_length=200, description="Caller's ID, echoed in the result")
+    query: str = Field(..., min_length=1, max_length=2000, description="User query")
+    language: Optional[str] = Field(None, description="Force specific language (ISO code)")
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint"""
+    queries: List[BatchChatItem] = Field(..., min_items=1, description="Independent queries to answer")
+    top_k: int = Field(5, ge=1, le=10, description="Number of documents to retrieve per query")
+    temperature: float = Field(0.7, ge=0.0, le=1.0, description="LLM temperature")
+    max_parallel: Optional[int] = Field(None, ge=1, description="Concurrent LLM generations (capped by the server)")
+    include_timing: bool = Field(False, description="Return per-stage timings and LLM token usage")
 
 
 class SourceDocument(BaseModel):
@@ -17,14 +39,31 @@ class SourceDocument(BaseModel):
     distance: float
 
 
+class TokenUsage(BaseModel):
+    """LLM token counts and throughput reported by Ollama"""
+    prompt_tokens: int
+    completion_tokens: int
+    tokens_per_second: Optional[float] = None
+    prompt_eval_seconds: float
+    eval_seconds: float
+    load_seconds: float
+
+
 class ChatResponse(BaseModel):
     """Response model for chat endpoint"""
     response: str
     detected_language: str
+    language_confidence: Optional[float] = Field(None, description="Confidence of the language detection (0-1)")
     english_query: Optional[str] = None
     english_response: Optional[str] = None
     retrieved_documents: int
     sources: List[SourceDocument]
+    cached: bool = Field(False, description="Whether the answer was served from the answer cache")
+    timing: Optional[Dict[str, float]] = Field(None, description="Per-stage durations in seconds (with include_timing)")
+    usage: Optional[TokenUsage] = Field(None, description="LLM token usage (with include_timing, not for cached answers)")
+    session_id: Optional[str] = None
+    follow_up: Optional[bool] = Field(None, description="Whether the query was answered as a follow-up (with session_id)")
+    standalone_query: Optional[str] = Field(None, description="Self-contained English query used for retrieval (with session_id)")
     error: Optional[str] = None
 
 
@@ -32,20 +71,66 @@ class DocumentUpload(BaseModel):
     """Request model for uploading documents"""
     documents: List[str] = Field(..., min_items=1, description="List of document texts")
     metadatas: Optional[List[Dict]] = Field(None, description="Optional metadata for each document")
-    ids: Optional[List[str]] = Field(None, description="Optional IDs for each document")
+    ids: Optional[List[str]] = Field(None, description="Optional IDs for each document (content hashes when omitted)")
 
 
 class DocumentUploadResponse(BaseModel):
     """Response model for document upload"""
     success: bool
     documents_added: int
+    chunks_added: int
     total_documents: int
     message: str
 
 
+class IngestResponse(BaseModel):
+    """Response model for streaming document ingestion"""
+    success: bool
+    documents_received: int
+    documents_skipped: int
+    chunks_written: int
+    batches: int
+    elapsed_seconds: float
+    chunks_per_second: float
+    write_seconds: float
+    total_documents: int
+
+
+class ComponentHealth(BaseModel):
+    """Last background probe of one dependency"""
+    healthy: bool
+    value: Optional[Any] = None
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    last_checked: Optional[float] = None
+    last_success: Optional[float] = None
+    seconds_since_success: Optional[float] = None
+    consecutive_failures: int = 0
+
+
 class HealthResponse(BaseModel):
     """Response model for health check"""
     status: str
     ollama_connected: bool
     vector_db_documents: int
     supported_languages: List[str]
+    components: Dict[str, ComponentHealth] = {}
+
+
+class SessionTurn(BaseModel):
+    """One question and answer in a conversation"""
+    query: str
+    english_query: str
+    standalone_query: str
+    response: str
+    follow_up: bool
+    timestamp: float
+
+
+class SessionResponse(BaseModel):
+    """Response model for conversation sessions"""
+    session_id: str
+    language: Optional[str] = None
+    turns: List[SessionTurn] = []
+    created: float
+    updated: float
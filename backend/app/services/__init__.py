@@ -1,16 +1,52 @@
 """Services module for NPS RAG backend"""
 
-from .language_detector import LanguageDetector, LANG_CODE_MAP
+from .language_detector import LanguageDetector, LanguageDetection, LANG_CODE_MAP
 from .translator import NLLBTranslator
 from .vector_store import VectorStore
-from .llama_client import LlamaClient
+from .vector_backends import VectorBackend, create_vector_backend
+from .bm25_index import BM25Index
+from .embedder import QueryEmbedder
+from .inference_worker import InferenceWorkerPool, RemoteTranslator, RemoteEmbedder
+from .ingestion import DocumentIngestor
+from .chunker import DocumentChunker
+from .context_builder import ContextBuilder
+from .reranker import CrossEncoderReranker
+from .llama_client import LlamaClient, GenerationResult
+from .llm_router import LLMRouter, OllamaBackend
 from .rag_pipeline import RAGPipeline
+from .executor import PipelineExecutor, PipelineOverloadedError
+from .answer_cache import SemanticAnswerCache
+from .batching import MicroBatcher
+from .session_store import SessionStore, Session
+from .caching import LRUCache
 
 __all__ = [
     "LanguageDetector",
+    "LanguageDetection",
     "NLLBTranslator",
     "VectorStore",
+    "VectorBackend",
+    "create_vector_backend",
+    "BM25Index",
+    "QueryEmbedder",
+    "InferenceWorkerPool",
+    "RemoteTranslator",
+    "RemoteEmbedder",
+    "DocumentIngestor",
+    "DocumentChunker",
+    "ContextBuilder",
+    "CrossEncoderReranker",
     "LlamaClient",
+    "GenerationResult",
+    "LLMRouter",
+    "OllamaBackend",
     "RAGPipeline",
+    "PipelineExecutor",
+    "PipelineOverloadedError",
+    "SemanticAnswerCache",
+    "MicroBatcher",
+    "SessionStore",
+    "Session",
+    "LRUCache",
     "LANG_CODE_MAP",
 ]
@@ -0,0 +1,167 @@
+import numpy as np
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Cache of generated answers keyed on the English query embedding
+
+    A lookup hits when a cached query in the same bucket (target language,
+    retrieval depth) has a cosine similarity at or above the threshold, so
+    rephrasings of a question share one answer. Entries are evicted least
+    recently used first and expire after a TTL.
+
+    Every invalidate() starts a new generation. An answer generated from
+    documents retrieved before an invalidation is not stored after it: the
+    caller passes the generation it saw before retrieving (see generation).
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0
+    ):
+        """
+        Initialize the answer cache
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached answers
+            ttl_seconds: Seconds after which an answer is considered stale
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._ids = count()
+        # entry id -> (bucket, normalized embedding, cached value, created at)
+        self._entries: "OrderedDict[int, Tuple[Hashable, np.ndarray, Dict, float]]" = OrderedDict()
+        # bucket -> (entry ids, stacked embeddings); rebuilt lazily when stale
+        self._matrices: Dict[Hashable, Tuple[List[int], np.ndarray]] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+        logger.info(
+            f"SemanticAnswerCache initialized (threshold={similarity_threshold}, "
+            f"max_entries={max_entries}, ttl={ttl_seconds}s)"
+        )
+
+    def lookup(self, embedding: np.ndarray, bucket: Hashable) -> Optional[Dict]:
+        """
+        Find a cached answer for a semantically equivalent query
+
+        Args:
+            embedding: Embedding of the English query
+            bucket: Partition key the cached query must share (e.g. language)
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            self._expire()
+            ids, matrix = self._bucket_matrix(bucket)
+            if not ids:
+                self._misses += 1
+                return None
+
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self._misses += 1
+                return None
+
+            entry_id = ids[best]
+            self._entries.move_to_end(entry_id)
+            self._hits += 1
+            logger.info(f"Answer cache hit (similarity={similarities[best]:.3f})")
+            return self._entries[entry_id][2]
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far; read it before retrieving the documents an answer uses"""
+        with self._lock:
+            return self._invalidations
+
+    def store(self, embedding: np.ndarray, bucket: Hashable, value: Dict, generation: Optional[int] = None) -> None:
+        """
+        Cache an answer for a query
+
+        Args:
+            embedding: Embedding of the English query
+            bucket: Partition key (e.g. language)
+            value: Answer payload to return on later hits
+            generation: The cache's generation when the answer's documents
+                were retrieved; the answer is dropped if the cache has been
+                invalidated since
+        """
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if generation is not None and generation != self._invalidations:
+                logger.info("Answer not cached: the corpus changed while it was generated")
+                return
+            self._entries[next(self._ids)] = (bucket, vector, value, time.monotonic())
+            self._matrices.pop(bucket, None)
+
+            while len(self._entries) > self.max_entries:
+                _, (evicted_bucket, _, _, _) = self._entries.popitem(last=False)
+                self._matrices.pop(evicted_bucket, None)
+                self._evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every cached answer, e.g. after the document corpus changed"""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._matrices.clear()
+            self._invalidations += 1
+        logger.info(f"Answer cache invalidated ({dropped} entries dropped)")
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _expire(self) -> None:
+        # Entries are in LRU order, not insertion order, so scan them all
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry[3] < cutoff]
+        for entry_id in expired:
+            bucket = self._entries.pop(entry_id)[0]
+            self._matrices.pop(bucket, None)
+            self._evictions += 1
+
+    def _bucket_matrix(self, bucket: Hashable) -> Tuple[List[int], np.ndarray]:
+        if bucket not in self._matrices:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry[0] == bucket]
+            matrix = np.stack([self._entries[i][1] for i in ids]) if ids else np.empty((0, 0), dtype=np.float32)
+            self._matrices[bucket] = (ids, matrix)
+        return self._matrices[bucket]
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -0,0 +1,157 @@
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into batched model calls
+
+    Callers on any thread submit one item under a key (e.g. a language
+    pair). A background thread collects items for up to ``max_wait_ms``
+    or until ``max_batch_size`` items are waiting. It then calls
+    ``batch_fn(key, items)`` once per key and resolves each caller's
+    future with its own result.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "micro-batcher"
+    ):
+        """
+        Initialize the batcher and start its worker thread
+
+        Args:
+            batch_fn: Function mapping (key, items) to one result per item
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: How long to wait for more items before running a batch
+            name: Name of the worker thread (used in logs)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        # Threads do not survive fork(): give forked worker processes their own
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._restart_after_fork())
+
+    def _restart_after_fork(self) -> None:
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        if not self._closed:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, key: Hashable, item: Any) -> Future:
+        """
+        Queue one item for batched processing
+
+        Args:
+            key: Items are only batched with others under the same key
+            item: Input for batch_fn
+
+        Returns:
+            Future resolved with this item's result
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        future: Future = Future()
+        self._queue.put((key, item, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            pending: Dict[Hashable, list] = defaultdict(list)
+            pending[first[0]].append(first)
+            collected = 1
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+
+            while collected < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                pending[request[0]].append(request)
+                collected += 1
+
+            for key, requests in pending.items():
+                self._execute(key, requests)
+
+            if stopping:
+                return
+
+    def _execute(self, key: Hashable, requests: list) -> None:
+        items = [item for _, item, _ in requests]
+        try:
+            results = self.batch_fn(key, items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            logger.error(f"{self.name}: batch of {len(items)} failed: {e}")
+            for _, _, future in requests:
+                future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(requests, results):
+            future.set_result(result)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(items)
+            self._largest_batch = max(self._largest_batch, len(items))
+
+    def stats(self) -> Dict[str, float]:
+        """Get batch counters"""
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "queued": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        """Process what is already queued, then stop the worker thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
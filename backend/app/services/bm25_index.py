@@ -0,0 +1,297 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .file_lock import InterprocessLock
+
+logger = logging.getLogger(__name__)
+
+# Section references like 80CCD(1B) or 80C, then plain words
+_TOKEN = re.compile(r"\d+[a-z]+(?:\(\w{1,4}\))?|\w+")
+_SECTION = re.compile(r"^(\d+[a-z]+)\(")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "to", "in", "on", "for",
+    "and", "or", "with", "by", "at", "as", "from", "it", "its", "this", "that", "what", "which",
+    "how", "when", "can", "i", "my", "me", "do", "does", "you", "your", "there", "any", "will",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into BM25 terms
+
+    Section references are kept whole ('80ccd(1b)') and also indexed by
+    their base section ('80ccd'), so both 'Section 80CCD' and '80CCD(1B)'
+    match exactly. Stopwords are dropped.
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        section = _SECTION.match(token)
+        if section:
+            terms.append(section.group(1))
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental in-memory BM25 inverted index with an append-only log on disk
+
+    Every write appends one JSON line per document (its term counts) to the
+    log, so adding a batch costs time proportional to the batch. Loading
+    replays the log; the latest entry for an ID wins. Other processes
+    sharing the file pick up appended entries on their next search.
+
+    Writers in different processes serialize on ``<path>.lock`` and catch
+    up with the log before appending. Compaction and clear() replace the
+    file, and readers notice the new inode and replay it from the start.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Open (or create) the index
+
+        Args:
+            path: Log file path (None keeps the index in memory only)
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._log_offset = 0
+        self._log_entries = 0
+        self._log_inode: Optional[int] = None
+        self._write_lock = InterprocessLock(path + ".lock") if path else None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._sync()
+            logger.info(f"BM25 index at {path}: {len(self._doc_terms)} documents, {len(self._postings)} terms")
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _reset(self) -> None:
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._log_offset = 0
+        self._log_entries = 0
+
+    def _apply(self, doc_id: str, term_counts: Dict[str, int]) -> None:
+        self._remove(doc_id)
+        self._doc_terms[doc_id] = term_counts
+        length = sum(term_counts.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove(self, doc_id: str) -> None:
+        old_terms = self._doc_terms.pop(doc_id, None)
+        if old_terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in old_terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, ids: List[str], documents: List[str]) -> None:
+        """
+        Index documents, replacing any previous version of the same IDs
+
+        Args:
+            ids: Document IDs
+            documents: Document texts
+        """
+        entries = [(doc_id, dict(Counter(tokenize(text)))) for doc_id, text in zip(ids, documents)]
+        with self._lock:
+            if self._write_lock is None:
+                self._add_entries(entries)
+                return
+            with self._write_lock.hold():
+                self._add_entries(entries)
+
+    def _add_entries(self, entries: List[Tuple[str, Dict[str, int]]]) -> None:
+        """Apply and log entries (call with both locks held)"""
+        self._sync()
+        for doc_id, term_counts in entries:
+            self._apply(doc_id, term_counts)
+        self._append([{"id": doc_id, "tf": term_counts} for doc_id, term_counts in entries])
+        if self.path and self._log_entries > 2 * len(self._doc_terms) + 1000:
+            self._compact()
+
+    def _append(self, entries: List[Dict]) -> None:
+        if not self.path:
+            return
+        payload = b"".join(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n" for entry in entries)
+        with open(self.path, "ab") as f:
+            f.write(payload)
+            # The log is in sync up to the end of this write
+            self._log_offset = f.tell()
+            self._log_inode = os.fstat(f.fileno()).st_ino
+        self._log_entries += len(entries)
+
+    def _replace_log(self, entries: Iterable[Dict]) -> None:
+        """Atomically swap in a new log file (a new inode, so other processes replay it)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+            size = f.tell()
+        os.replace(tmp_path, self.path)
+        self._log_offset = size
+        self._log_inode = os.stat(self.path).st_ino
+
+    def _compact(self) -> None:
+        self._replace_log({"id": doc_id, "tf": term_counts} for doc_id, term_counts in self._doc_terms.items())
+        self._log_entries = len(self._doc_terms)
+        logger.info(f"Compacted BM25 log to {self._log_entries} entries")
+
+    def _sync(self) -> None:
+        """Read entries appended by other processes (or reload after compaction or clear)"""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._log_inode is not None:
+                self._reset()
+                self._log_inode = None
+            return
+        if stat.st_ino == self._log_inode and stat.st_size == self._log_offset:
+            return
+
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            # Check the file actually opened: it may have been replaced since the stat
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+                self._reset()
+                self._log_inode = stat.st_ino
+            f.seek(self._log_offset)
+            data = f.read()
+        # Ignore a trailing partial line from a concurrent writer
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            self._apply(entry["id"], entry["tf"])
+            self._log_entries += 1
+        self._log_offset += end
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank documents by BM25 score
+
+        Args:
+            query: Query text
+            top_k: Number of results
+
+        Returns:
+            (document ID, score) pairs, best first; only documents sharing at
+            least one term with the query
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._sync()
+            n_docs = len(self._doc_terms)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def clear(self) -> None:
+        """Remove every document (and empty the log)"""
+        with self._lock:
+            if self._write_lock is None:
+                self._reset()
+                return
+            with self._write_lock.hold():
+                self._clear_log()
+
+    def _clear_log(self) -> None:
+        self._reset()
+        self._replace_log([])
+
+    def rebuild(self, documents: Iterable[Tuple[List[str], List[str]]]) -> None:
+        """
+        Rebuild the index from (ids, texts) batches
+
+        Args:
+            documents: Batches of document IDs and texts
+        """
+        with self._lock:
+            if self._write_lock is None:
+                self._reset()
+                for ids, texts in documents:
+                    self.add(ids, texts)
+                return
+            # Other processes' writes wait until the rebuilt log is complete
+            with self._write_lock.hold():
+                self._clear_log()
+                for ids, texts in documents:
+                    self._add_entries([
+                        (doc_id, dict(Counter(tokenize(text)))) for doc_id, text in zip(ids, texts)
+                    ])
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    k: int = 60,
+    weights: Optional[List[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of document IDs
+
+    Each document scores sum(weight / (k + rank)) over the rankings it
+    appears in (rank starting at 1), which needs no score calibration
+    between retrievers.
+
+    Args:
+        rankings: Lists of document IDs, best first
+        k: Damping constant (60 in the original RRF paper)
+        weights: Weight per ranking (all 1.0 when omitted)
+
+    Returns:
+        (document ID, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,243 @@
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Markdown headings, short lines ending in ':' and short ALL-CAPS lines
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+\S")
+_LIST_ITEM = re.compile(r"^(?:[-*•▪]|\d{1,3}[.)]|[a-zA-Z][.)]|\([a-zA-Z0-9]{1,4}\))\s+")
+# Sentence ends: ., ! or ? (or the Devanagari danda) followed by whitespace,
+# except after common abbreviations and single initials
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+_ABBREVIATIONS = {
+    "rs", "e.g", "i.e", "etc", "sec", "no", "vs", "viz", "govt", "dept", "approx",
+    "mr", "mrs", "ms", "dr", "st", "jan", "feb", "mar", "apr", "jun", "jul", "aug",
+    "sep", "sept", "oct", "nov", "dec", "p.a", "u/s",
+}
+
+
+def approximate_token_count(text: str) -> int:
+    """Rough subword token count for English text (about 4/3 tokens per word)"""
+    return (len(text.split()) * 4 + 2) // 3
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences without breaking 'Rs. 500' or 'e.g. PPF'"""
+    sentences: List[str] = []
+    pending = ""
+    for piece in _SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {piece}" if pending else piece
+        last_word = pending.rsplit(None, 1)[-1].rstrip(".").lower()
+        if last_word in _ABBREVIATIONS or len(last_word) == 1 and last_word.isalpha():
+            continue
+        if _LIST_ITEM.match(pending + " ") and len(pending.split()) == 1:
+            # A bare list marker such as '2.'
+            continue
+        sentences.append(pending)
+        pending = ""
+    if pending:
+        sentences.append(pending)
+    return sentences
+
+
+class DocumentChunker:
+    """
+    Structure-aware splitter that turns documents into retrieval chunks
+
+    A document is first split into sections at headings, then into blocks
+    (paragraphs and list items), and blocks are packed into chunks that stay
+    under a token budget for the embedding model. Blocks that are too long on
+    their own are split into sentences, and sentences into word windows as a
+    last resort. Each chunk repeats its section heading for context and
+    starts with the last ``overlap_tokens`` worth of blocks from the previous
+    chunk of the same section.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        overlap_tokens: int = 32,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Initialize the chunker
+
+        Args:
+            max_tokens: Token budget per chunk (keep below the embedding
+                model's maximum sequence length)
+            overlap_tokens: Tokens of trailing context repeated at the start
+                of the next chunk (0 disables overlap)
+            token_counter: Function returning the token count of a text;
+                an approximate word-based count when omitted
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = token_counter or approximate_token_count
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Split one document into chunk texts
+
+        Args:
+            text: Document text (plain text or Markdown)
+
+        Returns:
+            Chunk texts in document order (empty for a blank document)
+        """
+        chunks: List[str] = []
+        for heading, blocks in self._sections(text):
+            chunks.extend(self._pack(heading, blocks))
+        return chunks
+
+    def chunk_document(
+        self,
+        text: str,
+        parent_id: str,
+        metadata: Optional[Dict] = None
+    ) -> List[Tuple[str, str, Dict]]:
+        """
+        Split one document into (id, text, metadata) chunks
+
+        Chunk IDs are '<parent_id>:<index>', and each chunk's metadata is the
+        document's metadata plus parent_id, chunk_index and chunk_count.
+
+        Args:
+            text: Document text
+            parent_id: ID of the source document
+            metadata: Metadata of the source document
+
+        Returns:
+            One (id, text, metadata) tuple per chunk
+        """
+        texts = self.chunk(text)
+        return [
+            (
+                f"{parent_id}:{index}",
+                chunk_text,
+                {**(metadata or {}), "parent_id": parent_id, "chunk_index": index, "chunk_count": len(texts)},
+            )
+            for index, chunk_text in enumerate(texts)
+        ]
+
+    def _sections(self, text: str) -> List[Tuple[Optional[str], List[str]]]:
+        sections: List[Tuple[Optional[str], List[str]]] = []
+        heading: Optional[str] = None
+        blocks: List[str] = []
+        paragraph: List[str] = []
+
+        def end_paragraph():
+            if paragraph:
+                blocks.append(" ".join(paragraph))
+                paragraph.clear()
+
+        for raw_line in text.splitlines():
+            line = " ".join(raw_line.split())
+            if not line:
+                end_paragraph()
+            elif self._is_heading(line):
+                end_paragraph()
+                if blocks or heading:
+                    sections.append((heading, blocks))
+                heading, blocks = line.lstrip("#").strip(), []
+            elif _LIST_ITEM.match(line):
+                end_paragraph()
+                blocks.append(line)
+            else:
+                paragraph.append(line)
+
+        end_paragraph()
+        if blocks or heading:
+            sections.append((heading, blocks))
+        return sections
+
+    @staticmethod
+    def _is_heading(line: str) -> bool:
+        if _MARKDOWN_HEADING.match(line):
+            return True
+        words = line.split()
+        if len(words) > 12 or _LIST_ITEM.match(line):
+            return False
+        if line.endswith(":"):
+            return True
+        letters = [c for c in line if c.isalpha()]
+        return len(words) >= 2 and len(letters) >= 4 and line.isupper()
+
+    def _pack(self, heading: Optional[str], blocks: List[str]) -> List[str]:
+        prefix_tokens = self.count_tokens(heading) if heading else 0
+        budget = max(self.max_tokens - prefix_tokens, self.max_tokens // 2)
+
+        # Break oversized blocks into sentences, and oversized sentences into words
+        units: List[Tuple[str, int]] = []
+        for block in blocks:
+            tokens = self.count_tokens(block)
+            if tokens <= budget:
+                units.append((block, tokens))
+                continue
+            for sentence in split_sentences(block):
+                tokens = self.count_tokens(sentence)
+                if tokens <= budget:
+                    units.append((sentence, tokens))
+                else:
+                    units.extend(self._split_words(sentence, budget))
+
+        if not units:
+            return [heading] if heading else []
+
+        chunks: List[str] = []
+        current: List[Tuple[str, int]] = []
+        current_tokens = 0
+        for unit in units:
+            if current and current_tokens + unit[1] > budget:
+                chunks.append(self._render(heading, current))
+                current = self._overlap(current, budget - unit[1])
+                current_tokens = sum(tokens for _, tokens in current)
+            current.append(unit)
+            current_tokens += unit[1]
+        chunks.append(self._render(heading, current))
+        return chunks
+
+    def _overlap(self, units: List[Tuple[str, int]], room: int) -> List[Tuple[str, int]]:
+        limit = min(self.overlap_tokens, room)
+        carried: List[Tuple[str, int]] = []
+        total = 0
+        for unit in reversed(units):
+            if total + unit[1] > limit:
+                break
+            carried.insert(0, unit)
+            total += unit[1]
+
+        if not carried and units and limit > 0:
+            # The last unit is longer than the overlap: carry its tail words
+            tail: List[str] = []
+            for word in reversed(units[-1][0].split()):
+                tokens = self.count_tokens(word)
+                if total + tokens > limit:
+                    break
+                tail.insert(0, word)
+                total += tokens
+            if tail:
+                carried.append((" ".join(tail), total))
+        return carried
+
+    def _split_words(self, text: str, budget: int) -> List[Tuple[str, int]]:
+        pieces: List[Tuple[str, int]] = []
+        words: List[str] = []
+        total = 0
+        for word in text.split():
+            tokens = self.count_tokens(word)
+            if words and total + tokens > budget:
+                pieces.append((" ".join(words), total))
+                words, total = [], 0
+            words.append(word)
+            total += tokens
+        if words:
+            pieces.append((" ".join(words), total))
+        return pieces
+
+    @staticmethod
+    def _render(heading: Optional[str], units: List[Tuple[str, int]]) -> str:
+        body = "\n".join(text for text, _ in units)
+        return f"{heading}\n{body}" if heading else body
@@ -0,0 +1,195 @@
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .chunker import approximate_token_count, split_sentences
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "to", "in", "on", "for",
+    "and", "or", "with", "by", "at", "as", "from", "it", "its", "this", "that", "what", "which",
+    "how", "when", "can", "i", "my", "me", "do", "does", "you", "your", "there", "any", "will",
+}
+
+
+def load_token_counter(tokenizer_name: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Get a token counting function for prompt budgeting
+
+    Args:
+        tokenizer_name: HuggingFace tokenizer, ideally the LLM's (e.g. a Llama 3
+            tokenizer); an approximate word-based count (about 4/3 tokens
+            per word) when empty or if it cannot be loaded
+
+    Returns:
+        Function returning the token count of a text
+    """
+    if not tokenizer_name:
+        return approximate_token_count
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        logger.info(f"Counting prompt tokens with the {tokenizer_name} tokenizer")
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer {tokenizer_name} ({e}); using approximate token counts")
+        return approximate_token_count
+
+
+def _terms(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS}
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextBuilder:
+    """
+    Packs retrieved documents into a prompt context under a token budget
+
+    Near-duplicate documents (overlapping chunks, repeated circulars) are
+    dropped, long documents are trimmed to the sentences most relevant to
+    the query, and the remaining candidates are packed greedily by
+    retrieval score per token. The packed documents keep their retrieval
+    order in the prompt.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1200,
+        token_counter: Optional[Callable[[str], int]] = None,
+        dedup_threshold: float = 0.85
+    ):
+        """
+        Initialize the context builder
+
+        Args:
+            token_budget: Maximum tokens of context in the prompt
+            token_counter: Function returning the token count of a text
+                (see load_token_counter); the word-based estimate of
+                approximate_token_count when omitted, which may differ
+                noticeably from the LLM's count
+            dedup_threshold: Word-trigram Jaccard similarity at which a
+                lower-ranked document counts as a duplicate
+        """
+        self.token_budget = token_budget
+        self.count_tokens = token_counter or approximate_token_count
+        self.dedup_threshold = dedup_threshold
+
+    def build(
+        self,
+        query: str,
+        documents: List[str],
+        scores: Optional[List[float]] = None
+    ) -> Tuple[str, Dict]:
+        """
+        Build the context string
+
+        Args:
+            query: English query, used to rank sentences when trimming
+            documents: Retrieved document texts, best first
+            scores: Retrieval scores (higher is better), one per document;
+                reciprocal rank when omitted
+
+        Returns:
+            Context string and packing stats (documents used, tokens, ...)
+        """
+        if not documents:
+            return "No specific context available.", {"documents_used": 0, "context_tokens": 0}
+
+        if scores is None:
+            scores = [1.0 / rank for rank in range(1, len(documents) + 1)]
+
+        candidates = self._deduplicate([
+            (rank, text.strip(), score)
+            for rank, (text, score) in enumerate(zip(documents, scores))
+            if text and text.strip()
+        ])
+        query_terms = _terms(query)
+        # No single document may take more than half of the budget unless it is alone
+        per_document = self.token_budget if len(candidates) == 1 else max(self.token_budget // 2, 1)
+
+        packed: List[Tuple[int, str, float, int]] = []
+        for rank, text, score in candidates:
+            text, tokens = self._trim(text, query_terms, per_document)
+            if text:
+                packed.append((rank, text, score, tokens))
+        if not packed:
+            return "No specific context available.", {"documents_used": 0, "context_tokens": 0}
+
+        # Greedy knapsack by score per token (scores may be negative for distant hits)
+        floor = min(score for _, _, score, _ in packed)
+        by_density = sorted(packed, key=lambda item: (item[2] - floor + 1e-6) / max(item[3], 1), reverse=True)
+        # The best-ranked document always goes in first
+        by_density.sort(key=lambda item: item[0] != packed[0][0])
+
+        # Each document is wrapped in a '[Document n]' header
+        overhead = self.count_tokens("[Document 10]") + 2
+        chosen = []
+        used = 0
+        for item in by_density:
+            if used + item[3] + overhead <= self.token_budget:
+                chosen.append(item)
+                used += item[3] + overhead
+
+        chosen.sort(key=lambda item: item[0])
+        context = "\n".join(f"\n[Document {i}]\n{text}\n" for i, (_, text, _, _) in enumerate(chosen, 1))
+        stats = {
+            "documents_retrieved": len(documents),
+            "documents_deduplicated": len(documents) - len(candidates),
+            "documents_used": len(chosen),
+            "context_tokens": used,
+        }
+        return context, stats
+
+    def _deduplicate(self, candidates: List[Tuple[int, str, float]]) -> List[Tuple[int, str, float]]:
+        kept: List[Tuple[int, str, float]] = []
+        kept_shingles: List[Set[Tuple[str, ...]]] = []
+        for candidate in sorted(candidates, key=lambda item: item[2], reverse=True):
+            shingles = _shingles(candidate[1])
+            if any(
+                len(shingles & other) / max(len(shingles | other), 1) >= self.dedup_threshold
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(candidate)
+            kept_shingles.append(shingles)
+        return sorted(kept, key=lambda item: item[0])
+
+    def _trim(self, text: str, query_terms: Set[str], max_tokens: int) -> Tuple[str, int]:
+        tokens = self.count_tokens(text)
+        if tokens <= max_tokens:
+            return text, tokens
+
+        # Keep the heading line, then the sentences sharing the most query terms
+        lines = text.strip().split("\n")
+        heading = lines[0] if len(lines) > 1 and lines[0].endswith(":") else None
+        body = "\n".join(lines[1:] if heading else lines)
+        sentences = [s for line in body.split("\n") for s in split_sentences(line) if s]
+
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (len(_terms(sentences[i]) & query_terms), -i),
+            reverse=True
+        )
+        budget = max_tokens - (self.count_tokens(heading) if heading else 0)
+        keep: List[int] = []
+        used = 0
+        for i in ranked:
+            sentence_tokens = self.count_tokens(sentences[i])
+            if used + sentence_tokens <= budget:
+                keep.append(i)
+                used += sentence_tokens
+
+        if not keep:
+            return "", 0
+        trimmed = " ".join(sentences[i] for i in sorted(keep))
+        if heading:
+            trimmed = f"{heading}\n{trimmed}"
+        return trimmed, self.count_tokens(trimmed)
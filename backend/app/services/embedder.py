@@ -0,0 +1,236 @@
+from sentence_transformers import SentenceTransformer
+import numpy as np
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+import weakref
+from typing import Dict, List, Optional
+
+from .batching import MicroBatcher
+from .caching import LRUCache
+from .chunker import approximate_token_count
+
+logger = logging.getLogger(__name__)
+
+
+class DiskEmbeddingCache:
+    """SQLite-backed embedding cache that survives restarts"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite file path
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        # A SQLite connection must not be used across fork(): reopen it in the child
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reopen())
+
+    def _reopen(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QueryEmbedder:
+    """
+    Sentence-transformer wrapper for query embeddings
+
+    Query embeddings are cached in memory (and optionally on disk) keyed on
+    the model name and whitespace-normalized text. Concurrent single-query
+    requests are encoded together by a micro-batcher in one forward pass.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-small-en-v1.5",
+        cache_size: int = 4096,
+        cache_dir: Optional[str] = None,
+        batch_size: int = 32,
+        batch_wait_ms: float = 5.0
+    ):
+        """
+        Load the embedding model
+
+        Args:
+            model_name: HuggingFace model name for embeddings
+            cache_size: Number of query embeddings kept in memory (0 disables)
+            cache_dir: Directory for the persistent embedding cache (None disables)
+            batch_size: Maximum number of concurrent queries encoded together;
+                1 disables micro-batching
+            batch_wait_ms: How long to wait for other queries to join a batch
+        """
+        self.model_name = model_name
+
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model = SentenceTransformer(model_name)
+
+        self.cache = LRUCache(max_size=cache_size)
+        self.disk_cache = None
+        if cache_dir:
+            self.disk_cache = DiskEmbeddingCache(os.path.join(cache_dir, "query_embeddings.sqlite"))
+            logger.info(f"Persistent query embedding cache at: {self.disk_cache.path}")
+
+        self.batcher = None
+        if batch_size > 1:
+            self.batcher = MicroBatcher(
+                self._encode_batch,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms,
+                name="embedding-batcher"
+            )
+
+        self._disk_hits = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts without caching (used for documents)
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Normalized float32 embeddings, one row per text
+        """
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+    def _encode_batch(self, _key, texts: List[str]) -> List[np.ndarray]:
+        # Concurrent callers often send the same query; encode each text once
+        unique = list(dict.fromkeys(texts))
+        encoded = dict(zip(unique, self.encode(unique)))
+        return [encoded[text] for text in texts]
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed one search query, using the caches and the micro-batcher
+
+        Args:
+            query: Query text
+
+        Returns:
+            Normalized float32 embedding vector
+        """
+        key = self._cache_key(query)
+        embedding = self._cached(key)
+        if embedding is not None:
+            return embedding
+
+        if self.batcher is not None:
+            embedding = self.batcher.submit(None, query).result()
+        else:
+            embedding = self.encode([query])[0]
+
+        self._store({key: embedding})
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several queries, encoding the uncached ones in one forward pass
+
+        Args:
+            queries: Query texts
+
+        Returns:
+            Matrix of normalized embeddings, one row per query
+        """
+        keys = [self._cache_key(query) for query in queries]
+        embeddings: List[Optional[np.ndarray]] = [self._cached(key) for key in keys]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.encode([queries[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            self._store({keys[i]: embeddings[i] for i in missing})
+
+        return np.vstack(embeddings) if embeddings else np.empty((0, self.dimension), dtype=np.float32)
+
+    def warmup(self) -> None:
+        """Encode a single query and a small batch (bypassing the caches)"""
+        self.encode(["What is the National Pension System?"])
+        self.encode(["NPS Tier I account", "NPS Tier II account", "Section 80CCD(1B) deduction", "NPS withdrawal"])
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the embedding model's tokens in a text (without special tokens)
+        
+        Falls back to an approximate word-based count if the model exposes no
+        tokenizer.
+        """
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return approximate_token_count(text)
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    @property
+    def max_tokens(self) -> Optional[int]:
+        """Maximum sequence length of the embedding model, if known"""
+        return getattr(self.model, "max_seq_length", None)
+
+    @property
+    def dimension(self) -> int:
+        """Embedding vector size"""
+        return self.model.get_sentence_embedding_dimension()
+
+    def _cache_key(self, text: str) -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha1(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[np.ndarray]:
+        embedding = self.cache.get(key)
+        if embedding is None and self.disk_cache is not None:
+            embedding = self.disk_cache.get(key)
+            if embedding is not None:
+                self._disk_hits += 1
+                self.cache.put(key, embedding)
+        return embedding
+
+    def _store(self, items: Dict[str, np.ndarray]) -> None:
+        for key, embedding in items.items():
+            self.cache.put(key, embedding)
+        if self.disk_cache is not None:
+            self.disk_cache.put_many(items)
+
+    def stats(self) -> Dict:
+        """Get cache and batching counters"""
+        return {
+            "model": self.model_name,
+            "cache": self.cache.stats(),
+            "disk_cache_hits": self._disk_hits if self.disk_cache is not None else None,
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stop the micro-batcher and close the disk cache"""
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
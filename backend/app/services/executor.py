@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineOverloadedError(Exception):
+    """Raised when a request cannot be admitted or waited too long in the queue"""
+
+    def __init__(self, message: str, status_code: int = 429, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class PipelineExecutor:
+    """
+    Bounded worker pool for the blocking parts of the RAG pipeline.
+
+    The event loop must never run NLLB or embedding calls inline. That work
+    is handed to a fixed-size thread pool instead, and admission control
+    caps how many requests may be running or queued at once.
+    Requests beyond that cap are rejected immediately (429). Requests that
+    were admitted but sat in the queue longer than ``queue_timeout`` are
+    taken out of the queue and fail right away (503); they never run.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0
+    ):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers: Number of worker threads running pipeline work
+            max_queue: Number of admitted requests allowed to wait for a worker
+            queue_timeout: Seconds a request may wait for a worker before it is dropped
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.capacity = max_workers + max_queue
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="rag-worker"
+        )
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._active = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._completed = 0
+
+        logger.info(
+            f"PipelineExecutor initialized with {max_workers} workers, "
+            f"queue limit {max_queue}, queue timeout {queue_timeout}s"
+        )
+
+    def acquire(self) -> None:
+        """
+        Reserve a slot for one request
+
+        Raises:
+            PipelineOverloadedError: If the worker pool and queue are full
+        """
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                raise PipelineOverloadedError(
+                    f"Server busy: {self._admitted} requests in flight (limit {self.capacity})",
+                    status_code=429
+                )
+            self._admitted += 1
+
+    def release(self) -> None:
+        """Give back a slot reserved with acquire"""
+        with self._lock:
+            self._admitted -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a request slot for the duration of the block (see acquire)"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the worker pool and await its result
+
+        Args:
+            func: Blocking callable to run
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            PipelineOverloadedError: If the call waited longer than queue_timeout
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        job = self._executor.submit(self._run_in_worker, loop, started, func, args, kwargs)
+        result = asyncio.wrap_future(job)
+        try:
+            # The deadline covers only the wait for a worker, not the work itself
+            await asyncio.wait_for(asyncio.shield(started), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # A job still in the queue is cancelled so no worker runs it
+            if job.cancel():
+                with self._lock:
+                    self._timed_out += 1
+                raise PipelineOverloadedError(
+                    f"Request waited {self.queue_timeout}s for a worker without starting",
+                    status_code=503
+                )
+            # Picked up just as the deadline passed: let it finish
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+        return await result
+
+    def _run_in_worker(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        started: asyncio.Future,
+        func: Callable,
+        args: tuple,
+        kwargs: dict
+    ) -> Any:
+        try:
+            loop.call_soon_threadsafe(self._mark_started, started)
+        except RuntimeError:
+            # The event loop is gone; nobody is waiting for the result
+            pass
+
+        with self._lock:
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    @staticmethod
+    def _mark_started(started: asyncio.Future) -> None:
+        if not started.done():
+            started.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get a snapshot of pool utilisation and admission counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._admitted,
+                "active": self._active,
+                "queued": max(0, self._admitted - self._active),
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("PipelineExecutor shut down")
@@ -0,0 +1,42 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: serve.py's prefork workers are POSIX-only, so the thread lock suffices
+    fcntl = None
+
+
+class InterprocessLock:
+    """
+    Exclusive lock shared by the threads of this process and by every other
+    process that locks the same file
+
+    Used around writes to files that several serve.py workers open at once
+    (the vector index, the BM25 log). Built on ``fcntl.flock``, which the
+    kernel releases if the holder dies.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock file (created if missing; its content is never used)
+        """
+        self.path = path
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """Hold the lock for the duration of the block"""
+        with self._thread_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a+b") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
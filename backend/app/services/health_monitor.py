@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Probe:
+    def __init__(self, name: str, check: Callable[[], Awaitable[Any]], healthy_if: Callable[[Any], bool]):
+        self.name = name
+        self.check = check
+        self.healthy_if = healthy_if
+        self.healthy = False
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.consecutive_failures = 0
+
+
+class HealthMonitor:
+    """
+    Probes the service's dependencies in the background and serves their
+    last known status from memory
+
+    Load balancers poll /health far more often than the dependencies change
+    state, and each probe (listing Ollama's models, counting the vector
+    store) costs a network call or a database query. Every registered probe
+    runs once per ``interval`` instead, and snapshot() only reads the
+    results. A component whose last success is older than ``stale_after``
+    counts as unhealthy even if no probe has failed yet, e.g. when a probe
+    hangs.
+    """
+
+    def __init__(self, interval: float = 5.0, timeout: float = 3.0, stale_after: Optional[float] = None):
+        """
+        Initialize the monitor
+
+        Args:
+            interval: Seconds between probe rounds
+            timeout: Seconds before a probe counts as failed
+            stale_after: Seconds after the last success at which a component
+                is reported unhealthy (default: three intervals plus the timeout)
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after if stale_after is not None else 3 * interval + timeout
+        self._probes: Dict[str, _Probe] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._rounds = 0
+
+        logger.info(f"HealthMonitor initialized with interval {interval}s, probe timeout {timeout}s")
+
+    def register(
+        self,
+        name: str,
+        check: Callable[[], Awaitable[Any]],
+        healthy_if: Callable[[Any], bool] = lambda value: value is not False
+    ) -> None:
+        """
+        Add a component to probe
+
+        Args:
+            name: Component name in the snapshot
+            check: Coroutine function probing the component; raising counts
+                as a failure, and its return value is kept in the snapshot
+            healthy_if: Whether a returned value means healthy (default:
+                anything but False)
+        """
+        self._probes[name] = _Probe(name, check, healthy_if)
+
+    @property
+    def has_run(self) -> bool:
+        """Whether at least one probe round has finished"""
+        return self._rounds > 0
+
+    async def refresh(self) -> None:
+        """Run every probe now (concurrently); callers arriving meanwhile share the round"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._lock.locked():
+            async with self._lock:
+                return
+        async with self._lock:
+            await asyncio.gather(*(self._run(probe) for probe in self._probes.values()))
+            self._rounds += 1
+
+    def start(self) -> None:
+        """Start probing in the background on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background probes"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def is_healthy(self, name: str) -> bool:
+        """Whether a component's last probe succeeded recently enough"""
+        probe = self._probes.get(name)
+        return probe is not None and self._is_healthy(probe, time.time())
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """Last value a component's probe returned successfully"""
+        probe = self._probes.get(name)
+        return probe.value if probe is not None and probe.value is not None else default
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Last known status of every component
+
+        Returns:
+            Component name -> healthy flag, last probe value and error,
+            probe latency, and the last check and success as Unix timestamps
+        """
+        now = time.time()
+        return {
+            probe.name: {
+                "healthy": self._is_healthy(probe, now),
+                "value": probe.value,
+                "error": probe.error,
+                "latency_ms": probe.latency_ms,
+                "last_checked": probe.last_checked,
+                "last_success": probe.last_success,
+                "seconds_since_success": round(now - probe.last_success, 1) if probe.last_success else None,
+                "consecutive_failures": probe.consecutive_failures,
+            }
+            for probe in self._probes.values()
+        }
+
+    def _is_healthy(self, probe: _Probe, now: float) -> bool:
+        return (
+            probe.healthy
+            and probe.last_success is not None
+            and now - probe.last_success <= self.stale_after
+        )
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def _run(self, probe: _Probe) -> None:
+        t0 = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(probe.check(), timeout=self.timeout)
+            healthy = probe.healthy_if(value)
+            error = None if healthy else "unhealthy"
+        except asyncio.TimeoutError:
+            value, healthy, error = None, False, f"probe timed out after {self.timeout}s"
+        except Exception as e:
+            value, healthy, error = None, False, f"{type(e).__name__}: {e}"
+
+        probe.latency_ms = round((time.perf_counter() - t0) * 1000, 3)
+        probe.last_checked = time.time()
+        probe.healthy = healthy
+        probe.error = error
+        if value is not None:
+            probe.value = value
+        # Log transitions only; the probes repeat every interval
+        if healthy:
+            if probe.consecutive_failures:
+                logger.info(f"Component {probe.name} is healthy again")
+            probe.last_success = probe.last_checked
+            probe.consecutive_failures = 0
+        else:
+            probe.consecutive_failures += 1
+            if probe.consecutive_failures == 1:
+                logger.warning(f"Component {probe.name} is unhealthy: {error}")
@@ -0,0 +1,470 @@
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing.connection import wait as connection_wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .context_builder import load_token_counter
+from .executor import PipelineOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Processes are started with 'spawn': forking a process that already runs
+# PyTorch/tokenizer threads can deadlock the child
+_CONTEXT = multiprocessing.get_context("spawn")
+# Message id of a worker's "loaded" / "failed to load" report
+_STARTUP = -1
+
+
+def _build_service(kind: str, options: Dict) -> Any:
+    if kind == "translator":
+        from .translator import NLLBTranslator
+        return NLLBTranslator(**options)
+    if kind == "embedder":
+        from .embedder import QueryEmbedder
+        return QueryEmbedder(**options)
+    raise ValueError(f"Unknown inference worker kind: {kind}")
+
+
+def _describe(kind: str, service: Any) -> Dict:
+    if kind == "embedder":
+        return {"model_name": service.model_name, "dimension": service.dimension, "max_tokens": service.max_tokens}
+    return {"model_name": service.model_name}
+
+
+def _handle(service: Any, request: tuple, send: Callable[[tuple], None]) -> None:
+    request_id, method, args = request
+    try:
+        result = getattr(service, method)(*args)
+    except Exception as e:
+        send((request_id, False, f"{type(e).__name__}: {e}"))
+        return
+    send((request_id, True, result))
+
+
+def _worker_main(kind: str, options: Dict, warmup: bool, threads: int, concurrency: int, log_level: str, conn) -> None:
+    """Entry point of an inference worker process"""
+    logging.basicConfig(
+        level=getattr(logging, log_level),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    send_lock = threading.Lock()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    try:
+        service = _build_service(kind, options)
+        if warmup:
+            service.warmup()
+    except Exception as e:
+        logger.error(f"Inference worker ({kind}) failed to load: {e}", exc_info=True)
+        send((_STARTUP, False, f"{type(e).__name__}: {e}"))
+        return
+    send((_STARTUP, True, _describe(kind, service)))
+
+    # Requests are handled concurrently so the service's micro-batcher can group them
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=f"{kind}-worker") as pool:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break  # the web process is gone
+            if request is None:
+                break
+            pool.submit(_handle, service, request, send)
+    service.close()
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.in_flight: Set[int] = set()
+        self.ready = False
+        self.dead = False
+
+
+class InferenceWorkerPool:
+    """
+    Runs a translator or embedder in separate processes behind a request queue
+
+    Model inference then neither holds the web process's GIL nor competes
+    with the event loop, and the number of model processes is sized
+    independently of HTTP concurrency. Each process has its own pipe, and
+    a request goes to the process with the fewest requests in flight. A
+    process handles up to ``concurrency`` requests at once, which its
+    service's micro-batcher groups into batched model calls. At most
+    ``max_pending`` requests may be in flight: callers beyond that are
+    rejected with PipelineOverloadedError instead of queueing without
+    bound. A process that dies fails its in-flight requests and is
+    restarted.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        options: Dict,
+        processes: int = 1,
+        threads_per_process: int = 0,
+        concurrency: int = 16,
+        max_pending: int = 64,
+        timeout: float = 60.0,
+        warmup: bool = True,
+        log_level: str = "INFO",
+        startup_timeout: float = 900.0
+    ):
+        """
+        Start the worker processes and wait until their models are loaded
+
+        Args:
+            kind: 'translator' (NLLBTranslator) or 'embedder' (QueryEmbedder)
+            options: Keyword arguments for the service constructor
+            processes: Number of worker processes
+            threads_per_process: PyTorch intra-op threads per process (0 = library default)
+            concurrency: Requests handled at once by each process
+            max_pending: Requests in flight before callers are rejected
+            timeout: Seconds to wait for one result
+            warmup: Run the service's warm-up call before reporting ready
+            log_level: Logging level of the worker processes
+            startup_timeout: Seconds to wait for the models to load
+
+        Raises:
+            RuntimeError: If a worker process fails to load its model
+        """
+        self.kind = kind
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._worker_args = (kind, options, warmup, threads_per_process, concurrency, log_level)
+
+        self._pending: Dict[int, Tuple[Future, _Worker]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False  # no new requests
+        self._stopped = False  # reader thread exits
+        self._requests_total = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._restarts = 0
+        self._last_restart = 0.0
+
+        logger.info(f"Starting {processes} {kind} inference worker process(es)")
+        t0 = time.perf_counter()
+        self._workers = [self._spawn() for _ in range(max(1, processes))]
+        self.info: Dict = {}
+        try:
+            deadline = time.monotonic() + startup_timeout
+            for worker in self._workers:
+                if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise RuntimeError(f"{kind} inference worker did not load within {startup_timeout}s")
+                try:
+                    _, ok, payload = worker.conn.recv()
+                except EOFError:
+                    raise RuntimeError(f"{kind} inference worker exited while loading (exit code {worker.process.exitcode})")
+                if not ok:
+                    raise RuntimeError(f"{kind} inference worker failed to load: {payload}")
+                worker.ready = True
+                self.info = payload
+        except Exception:
+            self._terminate()
+            raise
+        logger.info(f"{kind} inference workers ready in {time.perf_counter() - t0:.1f}s: {self.info}")
+
+        self._reader = threading.Thread(target=self._read_responses, name=f"{kind}-worker-reader", daemon=True)
+        self._reader.start()
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = _CONTEXT.Pipe()
+        process = _CONTEXT.Process(
+            target=_worker_main,
+            args=(*self._worker_args, child_conn),
+            name=f"{self.kind}-inference",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def call(self, method: str, *args) -> Any:
+        """
+        Call a service method in a worker process and wait for its result
+
+        Raises:
+            PipelineOverloadedError: If max_pending requests are already in flight
+            RuntimeError: If the call failed, timed out or no worker is running
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.kind} inference workers are closed")
+            if len(self._pending) >= self.max_pending:
+                self._rejected += 1
+                raise PipelineOverloadedError(
+                    f"{self.kind} inference workers are busy ({self.max_pending} requests in flight)",
+                    status_code=503
+                )
+            live = [worker for worker in self._workers if not worker.dead]
+            if not live:
+                raise RuntimeError(f"No {self.kind} inference worker is running")
+            # Prefer loaded workers, then the least busy one
+            worker = min(live, key=lambda w: (not w.ready, len(w.in_flight)))
+            request_id = next(self._ids)
+            future: Future = Future()
+            self._pending[request_id] = (future, worker)
+            worker.in_flight.add(request_id)
+            self._requests_total += 1
+
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, method, args))
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise RuntimeError(f"{self.kind} inference worker did not answer {method}() within {self.timeout}s")
+        except (OSError, EOFError) as e:
+            raise RuntimeError(f"{self.kind} inference worker is unavailable: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                worker.in_flight.discard(request_id)
+
+    def _read_responses(self) -> None:
+        while not self._stopped:
+            with self._lock:
+                workers = {worker.conn: worker for worker in self._workers if not worker.dead}
+            ready = connection_wait(list(workers), timeout=1.0) if workers else []
+            if not workers:
+                time.sleep(1.0)
+
+            for conn in ready:
+                worker = workers[conn]
+                try:
+                    request_id, ok, payload = conn.recv()
+                except (EOFError, OSError):
+                    self._mark_dead(worker)
+                    continue
+
+                if request_id == _STARTUP:
+                    if ok:
+                        worker.ready = True
+                        logger.info(f"Restarted {self.kind} inference worker is ready")
+                    else:
+                        logger.error(f"Restarted {self.kind} inference worker failed to load: {payload}")
+                    continue
+
+                with self._lock:
+                    entry = self._pending.pop(request_id, None)
+                    worker.in_flight.discard(request_id)
+                if entry is None:
+                    continue  # the caller timed out
+                if ok:
+                    entry[0].set_result(payload)
+                else:
+                    entry[0].set_exception(RuntimeError(payload))
+
+            # On every pass, after reading any last responses: under steady
+            # load wait() returns at once and would never time out
+            self._restart_dead_workers()
+
+    def _mark_dead(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker.dead:
+                return
+            worker.dead = True
+            failed = [self._pending.pop(request_id)[0] for request_id in worker.in_flight if request_id in self._pending]
+            worker.in_flight.clear()
+        worker.conn.close()
+        worker.process.join(timeout=1)
+        if not self._closed:
+            logger.error(
+                f"{self.kind} inference worker {worker.process.pid} exited (exit code {worker.process.exitcode}); "
+                f"failing {len(failed)} in-flight requests"
+            )
+        for future in failed:
+            future.set_exception(RuntimeError(f"{self.kind} inference worker exited"))
+
+    def _restart_dead_workers(self) -> None:
+        for i, worker in enumerate(self._workers):
+            if self._closed:
+                return
+            if not worker.dead and worker.process.is_alive():
+                continue
+            self._mark_dead(worker)
+            if time.monotonic() - self._last_restart < 10:
+                continue  # a worker that cannot load would otherwise restart in a tight loop
+            self._last_restart = time.monotonic()
+            self._restarts += 1
+            logger.info(f"Restarting {self.kind} inference worker")
+            replacement = self._spawn()
+            with self._lock:
+                self._workers[i] = replacement
+
+    def stats(self) -> Dict:
+        """Get request counters and worker process state"""
+        with self._lock:
+            return {
+                "processes": len(self._workers),
+                "alive": sum(1 for worker in self._workers if not worker.dead and worker.process.is_alive()),
+                "in_flight": len(self._pending),
+                "requests": self._requests_total,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "restarts": self._restarts,
+            }
+
+    def close(self) -> None:
+        """Let the workers finish queued requests, then stop them"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, EOFError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=10)
+        # Give the reader a moment to deliver the last results
+        deadline = time.monotonic() + 2.0
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._terminate()
+
+    def _terminate(self) -> None:
+        self._closed = True
+        self._stopped = True
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        with self._lock:
+            for future, _ in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.kind} inference workers stopped"))
+            self._pending.clear()
+
+
+class RemoteTranslator:
+    """NLLBTranslator interface served by translator worker processes"""
+
+    def __init__(self, pool: InferenceWorkerPool):
+        """
+        Args:
+            pool: Worker pool of kind 'translator'
+        """
+        self.pool = pool
+        self.model_name = pool.info.get("model_name")
+
+    def translate(self, text: str, source_lang: str, target_lang: str, max_length: int = 512) -> str:
+        """Translate one text (see NLLBTranslator.translate)"""
+        # Trivial cases are answered without a round trip
+        if not text or not text.strip():
+            return ""
+        if source_lang == target_lang:
+            return text
+        return self.pool.call("translate", text, source_lang, target_lang, max_length)
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str, max_length: int = 512) -> List[str]:
+        """Translate several texts in one model call (see NLLBTranslator.translate_batch)"""
+        if source_lang == target_lang:
+            return list(texts)
+        return self.pool.call("translate_batch", list(texts), source_lang, target_lang, max_length)
+
+    def translate_to_english(self, text: str, source_lang: str) -> str:
+        """Translate any language to English"""
+        return self.translate(text, source_lang, "eng_Latn")
+
+    def translate_from_english(self, text: str, target_lang: str) -> str:
+        """Translate English to any language"""
+        return self.translate(text, "eng_Latn", target_lang)
+
+    def warmup(self) -> None:
+        """No-op: worker processes warm up before reporting ready"""
+
+    def stats(self) -> Dict:
+        """Get the workers' cache and batching counters"""
+        return {**self.pool.call("stats"), "workers": self.pool.stats()}
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self.pool.close()
+
+
+class RemoteEmbedder:
+    """QueryEmbedder interface served by embedder worker processes"""
+
+    # The model lives in the worker processes
+    model = None
+
+    def __init__(self, pool: InferenceWorkerPool):
+        """
+        Args:
+            pool: Worker pool of kind 'embedder'
+        """
+        self.pool = pool
+        self.model_name = pool.info["model_name"]
+        self._dimension = pool.info["dimension"]
+        self._max_tokens = pool.info["max_tokens"]
+        self._token_counter: Optional[Callable[[str], int]] = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts without caching (used for documents)"""
+        return self.pool.call("encode", list(texts))
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed one search query (cached and micro-batched in the worker)"""
+        return self.pool.call("embed_query", query)
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries in one forward pass"""
+        return self.pool.call("embed_queries", list(queries))
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the embedding model's tokens in a text (without special tokens)
+
+        Chunking calls this for every sentence, so the tokenizer (small, no
+        weights) is loaded in this process instead of paying a round trip.
+        """
+        if self._token_counter is None:
+            self._token_counter = load_token_counter(self.model_name)
+        return self._token_counter(text)
+
+    @property
+    def max_tokens(self) -> Optional[int]:
+        """Maximum sequence length of the embedding model, if known"""
+        return self._max_tokens
+
+    @property
+    def dimension(self) -> int:
+        """Embedding vector size"""
+        return self._dimension
+
+    def warmup(self) -> None:
+        """No-op: worker processes warm up before reporting ready"""
+
+    def stats(self) -> Dict:
+        """Get the workers' cache and batching counters"""
+        return {**self.pool.call("stats"), "workers": self.pool.stats()}
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self.pool.close()
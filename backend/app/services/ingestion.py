@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .chunker import DocumentChunker
+from .vector_store import VectorStore, content_document_id
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = (".txt", ".md")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+class IngestionError(ValueError):
+    """Raised for malformed ingestion input"""
+
+
+class IngestionProgress:
+    """Running counters for one ingestion run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.received = 0
+        self.written = 0
+        self.skipped = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "documents_received": self.received,
+            "documents_skipped": self.skipped,
+            "chunks_written": self.written,
+            "batches": self.batches,
+            "elapsed_seconds": round(elapsed, 2),
+            "chunks_per_second": round(self.written / elapsed, 1) if elapsed > 0 else 0.0,
+            "write_seconds": round(self.write_seconds, 2),
+        }
+
+
+class DocumentIngestor:
+    """
+    Streaming document ingestion into the vector store
+
+    Records are consumed from any iterable, split into chunks (when a
+    chunker is configured) and written in fixed-size batches: each batch is
+    embedded in one encode() call and stored in one backend write, so memory
+    stays bounded by the batch size however large the input is. Records
+    without an ID get a content hash, so re-ingesting the same corpus
+    updates documents in place instead of duplicating them.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        batch_size: int = 64,
+        chunker: Optional[DocumentChunker] = None
+    ):
+        """
+        Initialize the ingestor
+
+        Args:
+            vector_store: Store to write to
+            batch_size: Chunks embedded and written per batch
+            chunker: Splits each document into chunks (None stores whole documents)
+        """
+        self.vector_store = vector_store
+        self.batch_size = max(1, batch_size)
+        self.chunker = chunker
+
+    def ingest(
+        self,
+        records: Iterable[Dict],
+        progress_callback: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Ingest a stream of records
+
+        Args:
+            records: Dictionaries with 'text' and optional 'metadata' and 'id'
+            progress_callback: Called with the progress counters after every batch
+
+        Returns:
+            Final progress counters
+        """
+        progress = IngestionProgress()
+        batch: List[Dict] = []
+
+        for record in records:
+            for entry in self.prepare(record, progress):
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch, progress)
+                    batch = []
+                    if progress_callback:
+                        progress_callback(progress.to_dict())
+
+        if batch:
+            self.write_batch(batch, progress)
+            if progress_callback:
+                progress_callback(progress.to_dict())
+
+        summary = progress.to_dict()
+        logger.info(f"Ingestion finished: {summary}")
+        return summary
+
+    def prepare(self, record: Dict, progress: IngestionProgress) -> List[Dict]:
+        """
+        Turn one input document into the entries to store
+
+        Args:
+            record: Input record (see ingest)
+            progress: Counters to update
+
+        Returns:
+            Entries with 'id', 'text' and 'metadata': one per chunk, or the
+            whole document when no chunker is configured
+        """
+        progress.received += 1
+        text = (record.get("text") or "").strip()
+        if not text:
+            progress.skipped += 1
+            return []
+
+        doc_id = record.get("id") or content_document_id(text)
+        metadata = record.get("metadata") or {}
+        if self.chunker is None:
+            return [{"id": doc_id, "text": text, "metadata": metadata}]
+
+        return [
+            {"id": chunk_id, "text": chunk_text, "metadata": chunk_metadata}
+            for chunk_id, chunk_text, chunk_metadata in self.chunker.chunk_document(text, doc_id, metadata)
+        ]
+
+    def write_batch(self, entries: List[Dict], progress: IngestionProgress) -> None:
+        """
+        Embed and store one batch of prepared entries
+
+        Args:
+            entries: Batch of entries from prepare()
+            progress: Counters to update
+        """
+        # Keep the last occurrence of an ID within the batch
+        batch: Dict[str, Dict] = {}
+        for entry in entries:
+            if entry["id"] in batch:
+                progress.skipped += 1
+            batch[entry["id"]] = entry
+
+        if not batch:
+            return
+
+        t0 = time.perf_counter()
+        self.vector_store.add_documents(
+            documents=[entry["text"] for entry in batch.values()],
+            metadatas=[entry["metadata"] for entry in batch.values()],
+            ids=list(batch)
+        )
+        progress.write_seconds += time.perf_counter() - t0
+        progress.written += len(batch)
+        progress.batches += 1
+        logger.info(
+            f"Ingested batch {progress.batches}: {progress.written} chunks "
+            f"({progress.to_dict()['chunks_per_second']} chunks/s)"
+        )
+
+
+def parse_ndjson_line(line: str, line_number: int) -> Optional[Dict]:
+    """
+    Parse one NDJSON ingestion line
+
+    Each line is either an object with 'text' (or 'document') and optional
+    'metadata' and 'id', or a bare JSON string. Blank lines are ignored.
+
+    Raises:
+        IngestionError: If the line is not valid JSON or has no text
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise IngestionError(f"Line {line_number}: invalid JSON ({e.msg})") from e
+
+    if isinstance(value, str):
+        return {"text": value}
+    if not isinstance(value, dict) or not isinstance(value.get("text", value.get("document")), str):
+        raise IngestionError(f"Line {line_number}: expected an object with a 'text' string")
+    metadata = value.get("metadata")
+    if metadata is not None and not isinstance(metadata, dict):
+        raise IngestionError(f"Line {line_number}: 'metadata' must be an object")
+    return {
+        "text": value.get("text", value.get("document")),
+        "metadata": metadata,
+        "id": value.get("id"),
+    }
+
+
+def iter_ndjson(lines: Iterable[str]) -> Iterator[Dict]:
+    """Parse an NDJSON stream into ingestion records"""
+    for line_number, line in enumerate(lines, start=1):
+        record = parse_ndjson_line(line, line_number)
+        if record is not None:
+            yield record
+
+
+def iter_files(paths: Iterable[str]) -> Iterator[Dict]:
+    """
+    Read ingestion records from files and directories
+
+    .txt/.md files become one record each (with their path as 'source');
+    .ndjson/.jsonl files are parsed line by line. Directories are walked
+    recursively in sorted order.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                yield from iter_files(os.path.join(root, name) for name in sorted(files))
+            continue
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension in NDJSON_EXTENSIONS:
+            with open(path, encoding="utf-8") as f:
+                for record in iter_ndjson(f):
+                    record["metadata"] = {"source": path, **(record.get("metadata") or {})}
+                    yield record
+        elif extension in TEXT_EXTENSIONS:
+            with open(path, encoding="utf-8") as f:
+                yield {"text": f.read(), "metadata": {"source": path}}
+        else:
+            logger.warning(f"Skipping unsupported file: {path}")
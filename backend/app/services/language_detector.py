@@ -1,9 +1,13 @@
-from langdetect import detect, LangDetectException
-from typing import Optional
+from langdetect import DetectorFactory, LangDetectException, detect_langs
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# langdetect is randomized; seed it so the same text always gets the same answer
+DetectorFactory.seed = 0
+
 
 # Language code mapping (ISO 639-1 to NLLB codes)
 LANG_CODE_MAP = {
@@ -37,13 +41,126 @@ LANG_NAME_MAP = {
 }
 
 
+# Each Indic script occupies one aligned 128-codepoint Unicode block
+_SCRIPT_BLOCKS = {
+    0x0900: "hi",  # Devanagari (Hindi, Marathi)
+    0x0980: "bn",  # Bengali
+    0x0A00: "pa",  # Gurmukhi
+    0x0A80: "gu",  # Gujarati
+    0x0B80: "ta",  # Tamil
+    0x0C00: "te",  # Telugu
+    0x0C80: "kn",  # Kannada
+    0x0D00: "ml",  # Malayalam
+}
+# Codepoints are histogrammed in 32-wide bins (``codepoint >> 5``): four bins
+# per script block, and bins 2-3 (U+0040-U+007F) hold the ASCII letters
+_BIN_SHIFT = 5
+_BINS = (max(_SCRIPT_BLOCKS) + 0x80) >> _BIN_SHIFT
+_SCRIPT_BINS = np.array([[(block >> _BIN_SHIFT) + i for i in range(4)] for block in _SCRIPT_BLOCKS], dtype=np.intp)
+_SCRIPT_LANGS = list(_SCRIPT_BLOCKS.values())
+# Function words are looked up in this many leading characters only
+_WORD_SAMPLE_CHARS = 256
+
+# Frequent function words that tell Marathi from Hindi in Devanagari text
+_MARATHI_MARKERS = {
+    "आहे", "आहेत", "काय", "मला", "माझा", "माझी", "माझे", "तुम्ही", "तुमचा", "तुमची", "कसे", "कसा",
+    "किती", "नाही", "आणि", "मध्ये", "करू", "शकतो", "शकते", "होते", "कधी", "कोणते", "म्हणजे", "येथे",
+}
+# Marathi genitive ('च्या'); Hindi uses separate postpositions instead
+_MARATHI_SUFFIX = "च्या"
+_HINDI_MARKERS = {
+    "है", "हैं", "क्या", "मुझे", "मेरा", "मेरी", "मेरे", "आप", "आपका", "कैसे", "कैसा", "कितना", "कितनी",
+    "नहीं", "और", "का", "की", "के", "में", "लिए", "सकता", "सकती", "था", "थी", "कब", "कौन", "यह", "वह",
+}
+
+# Romanized (Latin script) Hindi and Tamil function words
+_ROMANIZED_LEXICONS = {
+    "hi": {
+        "kya", "hai", "hain", "mera", "meri", "mere", "mujhe", "kaise", "kitna", "kitni", "nahi", "nahin",
+        "aur", "kab", "kaun", "kyun", "kyon", "batao", "bataiye", "chahiye", "sakta", "sakte", "sakti",
+        "karna", "karne", "karu", "hoga", "milega", "milta", "mein", "liye", "ko", "se", "ka", "ki", "ke",
+        "yeh", "woh", "hota", "kaunsa", "paisa", "paise", "jama", "nikal", "nikalna",
+    },
+    "ta": {
+        "enna", "yenna", "epdi", "eppadi", "naan", "enakku", "ennoda", "ungal", "unga", "ungaluku",
+        "evvalavu", "evlo", "evalavu", "sollunga", "venum", "vendum", "irukku", "iruku", "illa", "illai",
+        "panna", "pannanum", "pannalama", "eppo", "eppodhu", "yaaru", "thevai", "mudiyuma", "mudiyum",
+        "enga", "engal", "edhu", "ethu", "kidaikkum", "kedaikkum", "panam", "eduka", "edukkalama",
+    },
+}
+# A query counts as romanized Hindi/Tamil with at least this many lexicon
+# words making up at least this share of its words
+_ROMANIZED_MIN_HITS = 2
+_ROMANIZED_MIN_SHARE = 0.25
+
+_WORD_PUNCTUATION = "?!.,;:'\"()[]-।॥"
+
+
+class LanguageDetection(NamedTuple):
+    """Detected language with a confidence in [0, 1] and how it was found"""
+    language: str
+    confidence: float
+    method: str  # 'script', 'romanized', 'statistical' or 'default'
+
+
 class LanguageDetector:
-    """Detects the language of input text"""
+    """
+    Detects the language of input text
+
+    Native scripts are recognized with one vectorized pass: the text's
+    codepoints are counted in a histogram of Unicode block bins.
+    Devanagari is split into Hindi or Marathi by function words, and Latin
+    text is checked against romanized Hindi/Tamil lexicons. langdetect
+    (seeded, so deterministic) is only consulted when a configured language
+    could not be recognized otherwise; every supported language except
+    English has its own script, so by default it is never needed.
+    """
     
     def __init__(self, supported_languages: list[str] = None):
         self.supported_languages = supported_languages or list(LANG_CODE_MAP.keys())
+        script_languages = set(_SCRIPT_BLOCKS.values()) | {"mr"}
+        self._statistical_languages = set(self.supported_languages) - script_languages - {"en"}
         logger.info(f"LanguageDetector initialized with languages: {self.supported_languages}")
     
+    def detect(self, text: str, fallback: bool = True) -> LanguageDetection:
+        """
+        Detect the language of the input text with a confidence score
+        
+        Args:
+            text: Input text
+            fallback: Also check Latin text for romanized Hindi/Tamil (and run
+                langdetect when needed); with False only native scripts are
+                recognized and anything else is reported as English
+            
+        Returns:
+            LanguageDetection(language, confidence, method)
+        """
+        if not text or not text.strip():
+            return LanguageDetection("en", 0.0, "default")
+        
+        # Pure ASCII text cannot contain an Indic script
+        if not text.isascii():
+            detection = self._detect_script(text)
+            if detection is not None:
+                return detection
+        
+        if not fallback:
+            return LanguageDetection("en", 1.0, "default")
+        
+        romanized = self._detect_romanized(text)
+        if romanized is not None:
+            return romanized
+        
+        if self._statistical_languages:
+            try:
+                best = detect_langs(text)[0]
+                if best.lang in self.supported_languages:
+                    return LanguageDetection(best.lang, round(best.prob, 3), "statistical")
+            except LangDetectException as e:
+                logger.debug(f"langdetect failed: {e}")
+        
+        return LanguageDetection("en", 1.0, "default")
+    
     def detect_language(self, text: str) -> str:
         """
         Detect the language of the input text
@@ -54,72 +171,62 @@ class LanguageDetector:
         Returns:
             ISO 639-1 language code (e.g., 'en', 'ta', 'hi')
         """
-        if not text or not text.strip():
-            logger.warning("Empty text provided for language detection, defaulting to 'en'")
-            return "en"
-            
-        # 1. Check for specific Indian language scripts explicitly
-        # This overrides statistical detection which might be confused by English words like "NPS"
-        script_lang = self.detect_script_language(text)
-        if script_lang:
-            logger.info(f"Detected language via script check: {script_lang}")
-            return script_lang
-        
-        # 2. Fallback to statistical detection
-        try:
-            detected_lang = detect(text)
-            
-            # Validate if detected language is supported
-            if detected_lang in self.supported_languages:
-                logger.debug(f"Detected language via langdetect: {detected_lang}")
-                return detected_lang
-            else:
-                logger.warning(
-                    f"Detected language '{detected_lang}' not in supported languages. "
-                    f"Defaulting to 'en'"
-                )
-                return "en"
-                
-        except LangDetectException as e:
-            logger.error(f"Language detection failed: {e}. Defaulting to 'en'")
-            return "en"
+        return self.detect(text).language
 
     def detect_script_language(self, text: str) -> Optional[str]:
-        """Detect language based on Unicode character ranges"""
+        """Detect language based on Unicode character ranges (None for non-Indic text)"""
+        if not text or text.isascii():
+            return None
+        detection = self._detect_script(text)
+        return detection.language if detection is not None else None
+    
+    def _detect_script(self, text: str) -> Optional[LanguageDetection]:
+        codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        bins = np.bincount(codepoints >> _BIN_SHIFT, minlength=_BINS)
+        script_counts = bins[_SCRIPT_BINS].sum(axis=1)
+        best = int(np.argmax(script_counts))
+        if script_counts[best] == 0:
+            return None
         
-        # Count characters in each range
-        counts = {
-            "ta": 0, # Tamil
-            "hi": 0, # Hindi (Devanagari)
-            "te": 0, # Telugu
-            "ml": 0, # Malayalam
-            "bn": 0, # Bengali
-            "gu": 0, # Gujarati
-            "kn": 0, # Kannada
-            "pa": 0, # Punjabi (Gurmukhi)
-        }
+        # Latin letters (e.g. 'NPS' in a Tamil question) lower the confidence
+        latin_letters = int(bins[2] + bins[3])
+        confidence = float(script_counts[best]) / (int(script_counts.sum()) + latin_letters)
+        language = _SCRIPT_LANGS[best]
+        logger.debug(f"Script counts for text '{text[:20]}...': {dict(zip(_SCRIPT_LANGS, script_counts.tolist()))}")
         
-        for char in text:
-            cp = ord(char)
-            
-            if 0x0B80 <= cp <= 0x0BFF: counts["ta"] += 1
-            elif 0x0900 <= cp <= 0x097F: counts["hi"] += 1 # Devanagari (Hindi, Marathi)
-            elif 0x0C00 <= cp <= 0x0C7F: counts["te"] += 1
-            elif 0x0D00 <= cp <= 0x0D7F: counts["ml"] += 1
-            elif 0x0980 <= cp <= 0x09FF: counts["bn"] += 1
-            elif 0x0A80 <= cp <= 0x0AFF: counts["gu"] += 1
-            elif 0x0C80 <= cp <= 0x0CFF: counts["kn"] += 1
-            elif 0x0A00 <= cp <= 0x0A7F: counts["pa"] += 1
-            
-        # Log counts for debugging
-        logger.debug(f"Script counts for text '{text[:20]}...': {counts}")
-        
-        # Return the language with the most characters, if significant
-        best_lang = max(counts, key=counts.get)
-        if counts[best_lang] > 0:
-            return best_lang
-            
-        return None
+        if language == "hi":
+            language, share = self._split_devanagari(text[:_WORD_SAMPLE_CHARS])
+            confidence *= share
+        return LanguageDetection(language, round(confidence, 3), "script")
+    
+    def _split_devanagari(self, text: str) -> Tuple[str, float]:
+        words = [word.strip(_WORD_PUNCTUATION) for word in text.split()]
+        marathi = sum(1 for w in words if w in _MARATHI_MARKERS or (len(w) > 4 and w.endswith(_MARATHI_SUFFIX)))
+        hindi = sum(1 for w in words if w in _HINDI_MARKERS)
+        if marathi > hindi and "mr" in self.supported_languages:
+            return "mr", marathi / (marathi + hindi)
+        if hindi:
+            return "hi", hindi / (marathi + hindi)
+        # No function words either way: Hindi is far more common
+        return "hi", 0.5
+    
+    def _detect_romanized(self, text: str) -> Optional[LanguageDetection]:
+        words = [word.strip(_WORD_PUNCTUATION) for word in text[:_WORD_SAMPLE_CHARS].lower().split()]
+        if not words:
+            return None
+        best_language, best_hits = None, 0
+        for language, lexicon in _ROMANIZED_LEXICONS.items():
+            if language not in self.supported_languages:
+                continue
+            hits = sum(1 for word in words if word in lexicon)
+            if hits > best_hits:
+                best_language, best_hits = language, hits
+        if best_language is None or best_hits < _ROMANIZED_MIN_HITS:
+            return None
+        share = best_hits / len(words)
+        if share < _ROMANIZED_MIN_SHARE:
+            return None
+        return LanguageDetection(best_language, round(min(1.0, 2 * share), 3), "romanized")
     
     def get_nllb_code(self, iso_code: str) -> str:
         """
@@ -1,41 +1,174 @@
 import ollama
+import httpx
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import random
+from typing import AsyncIterator, Callable, List, Dict, NamedTuple, Optional, Sequence, Union
+
+from .context_builder import ContextBuilder
+from .llm_router import LLMRouter, OllamaBackend
+from .metrics import observe_generation
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = """You are an expert assistant for the National Pension System (NPS) in India. 
+Your role is to provide accurate, helpful, and detailed information about NPS.
+You MUST provide your entire response in {language}.
+Even if the context is in English, you must translate the relevant information and respond ONLY in {language}.
+
+Use the provided context to answer questions accurately. If you're not sure about something, say so.
+Be concise but comprehensive. Use bullet points and formatting when helpful."""
+
+# Reloading a model that was kept in memory takes well under this
+_MODEL_LOAD_WARNING_SECONDS = 1.0
+
+ERROR_RESPONSE = "I apologize, but I encountered an error while processing your question. Please try again or rephrase your question."
+
+
+class GenerationResult(NamedTuple):
+    """Generated text with the token counts and timings reported by Ollama"""
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_eval_seconds: float = 0.0
+    eval_seconds: float = 0.0
+    load_seconds: float = 0.0
+    
+    @classmethod
+    def from_response(cls, text: str, response) -> "GenerationResult":
+        """Build from a final Ollama generate response (durations are in nanoseconds)"""
+        return cls(
+            text=text,
+            prompt_tokens=response.get('prompt_eval_count') or 0,
+            completion_tokens=response.get('eval_count') or 0,
+            prompt_eval_seconds=(response.get('prompt_eval_duration') or 0) / 1e9,
+            eval_seconds=(response.get('eval_duration') or 0) / 1e9,
+            load_seconds=(response.get('load_duration') or 0) / 1e9
+        )
+    
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Decoding throughput, if Ollama reported it"""
+        if not self.eval_seconds or not self.completion_tokens:
+            return None
+        return self.completion_tokens / self.eval_seconds
+    
+    def usage(self) -> Dict:
+        """Token counts and throughput for API responses"""
+        tokens_per_second = self.tokens_per_second
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(tokens_per_second, 2) if tokens_per_second is not None else None,
+            "prompt_eval_seconds": round(self.prompt_eval_seconds, 4),
+            "eval_seconds": round(self.eval_seconds, 4),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
 
 class LlamaClient:
-    """Client for interacting with Llama 3 via Ollama"""
+    """Async client for interacting with Llama 3 via Ollama"""
     
     def __init__(
         self,
-        base_url: str = "http://127.0.0.1:11434",
-        model: str = "llama3"
+        base_url: Union[str, Sequence[str]] = "http://127.0.0.1:11434",
+        model: str = "llama3",
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        max_concurrency: int = 4,
+        max_connections: int = 8,
+        keepalive_expiry: float = 60.0,
+        context_builder: Optional[ContextBuilder] = None,
+        keep_alive: Union[str, int, None] = "30m",
+        num_ctx: int = 0,
+        num_thread: int = 0,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        reference_text: str = "",
+        hedge_after: float = 0.0,
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0
     ):
         """
         Initialize Llama client
         
         Args:
-            base_url: Ollama server base URL
+            base_url: Ollama server base URL, or a list of them to balance
+                requests across
             model: Model name (e.g., 'llama3')
+            timeout: Read/write timeout for one Ollama call in seconds
+            connect_timeout: Timeout for opening a connection in seconds
+            max_retries: Retries after a failed call (connection errors, timeouts, 5xx)
+            retry_backoff: Base delay for exponential backoff between retries in seconds
+            max_concurrency: Maximum number of generations in flight at once per
+                server (each server has its own limit)
+            max_connections: Size of the HTTP connection pool per server
+            keepalive_expiry: Seconds an idle pooled connection is kept open
+            context_builder: Packs retrieved documents into the prompt under a
+                token budget (default: ContextBuilder())
+            keep_alive: How long Ollama keeps the model (and its prompt cache)
+                loaded after a request, e.g. '30m'; -1 keeps it forever,
+                None or '' uses the server default
+            num_ctx: Context window in tokens (0 = model default); a request
+                with a different value makes Ollama reload the model
+            num_thread: CPU threads Ollama uses for the model (0 = server default)
+            system_prompt: Instructions opening every prompt; '{language}' is
+                replaced by the target language
+            reference_text: Static background text placed after the
+                instructions, before the retrieved context
+            hedge_after: Seconds without a first token before a request is
+                also sent to another server (0 disables hedging)
+            eject_after_failures: Consecutive failures that take a server out of rotation
+            eject_seconds: How long an ejected server is skipped
         """
-        self.base_url = base_url
+        base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.base_url = base_urls[0]
         self.model = model
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max_concurrency
+        self.keep_alive = self._parse_keep_alive(keep_alive)
+        self.system_prompt = system_prompt
+        self.reference_text = reference_text.strip()
         
-        # Configure ollama client
-        ollama.Client(host=base_url)
+        # Fixed for every call: Ollama reloads the model when num_ctx changes
+        self.model_options = {}
+        if num_ctx > 0:
+            self.model_options['num_ctx'] = num_ctx
+        if num_thread > 0:
+            self.model_options['num_thread'] = num_thread
+        self._prompt_prefixes: Dict[str, str] = {}
         
-        logger.info(f"LlamaClient initialized with model: {model} at {base_url}")
+        self.router = LLMRouter(
+            [
+                OllamaBackend(
+                    url,
+                    timeout=timeout,
+                    connect_timeout=connect_timeout,
+                    max_concurrency=max_concurrency,
+                    max_connections=max_connections,
+                    keepalive_expiry=keepalive_expiry
+                )
+                for url in base_urls
+            ],
+            eject_after_failures=eject_after_failures,
+            eject_seconds=eject_seconds,
+            hedge_after=hedge_after
+        )
+        self.context_builder = context_builder or ContextBuilder()
+        
+        logger.info(f"LlamaClient initialized with model: {model} at {', '.join(base_urls)}")
     
-    def generate_response(
+    async def generate_response(
         self,
         query: str,
         context_documents: List[str],
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
-        target_language: str = "English"
+        target_language: str = "English",
+        context_scores: Optional[List[float]] = None
     ) -> str:
         """
         Generate a response using Llama 3 with RAG context
@@ -47,105 +180,432 @@ class LlamaClient:
             temperature: Sampling temperature (0.0 to 1.0)
             max_tokens: Maximum tokens to generate
             target_language: Language to respond in
+            context_scores: Retrieval scores of context_documents (higher is
+                better), used to pack the context budget
+        """
+        result = await self.generate(
+            query, context_documents, system_prompt, temperature, max_tokens, target_language, context_scores
+        )
+        return result.text
+    
+    async def generate(
+        self,
+        query: str,
+        context_documents: List[str],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        target_language: str = "English",
+        context_scores: Optional[List[float]] = None
+    ) -> GenerationResult:
+        """
+        Generate a response like generate_response, also returning Ollama's
+        token counts and timings
+        
+        Returns:
+            GenerationResult (zero counts when generation failed)
+        """
+        if not query or not query.strip():
+            logger.warning("Empty query provided for generation")
+            return GenerationResult("I didn't receive a valid question. Please try again.")
+        
+        full_prompt = self._build_prompt(query, context_documents, system_prompt, target_language, context_scores)
+        
+        try:
+            logger.info(f"Generating response for query: {query[:100]}...")
+            
+            # The server's concurrency slot is taken by the router after it picks the server
+            result = await self._with_retries(
+                lambda: self._generate_once(full_prompt, temperature, max_tokens)
+            )
+            
+            self._record(result)
+            
+            logger.info(f"Generated response: {result.text[:100]}...")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to generate response: {e}")
+            return GenerationResult(ERROR_RESPONSE)
+    
+    async def generate_response_stream(
+        self,
+        query: str,
+        context_documents: List[str],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        target_language: str = "English",
+        context_scores: Optional[List[float]] = None,
+        on_complete: Optional[Callable[[GenerationResult], None]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response like generate_response, yielding text fragments
+        as Ollama produces them
+        
+        Only opening the stream is retried; once fragments have been sent
+        a failure ends the stream.
+        
+        Args:
+            query: User query
+            context_documents: Retrieved documents for context
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            target_language: Language to respond in
+            context_scores: Retrieval scores of context_documents (higher is
+                better), used to pack the context budget
+            on_complete: Called with the full text and Ollama's token counts
+                once the stream has finished successfully
         """
         if not query or not query.strip():
             logger.warning("Empty query provided for generation")
-            return "I didn't receive a valid question. Please try again."
+            yield "I didn't receive a valid question. Please try again."
+            return
+        
+        full_prompt = self._build_prompt(query, context_documents, system_prompt, target_language, context_scores)
+        
+        try:
+            logger.info(f"Streaming response for query: {query[:100]}...")
+            
+            (first_chunk, chunks), backend = await self._with_retries(
+                lambda: self._open_stream(full_prompt, temperature, max_tokens)
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to stream response: {e}")
+            yield ERROR_RESPONSE
+            return
+        
+        released = False
+        try:
+            last_chunk = first_chunk
+            fragments = []
+            if first_chunk['response']:
+                fragments.append(first_chunk['response'])
+                yield first_chunk['response']
+            async for chunk in chunks:
+                last_chunk = chunk
+                fragment = chunk['response']
+                if fragment:
+                    fragments.append(fragment)
+                    yield fragment
+        except Exception as e:
+            logger.error(f"Response stream interrupted: {e}")
+            self.router.release(backend, error=e)
+            released = True
+            await self._close_stream(chunks)
+            yield f"\n\n{ERROR_RESPONSE}"
+            return
+        finally:
+            # The consumer went away mid-stream (client disconnect or cancellation)
+            if not released and not last_chunk.get('done'):
+                self.router.release(backend, cancelled=True)
+                released = True
+                await self._close_stream(chunks)
+        if released:
+            return
+        
+        # The final chunk carries the token counts
+        result = GenerationResult.from_response("".join(fragments).strip(), last_chunk)
+        self.router.release(backend, tokens_per_second=result.tokens_per_second)
+        self._record(result)
+        if on_complete is not None:
+            on_complete(result)
+    
+    async def _generate_once(self, prompt: str, temperature: float, max_tokens: int) -> GenerationResult:
+        """
+        One complete generation; streamed internally so that it can be hedged
+        on the first token like generate_response_stream
+        """
+        (first_chunk, chunks), backend = await self._open_stream(prompt, temperature, max_tokens)
+        try:
+            last_chunk = first_chunk
+            fragments = [first_chunk['response']]
+            async for chunk in chunks:
+                last_chunk = chunk
+                fragments.append(chunk['response'])
+        except Exception as e:
+            self.router.release(backend, error=e)
+            await self._close_stream(chunks)
+            raise
+        except BaseException:
+            self.router.release(backend, cancelled=True)
+            await self._close_stream(chunks)
+            raise
+        result = GenerationResult.from_response("".join(fragments).strip(), last_chunk)
+        self.router.release(backend, tokens_per_second=result.tokens_per_second)
+        return result
+    
+    async def _open_stream(self, prompt: str, temperature: float, max_tokens: int):
+        """
+        Start a streaming generation on the best server and wait for its
+        first chunk, so that connection failures surface here and can be
+        retried (and slow servers hedged)
         
+        The server stays counted as busy until router.release() is called.
+        
+        Returns:
+            Tuple of ((first chunk, async iterator over the remaining chunks), backend)
+        """
+        async def open_on(backend: OllamaBackend):
+            chunks = await backend.client.generate(
+                model=self.model,
+                prompt=prompt,
+                stream=True,
+                options=self._options(temperature, max_tokens),
+                keep_alive=self.keep_alive
+            )
+            first_chunk = await chunks.__anext__()
+            return first_chunk, chunks
+        
+        async def discard(stream) -> None:
+            await self._close_stream(stream[1])
+        
+        return await self.router.call(open_on, discard=discard)
+    
+    @staticmethod
+    async def _close_stream(chunks) -> None:
+        """
+        Stop an unfinished Ollama stream: closing it returns the pooled
+        connection, and Ollama stops generating once the connection drops
+        """
+        try:
+            await chunks.aclose()
+        except Exception as e:
+            logger.debug(f"Closing Ollama stream failed: {e}")
+    
+    def _options(self, temperature: float, max_tokens: int) -> Dict:
+        """Ollama options for one call"""
+        return {
+            'temperature': temperature,
+            'num_predict': max_tokens,
+            **self.model_options,
+        }
+    
+    @staticmethod
+    def _parse_keep_alive(keep_alive: Union[str, int, None]) -> Union[str, int, None]:
+        """Ollama takes durations like '30m' as strings but bare seconds (e.g. -1) as numbers"""
+        if isinstance(keep_alive, str):
+            keep_alive = keep_alive.strip()
+            if not keep_alive:
+                return None
+            if keep_alive.lstrip('-').isdigit():
+                return int(keep_alive)
+        return keep_alive
+    
+    def _record(self, result: GenerationResult) -> None:
+        """Export the generation's token counts and throughput"""
+        if result.load_seconds > _MODEL_LOAD_WARNING_SECONDS:
+            logger.warning(
+                f"Ollama loaded {self.model} for this request ({result.load_seconds:.1f}s); "
+                f"check keep_alive ({self.keep_alive}) and that num_ctx is the same for every caller"
+            )
+        if result.completion_tokens:
+            observe_generation(
+                result.prompt_tokens, result.completion_tokens, result.eval_seconds, result.prompt_eval_seconds
+            )
+            logger.info(
+                f"LLM tokens: prompt={result.prompt_tokens} evaluated in {result.prompt_eval_seconds:.3f}s, "
+                f"completion={result.completion_tokens}, {result.tokens_per_second or 0:.1f} tokens/s"
+            )
+    
+    async def _with_retries(self, call):
+        """
+        Await ``call()`` and retry transient failures with exponential backoff
+        
+        Args:
+            call: Zero-argument callable returning an awaitable
+            
+        Returns:
+            The awaited result of the first successful attempt
+        """
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                attempt += 1
+                logger.warning(
+                    f"Ollama call failed ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Connection errors, timeouts and server-side errors are worth retrying"""
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+    
+    def _build_prompt(
+        self,
+        query: str,
+        context_documents: List[str],
+        system_prompt: Optional[str],
+        target_language: str,
+        context_scores: Optional[List[float]] = None
+    ) -> str:
+        """
+        Assemble the full prompt sent to the model
+        
+        Args:
+            query: User query
+            context_documents: Retrieved documents for context
+            system_prompt: Optional system prompt
+            target_language: Language to respond in
+            context_scores: Retrieval scores of context_documents
+            
+        Returns:
+            Prompt string
+        """
         # Build context from documents
-        context = self._build_context(context_documents)
+        context = self._build_context(context_documents, context_scores, query)
         
-        # Build the prompt
+        # Everything before the context is the same for every query in this
+        # language, so Ollama can reuse its evaluated prefix from the last call
         if system_prompt is None:
-            system_prompt = f"""You are an expert assistant for the National Pension System (NPS) in India. 
-Your role is to provide accurate, helpful, and detailed information about NPS.
-You MUST provide your entire response in {target_language}.
-Even if the context is in English, you must translate the relevant information and respond ONLY in {target_language}.
-
-Use the provided context to answer questions accurately. If you're not sure about something, say so.
-Be concise but comprehensive. Use bullet points and formatting when helpful."""
+            prefix = self.prompt_prefix(target_language)
+        else:
+            prefix = f"{system_prompt}\n\n"
         
-        # Construct the full prompt
-        full_prompt = f"""{system_prompt}
-
-Context from NPS knowledge base (in English):
+        return f"""{prefix}Context from NPS knowledge base (in English):
 {context}
 
 User Question: {query}
 
 Please provide a detailed and accurate answer in {target_language} based on the context above:"""
+    
+    def prompt_prefix(self, target_language: str) -> str:
+        """
+        Static start of the prompt for a target language: the system prompt
+        and the reference text
         
-        try:
-            logger.info(f"Generating response for query: {query[:100]}...")
-            
-            # Call Ollama API
-            response = ollama.generate(
-                model=self.model,
-                prompt=full_prompt,
-                options={
-                    'temperature': temperature,
-                    'num_predict': max_tokens,
-                }
-            )
-            
-            generated_text = response['response'].strip()
-            
-            logger.info(f"Generated response: {generated_text[:100]}...")
-            return generated_text
+        Args:
+            target_language: Language to respond in
             
-        except Exception as e:
-            logger.error(f"Failed to generate response: {e}")
-            return f"I apologize, but I encountered an error while processing your question. Please try again or rephrase your question."
+        Returns:
+            Prefix string, identical for every query in that language
+        """
+        prefix = self._prompt_prefixes.get(target_language)
+        if prefix is None:
+            prefix = self.system_prompt.replace("{language}", target_language) + "\n\n"
+            if self.reference_text:
+                prefix += f"Reference information about NPS:\n{self.reference_text}\n\n"
+            self._prompt_prefixes[target_language] = prefix
+        return prefix
     
-    def _build_context(self, documents: List[str], max_length: int = 2000) -> str:
+    def _build_context(
+        self,
+        documents: List[str],
+        scores: Optional[List[float]] = None,
+        query: str = ""
+    ) -> str:
         """
         Build context string from retrieved documents
         
         Args:
-            documents: List of document texts
-            max_length: Maximum character length for context
+            documents: List of document texts, best first
+            scores: Retrieval scores (higher is better)
+            query: Query used to pick the most relevant sentences of long documents
             
         Returns:
-            Formatted context string
+            Formatted context string within the context builder's token budget
+        """
+        context, stats = self.context_builder.build(query, documents, scores)
+        logger.info(
+            f"Context: {stats['documents_used']}/{len(documents)} documents, "
+            f"{stats['context_tokens']} tokens"
+        )
+        return context
+    
+    async def warmup(self, target_languages: List[str]) -> Dict[str, GenerationResult]:
         """
-        if not documents:
-            return "No specific context available."
+        Load the model and evaluate the prompt prefix of each target language
         
-        context_parts = []
-        current_length = 0
+        Ollama keeps the evaluated prompt of its recent requests (one per
+        parallel slot), so the first queries in these languages only pay for
+        their context and question. Every server is warmed up; each stops at
+        its first failure, e.g. when Ollama is not running yet.
         
-        for i, doc in enumerate(documents, 1):
-            doc_text = f"\n[Document {i}]\n{doc}\n"
-            
-            if current_length + len(doc_text) > max_length:
-                break
+        Args:
+            target_languages: Language names, e.g. ['English', 'Hindi']
             
-            context_parts.append(doc_text)
-            current_length += len(doc_text)
+        Returns:
+            '<server> <language>' -> result of its warm-up call (prompt tokens and timings)
+        """
+        async def warm(backend: OllamaBackend) -> Dict[str, GenerationResult]:
+            backend_results = {}
+            for language in target_languages:
+                try:
+                    async with backend.slots:
+                        response = await backend.client.generate(
+                            model=self.model,
+                            prompt=self.prompt_prefix(language),
+                            options=self._options(0.0, 1),
+                            keep_alive=self.keep_alive
+                        )
+                except Exception as e:
+                    logger.warning(f"LLM warm-up for {language} on {backend.base_url} failed: {e}")
+                    break
+                result = GenerationResult.from_response("", response)
+                backend_results[f"{backend.base_url} {language}"] = result
+                logger.info(
+                    f"LLM warm-up ({language}, {backend.base_url}): {result.prompt_tokens} prefix tokens "
+                    f"evaluated in {result.prompt_eval_seconds:.2f}s, model load {result.load_seconds:.2f}s"
+                )
+            return backend_results
         
-        return "\n".join(context_parts)
+        results = {}
+        for backend_results in await asyncio.gather(*(warm(b) for b in self.router.backends)):
+            results.update(backend_results)
+        return results
     
-    def check_health(self) -> bool:
+    async def check_health(self) -> bool:
         """
-        Check if Ollama server is running and model is available
+        Check if at least one Ollama server is running and has the model
+        
+        Servers that pass are put back into rotation if they were ejected;
+        failures count towards ejection like failed requests.
         
         Returns:
             True if healthy, False otherwise
         """
+        results = await asyncio.gather(*(self._check_backend(b) for b in self.router.backends))
+        return any(results)
+    
+    async def _check_backend(self, backend: OllamaBackend) -> bool:
         try:
             # Try to list models
-            models = ollama.list()
+            models = await backend.client.list()
             
             # Check if our model is available
-            model_names = [m['name'] for m in models.get('models', [])]
+            model_names = [m.get('model') or m.get('name', '') for m in models.get('models', [])]
             
             if self.model in model_names or any(self.model in name for name in model_names):
-                logger.info(f"Health check passed. Model {self.model} is available.")
+                logger.debug(f"Health check passed. Model {self.model} is available at {backend.base_url}.")
+                self.router.mark_healthy(backend)
                 return True
             else:
-                logger.warning(f"Model {self.model} not found in available models: {model_names}")
+                logger.warning(f"Model {self.model} not found at {backend.base_url} in available models: {model_names}")
+                self.router.mark_failed(backend, LookupError(f"model {self.model} not available"))
                 return False
                 
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.debug(f"Health check of {backend.base_url} failed: {e}")
+            self.router.mark_failed(backend, e)
             return False
+    
+    def stats(self) -> Dict:
+        """Per-server load, speed and health"""
+        return self.router.stats()
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        await self.router.close()
+        logger.info("LlamaClient connections closed")
@@ -0,0 +1,352 @@
+import ollama
+import httpx
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import observe_backend_request, observe_hedge
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaBackend:
+    """One Ollama server with its load and health statistics"""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_concurrency: int = 4,
+        max_connections: int = 8,
+        keepalive_expiry: float = 60.0,
+        speed_smoothing: float = 0.3
+    ):
+        """
+        Initialize a backend
+
+        Args:
+            base_url: Ollama server base URL
+            timeout: Read/write timeout for one call in seconds
+            connect_timeout: Timeout for opening a connection in seconds
+            max_concurrency: Generations sent to this server at once; further
+                requests routed here wait for a slot
+            max_connections: Size of the HTTP connection pool
+            keepalive_expiry: Seconds an idle pooled connection is kept open
+            speed_smoothing: Weight of the newest sample in the tokens/s average
+        """
+        self.base_url = base_url
+        self.speed_smoothing = speed_smoothing
+
+        # One pooled, keep-alive HTTP client for the lifetime of the service
+        self.client = ollama.AsyncClient(
+            host=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+
+        # Held from the start of a request until LLMRouter.release()
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.tokens_per_second: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+        self.requests = 0
+        self.failures = 0
+        self.hedges_won = 0
+
+    def is_ejected(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.ejected_until
+
+    def stats(self) -> Dict[str, Any]:
+        """Load, speed and health counters"""
+        now = time.monotonic()
+        return {
+            "base_url": self.base_url,
+            "in_flight": self.in_flight,
+            "tokens_per_second": round(self.tokens_per_second, 2) if self.tokens_per_second is not None else None,
+            "ejected": self.is_ejected(now),
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - now), 1),
+            "consecutive_failures": self.consecutive_failures,
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+            "last_error": self.last_error,
+        }
+
+    async def close(self) -> None:
+        # ollama.AsyncClient does not expose aclose(); close its httpx client directly
+        await self.client._client.aclose()
+
+
+class LLMRouter:
+    """
+    Spreads generations over several Ollama servers.
+
+    Each request goes to the healthy backend with the lowest expected wait,
+    estimated from its requests in flight and its observed decoding speed.
+    A backend that fails ``eject_after_failures`` times in a row is taken
+    out of rotation for ``eject_seconds`` (then tried again), and a backend
+    that failed recently is only used when no other is available.
+
+    With ``hedge_after`` > 0, a request that has not produced its result
+    (for streams: the first chunk) within that many seconds is also sent to
+    the next best backend; the first to answer wins and the other is
+    cancelled.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[OllamaBackend],
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0,
+        hedge_after: float = 0.0
+    ):
+        """
+        Initialize the router
+
+        Args:
+            backends: Ollama servers to route between
+            eject_after_failures: Consecutive failures that take a backend out of rotation
+            eject_seconds: How long an ejected backend is skipped
+            hedge_after: Seconds before a slow request is duplicated on another
+                backend (0 disables hedging)
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends: List[OllamaBackend] = list(backends)
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.hedge_after = hedge_after
+        self._hedges = 0
+
+        logger.info(
+            f"LLMRouter initialized with {len(self.backends)} backends: "
+            f"{', '.join(b.base_url for b in self.backends)} (hedge after {hedge_after}s)"
+        )
+
+    def pick(self, exclude: Sequence[OllamaBackend] = ()) -> Optional[OllamaBackend]:
+        """
+        Choose the backend for the next request
+
+        Args:
+            exclude: Backends already serving this request
+
+        Returns:
+            The least loaded healthy backend. If every backend is ejected, the
+            one whose ejection ends first (None when backends are excluded,
+            so a hedge is not sent to an ejected backend)
+        """
+        candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [b for b in candidates if not b.is_ejected(now)]
+        if not healthy:
+            if exclude:
+                return None
+            return min(candidates, key=lambda b: b.ejected_until)
+
+        # Backends without a measurement yet are assumed to be as fast as the average
+        speeds = [b.tokens_per_second for b in self.backends if b.tokens_per_second]
+        default_speed = sum(speeds) / len(speeds) if speeds else 1.0
+
+        def expected_wait(backend: OllamaBackend) -> Tuple[bool, float, float]:
+            return (
+                backend.consecutive_failures > 0,
+                (backend.in_flight + 1) / (backend.tokens_per_second or default_speed),
+                random.random()
+            )
+
+        return min(healthy, key=expected_wait)
+
+    async def call(
+        self,
+        request: Callable[[OllamaBackend], Awaitable[Any]],
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None
+    ) -> Tuple[Any, OllamaBackend]:
+        """
+        Run a request on the best backend, hedging it if it is slow
+
+        Each attempt first waits for one of its backend's slots (see
+        OllamaBackend.max_concurrency). The winning backend keeps its slot
+        and stays counted as in flight until release() is called for it;
+        losing and failed attempts are released here.
+
+        Args:
+            request: Coroutine function performing the call on a backend
+            discard: Cleans up the result of an attempt that finished but
+                lost the race (e.g. closes a stream)
+
+        Returns:
+            Tuple of (result, backend that produced it)
+
+        Raises:
+            The error of the last failed attempt if every attempt failed
+        """
+        attempts: Dict[asyncio.Future, OllamaBackend] = {}
+        primary = self.pick()
+        self._start(attempts, primary, request)
+        hedged = self.hedge_after <= 0
+        last_error: Optional[BaseException] = None
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(
+                    attempts,
+                    timeout=None if hedged else self.hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    backup = self.pick(exclude=list(attempts.values()))
+                    if backup is not None:
+                        self._hedges += 1
+                        observe_hedge()
+                        logger.info(
+                            f"No answer from {next(iter(attempts.values())).base_url} after "
+                            f"{self.hedge_after}s; hedging on {backup.base_url}"
+                        )
+                        self._start(attempts, backup, request)
+                    continue
+
+                winner = None
+                for attempt in done:
+                    backend = attempts.pop(attempt)
+                    if attempt.exception() is not None:
+                        # A failed attempt has already given its slot back
+                        last_error = attempt.exception()
+                        self._settle(backend, error=last_error)
+                    elif winner is None:
+                        winner = (attempt.result(), backend)
+                    else:
+                        self.release(backend, cancelled=True)
+                        if discard is not None:
+                            await discard(attempt.result())
+                if winner is not None:
+                    if winner[1] is not primary:
+                        winner[1].hedges_won += 1
+                    return winner
+            raise last_error
+        finally:
+            await self._cancel(attempts, discard)
+
+    def release(
+        self,
+        backend: OllamaBackend,
+        tokens_per_second: Optional[float] = None,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False
+    ) -> None:
+        """
+        Mark a request on a backend as finished and free its slot
+
+        Args:
+            backend: Backend that served the request
+            tokens_per_second: Decoding speed Ollama reported, if any
+            error: Failure of the request; counts towards ejection
+            cancelled: The request was abandoned (hedge lost, client gone);
+                neither a success nor a failure
+        """
+        backend.slots.release()
+        self._settle(backend, tokens_per_second, error, cancelled)
+
+    def _settle(
+        self,
+        backend: OllamaBackend,
+        tokens_per_second: Optional[float] = None,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False
+    ) -> None:
+        """Update the load and health counters for a finished request (its slot already freed)"""
+        backend.in_flight -= 1
+        if cancelled:
+            observe_backend_request(backend.base_url, "cancelled")
+            return
+        if error is not None:
+            observe_backend_request(backend.base_url, "error")
+            self.mark_failed(backend, error)
+            return
+        observe_backend_request(backend.base_url, "success")
+        self.mark_healthy(backend)
+        if tokens_per_second:
+            if backend.tokens_per_second is None:
+                backend.tokens_per_second = tokens_per_second
+            else:
+                backend.tokens_per_second += backend.speed_smoothing * (tokens_per_second - backend.tokens_per_second)
+
+    def mark_failed(self, backend: OllamaBackend, error: BaseException) -> None:
+        """Count a failed call or probe; ejects the backend after too many in a row"""
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        backend.last_error = f"{type(error).__name__}: {error}"
+        if backend.consecutive_failures >= self.eject_after_failures and not backend.is_ejected():
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+            logger.warning(
+                f"Ejecting LLM backend {backend.base_url} for {self.eject_seconds}s after "
+                f"{backend.consecutive_failures} consecutive failures ({backend.last_error})"
+            )
+
+    def mark_healthy(self, backend: OllamaBackend) -> None:
+        """Put a backend back into rotation after a successful call or probe"""
+        if backend.is_ejected():
+            logger.info(f"LLM backend {backend.base_url} is back in rotation")
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-backend load and health, and the number of hedged requests"""
+        return {
+            "hedge_after": self.hedge_after,
+            "hedged_requests": self._hedges,
+            "backends": [b.stats() for b in self.backends],
+        }
+
+    async def close(self) -> None:
+        """Close every backend's pooled HTTP connections"""
+        await asyncio.gather(*(b.close() for b in self.backends))
+
+    def _start(
+        self,
+        attempts: Dict[asyncio.Future, OllamaBackend],
+        backend: OllamaBackend,
+        request: Callable[[OllamaBackend], Awaitable[Any]]
+    ) -> None:
+        backend.in_flight += 1
+        backend.requests += 1
+        attempts[asyncio.ensure_future(self._attempt(backend, request))] = backend
+
+    @staticmethod
+    async def _attempt(backend: OllamaBackend, request: Callable[[OllamaBackend], Awaitable[Any]]) -> Any:
+        """Run a request in one of the backend's slots, keeping the slot only if it succeeds"""
+        await backend.slots.acquire()
+        try:
+            return await request(backend)
+        except BaseException:
+            backend.slots.release()
+            raise
+
+    async def _cancel(
+        self,
+        attempts: Dict[asyncio.Future, OllamaBackend],
+        discard: Optional[Callable[[Any], Awaitable[None]]]
+    ) -> None:
+        """Cancel attempts still running and release their backends"""
+        for attempt in attempts:
+            attempt.cancel()
+        for attempt, backend in attempts.items():
+            try:
+                result = await attempt
+            except (asyncio.CancelledError, Exception):
+                self._settle(backend, cancelled=True)
+            else:
+                # Finished before the cancellation reached it
+                if discard is not None:
+                    await discard(result)
+                self.release(backend, cancelled=True)
@@ -0,0 +1,151 @@
+import logging
+import os
+from typing import Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+
+logger = logging.getLogger(__name__)
+
+# Stages span ~1ms (detection) to tens of seconds (CPU generation)
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+_THROUGHPUT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200, 500, 1000)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of one RAG pipeline stage",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS
+)
+QUERY_SECONDS = Histogram(
+    "rag_query_duration_seconds",
+    "End-to-end duration of a RAG query",
+    ["mode", "cached"],
+    buckets=_LATENCY_BUCKETS
+)
+TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from request to the first streamed answer fragment",
+    buckets=_LATENCY_BUCKETS
+)
+QUERIES = Counter(
+    "rag_queries_total",
+    "RAG queries by outcome",
+    ["mode", "outcome"]
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens evaluated by the LLM per generation",
+    buckets=_TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens",
+    "Tokens generated by the LLM per generation",
+    buckets=_TOKEN_BUCKETS
+)
+LLM_PROMPT_EVAL_SECONDS = Histogram(
+    "llm_prompt_eval_seconds",
+    "Time the LLM spent evaluating the prompt per generation (low when the prompt prefix was cached)",
+    buckets=_LATENCY_BUCKETS
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "LLM decoding throughput per generation (as reported by Ollama)",
+    buckets=_THROUGHPUT_BUCKETS
+)
+LLM_PROMPT_TOKENS_PER_SECOND = Histogram(
+    "llm_prompt_tokens_per_second",
+    "LLM prompt evaluation throughput per generation (as reported by Ollama)",
+    buckets=_THROUGHPUT_BUCKETS
+)
+LLM_BACKEND_REQUESTS = Counter(
+    "llm_backend_requests_total",
+    "LLM calls per Ollama backend by outcome",
+    ["backend", "outcome"]
+)
+LLM_HEDGED_REQUESTS = Counter(
+    "llm_hedged_requests_total",
+    "LLM calls duplicated on a second backend because the first was slow"
+)
+
+
+def observe_stages(timing: Dict[str, float]) -> None:
+    """
+    Record per-stage durations
+
+    Args:
+        timing: Stage name -> seconds; 'total' and 'time_to_first_token'
+            are recorded by observe_query instead
+    """
+    for stage, seconds in timing.items():
+        if stage not in ("total", "time_to_first_token") and seconds is not None:
+            STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def observe_query(mode: str, timing: Dict[str, float], cached: bool) -> None:
+    """
+    Record a completed query: its stages, total duration and time to first token
+
+    Args:
+        mode: 'chat', 'stream' or 'batch'
+        timing: Stage name -> seconds, including 'total'
+        cached: Whether the answer came from the answer cache
+    """
+    observe_stages(timing)
+    QUERY_SECONDS.labels(mode=mode, cached=str(cached).lower()).observe(timing["total"])
+    if "time_to_first_token" in timing:
+        TIME_TO_FIRST_TOKEN_SECONDS.observe(timing["time_to_first_token"])
+    QUERIES.labels(mode=mode, outcome="cached" if cached else "generated").inc()
+
+
+def observe_failure(mode: str) -> None:
+    """Count a query that ended in an error"""
+    QUERIES.labels(mode=mode, outcome="error").inc()
+
+
+def observe_generation(prompt_tokens: int, completion_tokens: int, eval_seconds: float, prompt_eval_seconds: float) -> None:
+    """
+    Record the token counts and throughput Ollama reports for a generation
+
+    Args:
+        prompt_tokens: Prompt tokens evaluated (not counting Ollama's prompt cache hits)
+        completion_tokens: Tokens generated
+        eval_seconds: Time spent generating
+        prompt_eval_seconds: Time spent evaluating the prompt
+    """
+    LLM_PROMPT_TOKENS.observe(prompt_tokens)
+    LLM_COMPLETION_TOKENS.observe(completion_tokens)
+    LLM_PROMPT_EVAL_SECONDS.observe(prompt_eval_seconds)
+    if eval_seconds > 0 and completion_tokens:
+        LLM_TOKENS_PER_SECOND.observe(completion_tokens / eval_seconds)
+    if prompt_eval_seconds > 0 and prompt_tokens:
+        LLM_PROMPT_TOKENS_PER_SECOND.observe(prompt_tokens / prompt_eval_seconds)
+
+
+def observe_backend_request(backend: str, outcome: str) -> None:
+    """Count an LLM call on a backend ('success', 'error' or 'cancelled')"""
+    LLM_BACKEND_REQUESTS.labels(backend=backend, outcome=outcome).inc()
+
+
+def observe_hedge() -> None:
+    """Count an LLM call that was hedged on a second backend"""
+    LLM_HEDGED_REQUESTS.inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format
+
+    With several worker processes (serve.py), set PROMETHEUS_MULTIPROC_DIR
+    so every worker writes its samples there and any worker can report the
+    aggregate.
+
+    Returns:
+        (body, content type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
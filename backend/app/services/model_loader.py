@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Component states
+PENDING = "pending"
+LOADING = "loading"
+WARMING_UP = "warming_up"
+READY = "ready"
+FAILED = "failed"
+NOT_LOADED = "not_loaded"  # lazy component nobody has used yet
+
+
+class _Component:
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]],
+        lazy: bool,
+        required: bool
+    ):
+        self.name = name
+        self.factory = factory
+        self.warmup = warmup
+        self.lazy = lazy
+        self.required = required
+        self.state = NOT_LOADED if lazy else PENDING
+        self.instance: Any = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warmed = False
+        self.lock = threading.Lock()
+
+
+class ModelLoader:
+    """
+    Loads heavy components (models, indexes) in parallel and tracks their state
+
+    Eager components are built concurrently on a small thread pool, since
+    model loading is dominated by file I/O and native code that release the
+    GIL. Each component can run a warm-up call after loading so the first real
+    request does not pay one-off allocation and kernel-selection costs. Lazy
+    components are built on first use (see proxy()).
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize the loader
+
+        Args:
+            max_workers: Components loaded at the same time
+        """
+        self.max_workers = max_workers
+        self._components: Dict[str, _Component] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+        lazy: bool = False,
+        required: bool = True
+    ) -> None:
+        """
+        Register a component
+
+        Args:
+            name: Component name (reported by status())
+            factory: Zero-argument callable building the component
+            warmup: Called with the built component before it is marked ready
+            lazy: Build on first use instead of in load_all()
+            required: Whether a failure makes the service unready; a failed
+                optional component is reported and left as None
+        """
+        self._components[name] = _Component(name, factory, warmup, lazy, required)
+
+    def load_all(self, warmup: bool = True) -> None:
+        """
+        Build every eager component in parallel and wait for them
+
+        Components that are already loaded (e.g. preloaded before a fork)
+        are only warmed up.
+
+        Args:
+            warmup: Run the components' warm-up calls
+
+        Raises:
+            RuntimeError: If a required component failed to load
+        """
+        self.load([name for name, component in self._components.items() if not component.lazy], warmup=warmup)
+
+    def load(self, names: List[str], warmup: bool = True) -> None:
+        """
+        Build the named components in parallel and wait for them
+
+        Args:
+            names: Components to load
+            warmup: Run the components' warm-up calls
+
+        Raises:
+            RuntimeError: If a required component failed to load
+        """
+        components = [self._components[name] for name in names]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="model-loader") as pool:
+            wait([pool.submit(self._load, component, warmup) for component in components])
+        logger.info(f"Loaded {len(components)} components in {time.perf_counter() - t0:.2f}s")
+
+        failed = [component.name for component in components if component.state == FAILED and component.required]
+        if failed:
+            raise RuntimeError(f"Failed to load required components: {', '.join(failed)}")
+
+    def _load(self, component: _Component, warmup: bool = True) -> None:
+        with component.lock:
+            # Another thread may have finished (or failed) while we waited
+            if component.state == FAILED or (component.state == READY and (component.warmed or not warmup)):
+                return
+            try:
+                if component.instance is None:
+                    component.state = LOADING
+                    logger.info(f"Loading component: {component.name}")
+                    t0 = time.perf_counter()
+                    component.instance = component.factory()
+                    component.load_seconds = round(time.perf_counter() - t0, 3)
+
+                if warmup and component.warmup is not None and component.instance is not None:
+                    component.state = WARMING_UP
+                    t0 = time.perf_counter()
+                    component.warmup(component.instance)
+                    component.warmup_seconds = round(time.perf_counter() - t0, 3)
+                    component.warmed = True
+
+                component.state = READY
+                logger.info(
+                    f"Component {component.name} ready (load {component.load_seconds}s, "
+                    f"warm-up {component.warmup_seconds or 0}s)"
+                )
+            except Exception as e:
+                component.state = FAILED
+                component.instance = None
+                component.error = str(e)
+                logger.error(f"Failed to load component {component.name}: {e}", exc_info=True)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a component, building it first if it is lazy and not loaded yet
+
+        Raises:
+            RuntimeError: If the component failed to load
+        """
+        component = self._components[name]
+        if component.state not in (READY, FAILED):
+            self._load(component)
+        if component.state == FAILED:
+            raise RuntimeError(f"Component {name} failed to load: {component.error}")
+        return component.instance
+
+    def peek(self, name: str) -> Any:
+        """Get a component only if it is already loaded (never triggers loading)"""
+        component = self._components.get(name)
+        return component.instance if component is not None and component.state == READY else None
+
+    def proxy(self, name: str) -> "LazyComponent":
+        """Stand-in object that loads the component on first attribute access"""
+        return LazyComponent(self, name)
+
+    @property
+    def ready(self) -> bool:
+        """Whether every required eager component is loaded"""
+        return all(
+            component.state == READY
+            for component in self._components.values()
+            if component.required and not component.lazy
+        )
+
+    @property
+    def failed(self) -> List[str]:
+        """Names of required components that failed to load"""
+        return [
+            component.name
+            for component in self._components.values()
+            if component.required and component.state == FAILED
+        ]
+
+    def status(self) -> Dict[str, Dict]:
+        """Load state and durations of every component"""
+        return {
+            component.name: {
+                "state": component.state,
+                "lazy": component.lazy,
+                "required": component.required,
+                "load_seconds": component.load_seconds,
+                "warmup_seconds": component.warmup_seconds,
+                "error": component.error,
+            }
+            for component in self._components.values()
+        }
+
+
+class LazyComponent:
+    """Proxy forwarding attribute access to a component loaded on demand"""
+
+    def __init__(self, loader: ModelLoader, name: str):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._loader.get(self._name), attribute)
@@ -1,12 +1,22 @@
-from .language_detector import LanguageDetector
+from .language_detector import LanguageDetector, LanguageDetection
 from .translator import NLLBTranslator
 from .vector_store import VectorStore
-from .llama_client import LlamaClient
+from .llama_client import LlamaClient, ERROR_RESPONSE
+from .answer_cache import SemanticAnswerCache
+from .reranker import CrossEncoderReranker
+from .executor import PipelineExecutor, PipelineOverloadedError
+from .metrics import observe_failure, observe_query, observe_stages
+from .session_store import Session, SessionStore, is_follow_up, rewrite_follow_up
+import asyncio
 import logging
-from typing import Dict, Optional
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Documents carried over from the previous turn rank slightly below equally similar fresh ones
+_CARRIED_SIMILARITY_DECAY = 0.9
+
 
 class RAGPipeline:
     """
@@ -23,7 +33,14 @@ class RAGPipeline:
         language_detector: LanguageDetector,
         translator: NLLBTranslator,
         vector_store: VectorStore,
-        llama_client: LlamaClient
+        llama_client: LlamaClient,
+        executor: Optional[PipelineExecutor] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rerank_candidates: int = 20,
+        rerank_top_n: int = 3,
+        session_store: Optional[SessionStore] = None,
+        followup_fetch_k: int = 2
     ):
         """
         Initialize RAG pipeline with all required services
@@ -33,21 +50,449 @@ class RAGPipeline:
             translator: Translation service
             vector_store: Vector database service
             llama_client: Llama 3 client
+            executor: Worker pool for the blocking stages (detection,
+                translation, retrieval). Defaults to asyncio's thread pool.
+            answer_cache: Optional cache of answers to semantically equivalent
+                queries; cleared whenever the vector store changes
+            reranker: Optional cross-encoder; when set, retrieval over-fetches
+                rerank_candidates documents and keeps the best rerank_top_n
+            rerank_candidates: Documents retrieved for reranking
+            rerank_top_n: Documents kept after reranking (at most top_k)
+            session_store: Optional conversation store; turns with a session
+                reuse its language, and follow-ups are rewritten into
+                standalone queries and reuse its last retrieved documents
+            followup_fetch_k: Fresh documents retrieved for a follow-up, on
+                top of the ones carried over from the previous turn
         """
         self.language_detector = language_detector
         self.translator = translator
         self.vector_store = vector_store
         self.llama_client = llama_client
+        self.executor = executor
+        self.answer_cache = answer_cache
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.rerank_top_n = rerank_top_n
+        self.session_store = session_store
+        self.followup_fetch_k = followup_fetch_k
+        
+        if answer_cache is not None:
+            vector_store.add_change_listener(answer_cache.invalidate)
+        if reranker is not None:
+            vector_store.add_change_listener(reranker.invalidate)
         
         logger.info("RAG Pipeline initialized successfully")
     
-    def process_query(
+    async def _run_blocking(self, func: Callable, *args):
+        """Run a CPU-bound stage off the event loop"""
+        if self.executor is not None:
+            return await self.executor.run(func, *args)
+        return await asyncio.to_thread(func, *args)
+    
+    def _prepare_query(
+        self,
+        query: str,
+        top_k: int,
+        detect_language: bool,
+        force_language: Optional[str],
+        session_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Run the steps that come before generation: detection, query
+        translation and retrieval
+
+        Args:
+            query: User query in any supported language
+            top_k: Number of documents to retrieve
+            detect_language: Whether to auto-detect language
+            force_language: Force a specific language (ISO code)
+            session_id: Conversation the query belongs to (started if unknown)
+
+        Returns:
+            Dictionary with the detected language, English and standalone
+            query, retrieved documents, session and per-stage timings
+        """
+        session = None
+        if session_id and self.session_store is not None:
+            session = self.session_store.get_or_create(session_id)
+        
+        # Step 1: Detect language
+        # Always check script language first for robustness against UI defaults
+        t_detect_start = time.time()
+        detection = self._session_language(query, session, force_language)
+        if detection is not None:
+            user_language, language_confidence, language_method = detection
+            logger.info(f"Continuing session {session.session_id} in {user_language} ({language_method})")
+        else:
+            user_language, language_confidence, language_method = self._resolve_language(
+                query, detect_language, force_language
+            )
+        
+        t_detect_end = time.time()
+        logger.info(f"Time: Language Detection: {t_detect_end - t_detect_start:.4f}s")
+        
+        # Get NLLB language codes
+        user_lang_nllb = self.language_detector.get_nllb_code(user_language)
+        
+        # Step 2: Translate query to English (if not already English)
+        t_translate_q_start = time.time()
+        if user_language != "en":
+            logger.info(f"Translating query from {user_language} to English")
+            english_query = self.translator.translate_to_english(query, user_lang_nllb)
+        else:
+            english_query = query
+        t_translate_q_end = time.time()
+        logger.info(f"Time: Query Translation: {t_translate_q_end - t_translate_q_start:.4f}s")
+        
+        logger.info(f"English query: {english_query}")
+        
+        # Step 2b: Make a follow-up self-contained using the previous turn
+        previous_turn = session.last_turn if session is not None else None
+        follow_up = previous_turn is not None and is_follow_up(english_query, previous_turn["standalone_query"])
+        if follow_up:
+            standalone_query = rewrite_follow_up(english_query, previous_turn["standalone_query"])
+            logger.info(f"Follow-up rewritten to: {standalone_query}")
+        else:
+            standalone_query = english_query
+        carried_docs = session.documents if follow_up else []
+        
+        # Step 3: Embed the standalone query; it keys the answer cache and drives retrieval
+        t_retrieve_start = time.time()
+        query_embedding = self.vector_store.embed_query(standalone_query)
+        cache_bucket = (user_language, top_k)
+        
+        # Follow-up answers depend on the conversation, so they are neither served from nor stored in the cache
+        cached_answer = None
+        cache_generation = None
+        if self.answer_cache is not None and not follow_up:
+            # Invalidates the cache if another worker changed the corpus
+            self.vector_store.refresh()
+            cache_generation = self.answer_cache.generation
+            cached_answer = self.answer_cache.lookup(query_embedding, cache_bucket)
+        
+        # Step 4: Retrieve relevant documents (not needed when the answer is cached)
+        rerank_time = None
+        if cached_answer is None:
+            if carried_docs:
+                # The previous turn's documents cover most of a follow-up; only top them up
+                fetch_k = min(top_k, self.followup_fetch_k)
+            elif self.reranker is not None:
+                fetch_k = max(top_k, self.rerank_candidates)
+            else:
+                fetch_k = top_k
+            logger.info(f"Retrieving top {fetch_k} documents")
+            retrieved_docs = self.vector_store.search(
+                standalone_query, top_k=fetch_k, query_embedding=query_embedding
+            )
+            logger.info(f"Retrieved {len(retrieved_docs)} documents")
+            if carried_docs:
+                retrieved_docs = self._merge_carried(retrieved_docs, carried_docs)
+                if self.reranker is None:
+                    retrieved_docs = retrieved_docs[:top_k]
+                logger.info(f"Follow-up candidates: {len(retrieved_docs)} documents ({len(carried_docs)} carried over)")
+            
+            # Step 4b: Rerank the candidates and keep the most relevant few
+            if self.reranker is not None:
+                t_rerank_start = time.time()
+                retrieved_docs = self.reranker.rerank(
+                    standalone_query, retrieved_docs, top_n=min(top_k, self.rerank_top_n)
+                )
+                rerank_time = time.time() - t_rerank_start
+                logger.info(f"Time: Rerank: {rerank_time:.4f}s")
+        else:
+            retrieved_docs = []
+        t_retrieve_end = time.time()
+        logger.info(f"Time: Retrieval: {t_retrieve_end - t_retrieve_start:.4f}s")
+        
+        timing = {
+            "detection": t_detect_end - t_detect_start,
+            "translation_q": t_translate_q_end - t_translate_q_start,
+            "retrieval": t_retrieve_end - t_retrieve_start,
+        }
+        if rerank_time is not None:
+            # Part of retrieval, reported on its own as well
+            timing["rerank"] = rerank_time
+        
+        return {
+            "user_language": user_language,
+            "user_language_name": self.language_detector.get_language_name(user_language),
+            "language_confidence": language_confidence,
+            "language_method": language_method,
+            "english_query": english_query,
+            "standalone_query": standalone_query,
+            "follow_up": follow_up,
+            "session": session,
+            "query_embedding": query_embedding,
+            "cache_bucket": cache_bucket,
+            "cache_generation": cache_generation,
+            "cached_answer": cached_answer,
+            "retrieved_docs": retrieved_docs,
+            "timing": timing
+        }
+    
+    def _resolve_language(
+        self,
+        query: str,
+        detect_language: bool,
+        force_language: Optional[str]
+    ) -> LanguageDetection:
+        """
+        Choose the language to answer in: a native script in the query wins,
+        then the forced language, then detection
+        
+        Returns:
+            The language, with method 'forced' (confidence 1) when the
+            forced language differs from what was detected
+        """
+        detection = self.language_detector.detect(query, fallback=detect_language and not force_language)
+        
+        if detection.method == "script":
+            user_language = detection.language
+            logger.info(f"Detected script language {user_language} overrides force_language={force_language}")
+        elif force_language:
+            user_language = force_language
+            logger.info(f"Using forced language: {user_language}")
+        elif detect_language:
+            user_language = detection.language
+            logger.info(f"Detected language: {user_language} ({detection.method}, confidence {detection.confidence:.2f})")
+        else:
+            user_language = "en"
+        
+        if user_language == detection.language:
+            return detection
+        return LanguageDetection(user_language, 1.0, "forced")
+    
+    def _prepare_batch(
+        self,
+        queries: List[str],
+        force_languages: List[Optional[str]],
+        top_k: int
+    ) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        Prepare several independent queries, running each stage once for all
+        of them: one translation call per source language, one encoder pass
+        and one index search over the query matrix
+        
+        Args:
+            queries: User queries in any supported language
+            force_languages: Forced language (ISO code) or None, per query
+            top_k: Number of documents to retrieve per query
+            
+        Returns:
+            Tuple of (one dictionary per query as returned by _prepare_query,
+            timings of the stages for the whole batch)
+        """
+        # Step 1: Detect languages
+        t_detect_start = time.time()
+        detections = [
+            self._resolve_language(query, True, force_language)
+            for query, force_language in zip(queries, force_languages)
+        ]
+        t_detect_end = time.time()
+        
+        # Step 2: Translate to English, one batched model call per source language
+        english_queries = list(queries)
+        by_language: Dict[str, List[int]] = {}
+        for i, detection in enumerate(detections):
+            if detection.language != "en":
+                by_language.setdefault(detection.language, []).append(i)
+        for language, indices in by_language.items():
+            texts = [queries[i] for i in indices]
+            logger.info(f"Translating {len(texts)} queries from {language} to English")
+            try:
+                translations = self.translator.translate_batch(
+                    texts, self.language_detector.get_nllb_code(language), "eng_Latn"
+                )
+            except Exception as e:
+                # Like translate(): fall back to the original text
+                logger.error(f"Batch translation from {language} failed: {e}")
+                translations = texts
+            for i, translation in zip(indices, translations):
+                english_queries[i] = translation
+        t_translate_q_end = time.time()
+        
+        # Step 3: Embed all English queries in one pass and check the answer cache
+        query_embeddings = self.vector_store.embed_queries(english_queries)
+        cache_generation = None
+        if self.answer_cache is not None:
+            self.vector_store.refresh()
+            cache_generation = self.answer_cache.generation
+        cached_answers = [
+            self.answer_cache.lookup(embedding, (detection.language, top_k)) if self.answer_cache is not None else None
+            for embedding, detection in zip(query_embeddings, detections)
+        ]
+        
+        # Step 4: Retrieve documents for the uncached queries with one search over the query matrix
+        retrieved = [[] for _ in queries]
+        pending = [i for i, cached in enumerate(cached_answers) if cached is None]
+        rerank_time = None
+        if pending:
+            fetch_k = max(top_k, self.rerank_candidates) if self.reranker is not None else top_k
+            results = self.vector_store.search_batch(
+                [english_queries[i] for i in pending],
+                top_k=fetch_k,
+                query_embeddings=query_embeddings[pending]
+            )
+            for i, docs in zip(pending, results):
+                retrieved[i] = docs
+            
+            if self.reranker is not None:
+                t_rerank_start = time.time()
+                for i in pending:
+                    retrieved[i] = self.reranker.rerank(
+                        english_queries[i], retrieved[i], top_n=min(top_k, self.rerank_top_n)
+                    )
+                rerank_time = time.time() - t_rerank_start
+        t_retrieve_end = time.time()
+        logger.info(
+            f"Prepared batch of {len(queries)} queries: Detect={t_detect_end - t_detect_start:.2f}s, "
+            f"TransQ={t_translate_q_end - t_detect_end:.2f}s, Search={t_retrieve_end - t_translate_q_end:.2f}s "
+            f"({len(queries) - len(pending)} cached)"
+        )
+        
+        timing = {
+            "detection": t_detect_end - t_detect_start,
+            "translation_q": t_translate_q_end - t_detect_end,
+            "retrieval": t_retrieve_end - t_translate_q_end,
+        }
+        if rerank_time is not None:
+            timing["rerank"] = rerank_time
+        
+        prepared = [
+            {
+                "user_language": detection.language,
+                "user_language_name": self.language_detector.get_language_name(detection.language),
+                "language_confidence": detection.confidence,
+                "language_method": detection.method,
+                "english_query": english_query,
+                "standalone_query": english_query,
+                "follow_up": False,
+                "session": None,
+                "query_embedding": embedding,
+                "cache_bucket": (detection.language, top_k),
+                "cache_generation": cache_generation,
+                "cached_answer": cached_answer,
+                "retrieved_docs": docs,
+            }
+            for detection, english_query, embedding, cached_answer, docs in zip(
+                detections, english_queries, query_embeddings, cached_answers, retrieved
+            )
+        ]
+        return prepared, timing
+    
+    def _session_language(
+        self,
+        query: str,
+        session: Optional[Session],
+        force_language: Optional[str]
+    ) -> Optional[LanguageDetection]:
+        """
+        The conversation's language for a later turn, without full detection
+        
+        A native script in the query still switches the language (that check
+        is cheap). Latin text continues a conversation held in English or a
+        romanized language, but after a native-script conversation it gets
+        full detection.
+        
+        Returns:
+            The language to use, or None to detect it as for a new query
+        """
+        if session is None or session.language is None or force_language:
+            return None
+        detection = self.language_detector.detect(query, fallback=False)
+        if detection.method == "script":
+            return detection
+        if session.language_method != "script":
+            return LanguageDetection(session.language, session.language_confidence, "session")
+        return None
+    
+    @staticmethod
+    def _merge_carried(fresh_docs: List[Dict], carried_docs: List[Dict]) -> List[Dict]:
+        """Fresh and carried-over documents, without duplicates, most similar first"""
+        merged = {doc['id']: doc for doc in fresh_docs}
+        for doc in carried_docs:
+            if doc['id'] not in merged:
+                carried = {key: value for key, value in doc.items() if key != 'rerank_score'}
+                carried['distance'] = 1.0 - (1.0 - doc['distance']) * _CARRIED_SIMILARITY_DECAY
+                merged[doc['id']] = carried
+        return sorted(merged.values(), key=lambda doc: doc['distance'])
+    
+    async def _record_turn(self, prepared: Dict, query: str, response: str, documents: List[Dict]) -> None:
+        """Add a finished turn to its session, if any"""
+        session = prepared["session"]
+        if session is None or not response or ERROR_RESPONSE in response:
+            return
+        if prepared["language_method"] != "session":
+            session.language = prepared["user_language"]
+            session.language_confidence = prepared["language_confidence"]
+            session.language_method = prepared["language_method"]
+        await asyncio.to_thread(
+            self.session_store.record_turn,
+            session,
+            query,
+            prepared["english_query"],
+            prepared["standalone_query"],
+            response,
+            documents,
+            prepared["follow_up"]
+        )
+    
+    @staticmethod
+    def _session_fields(prepared: Dict) -> Dict:
+        """Session ID, follow-up flag and standalone query for API responses"""
+        if prepared["session"] is None:
+            return {}
+        return {
+            "session_id": prepared["session"].session_id,
+            "follow_up": prepared["follow_up"],
+            "standalone_query": prepared["standalone_query"],
+        }
+    
+    def _cache_answer(self, prepared: Dict, response: str, sources: List[Dict]) -> None:
+        """Remember a generated answer unless caching is off, generation failed or it answered a follow-up"""
+        if self.answer_cache is None or not response or ERROR_RESPONSE in response or prepared["follow_up"]:
+            return
+        self.answer_cache.store(
+            prepared["query_embedding"],
+            prepared["cache_bucket"],
+            {
+                "response": response,
+                "retrieved_documents": len(prepared["retrieved_docs"]),
+                "sources": sources,
+            },
+            generation=prepared["cache_generation"]
+        )
+    
+    @staticmethod
+    def _context_scores(retrieved_docs: List[Dict]) -> List[float]:
+        """Relevance of each document for context packing (rerank score when reranked)"""
+        return [doc.get('rerank_score', 1.0 - doc['distance']) for doc in retrieved_docs]
+    
+    @staticmethod
+    def _round_timing(timing: Dict[str, float]) -> Dict[str, float]:
+        """Stage timings for API responses"""
+        return {stage: round(seconds, 4) for stage, seconds in timing.items()}
+    
+    @staticmethod
+    def _format_sources(retrieved_docs: List[Dict]) -> List[Dict]:
+        """Shorten the top retrieved documents for display as sources"""
+        return [
+            {
+                "id": doc['id'],
+                "text": doc['document'][:200] + "..." if len(doc['document']) > 200 else doc['document'],
+                "distance": doc['distance']
+            }
+            for doc in retrieved_docs[:3]  # Return top 3 sources
+        ]
+    
+    async def process_query(
         self,
         query: str,
         top_k: int = 5,
         temperature: float = 0.7,
         detect_language: bool = True,
-        force_language: Optional[str] = None
+        force_language: Optional[str] = None,
+        session_id: Optional[str] = None
     ) -> Dict:
         """
         Process a user query through the complete RAG pipeline
@@ -58,116 +503,363 @@ class RAGPipeline:
             temperature: LLM temperature for generation
             detect_language: Whether to auto-detect language
             force_language: Force a specific language (ISO code)
+            session_id: Conversation to continue (started if unknown)
             
         Returns:
-            Dictionary containing response and metadata
+            Dictionary containing response and metadata, per-stage timing
+            in seconds and (unless cached) the LLM's token usage; with a
+            session, also its ID and whether the query was a follow-up
         """
-        import time
         start_time = time.time()
         
         try:
-            # Step 1: Detect language
-            # Always check script language first for robustness against UI defaults
-            t_detect_start = time.time()
-            script_lang = self.language_detector.detect_script_language(query)
-            
-            if script_lang:
-                user_language = script_lang
-                logger.info(f"Detected script language {user_language} overrides force_language={force_language}")
-            elif force_language:
-                user_language = force_language
-                logger.info(f"Using forced language: {user_language}")
-            elif detect_language:
-                user_language = self.language_detector.detect_language(query)
-                logger.info(f"Detected language: {user_language}")
-            else:
-                user_language = "en"
-            
-            t_detect_end = time.time()
-            logger.info(f"Time: Language Detection: {t_detect_end - t_detect_start:.4f}s")
-            
-            # Get NLLB language codes
-            user_lang_nllb = self.language_detector.get_nllb_code(user_language)
-            
-            # Step 2: Translate query to English (if not already English)
-            t_translate_q_start = time.time()
-            if user_language != "en":
-                logger.info(f"Translating query from {user_language} to English")
-                english_query = self.translator.translate_to_english(query, user_lang_nllb)
-            else:
-                english_query = query
-            t_translate_q_end = time.time()
-            logger.info(f"Time: Query Translation: {t_translate_q_end - t_translate_q_start:.4f}s")
-            
-            logger.info(f"English query: {english_query}")
+            prepared = await self._run_blocking(
+                self._prepare_query, query, top_k, detect_language, force_language, session_id
+            )
+            user_language = prepared["user_language"]
+            user_lang_name = prepared["user_language_name"]
+            english_query = prepared["english_query"]
+            retrieved_docs = prepared["retrieved_docs"]
+            timing = prepared["timing"]
             
-            # Step 3: Retrieve relevant documents
-            t_retrieve_start = time.time()
-            logger.info(f"Retrieving top {top_k} documents")
-            retrieved_docs = self.vector_store.search(english_query, top_k=top_k)
+            cached_answer = prepared["cached_answer"]
+            if cached_answer is not None:
+                total_time = time.time() - start_time
+                logger.info(f"Pipeline Timing: Total={total_time:.2f}s (answer cache hit)")
+                timing = {"total": total_time, **timing}
+                observe_query("chat", timing, cached=True)
+                # Stages that did not run are reported as 0 but not recorded
+                timing.update(generation=0.0, translation_r=0.0)
+                await self._record_turn(prepared, query, cached_answer["response"], [])
+                return {
+                    "response": cached_answer["response"],
+                    "detected_language": user_language,
+                    "language_confidence": prepared["language_confidence"],
+                    "english_query": english_query,
+                    "generated_response": cached_answer["response"],
+                    "retrieved_documents": cached_answer["retrieved_documents"],
+                    "cached": True,
+                    "timing": self._round_timing(timing),
+                    "sources": cached_answer["sources"],
+                    **self._session_fields(prepared)
+                }
             
-            # Extract document texts
+            # Extract document texts and similarity scores
             context_documents = [doc['document'] for doc in retrieved_docs]
-            t_retrieve_end = time.time()
-            logger.info(f"Time: Retrieval: {t_retrieve_end - t_retrieve_start:.4f}s")
+            context_scores = self._context_scores(retrieved_docs)
             
-            logger.info(f"Retrieved {len(context_documents)} documents")
-            
-            # Get language name for LLM
-            user_lang_name = self.language_detector.get_language_name(user_language)
-            
-            # Step 4: Generate response using Llama 3
+            # Step 5: Generate response using Llama 3
             t_generate_start = time.time()
             logger.info(f"Generating response with Llama 3 in {user_lang_name}")
-            generated_response = self.llama_client.generate_response(
-                query=english_query,
+            generation = await self.llama_client.generate(
+                query=prepared["standalone_query"],
                 context_documents=context_documents,
                 temperature=temperature,
-                target_language=user_lang_name
+                target_language=user_lang_name,
+                context_scores=context_scores
             )
+            generated_response = generation.text
             t_generate_end = time.time()
             logger.info(f"Time: Generation: {t_generate_end - t_generate_start:.4f}s")
             
-            # Step 5: (Optimized) Language is already handled by LLM directly
+            # Step 6: (Optimized) Language is already handled by LLM directly
             final_response = generated_response
             t_translate_r_start = t_translate_r_end = time.time()
             logger.info("Skipping post-generation translation (handled by LLM)")
             
             total_time = time.time() - start_time
-            logger.info(f"Pipeline Timing: Total={total_time:.2f}s, Detect={t_detect_end-t_detect_start:.2f}s, TransQ={t_translate_q_end-t_translate_q_start:.2f}s, Search={t_retrieve_end-t_retrieve_start:.2f}s, LLM={t_generate_end-t_generate_start:.2f}s")
+            logger.info(f"Pipeline Timing: Total={total_time:.2f}s, Detect={timing['detection']:.2f}s, TransQ={timing['translation_q']:.2f}s, Search={timing['retrieval']:.2f}s, LLM={t_generate_end-t_generate_start:.2f}s")
+            
+            sources = self._format_sources(retrieved_docs)
+            self._cache_answer(prepared, generated_response, sources)
+            await self._record_turn(prepared, query, generated_response, retrieved_docs)
+            
+            timing = {
+                "total": total_time,
+                **timing,
+                "generation": t_generate_end - t_generate_start,
+                "translation_r": t_translate_r_end - t_translate_r_start
+            }
+            observe_query("chat", timing, cached=False)
             
             # Prepare result
             result = {
                 "response": final_response,
                 "detected_language": user_language,
+                "language_confidence": prepared["language_confidence"],
                 "english_query": english_query,
                 "generated_response": generated_response,
                 "retrieved_documents": len(context_documents),
-                "timing": {
-                    "total": round(total_time, 2),
-                    "detection": round(t_detect_end - t_detect_start, 2),
-                    "translation_q": round(t_translate_q_end - t_translate_q_start, 2),
-                    "retrieval": round(t_retrieve_end - t_retrieve_start, 2),
-                    "generation": round(t_generate_end - t_generate_start, 2),
-                    "translation_r": round(t_translate_r_end - t_translate_r_start, 2)
-                },
-                "sources": [
-                    {
-                        "id": doc['id'],
-                        "text": doc['document'][:200] + "..." if len(doc['document']) > 200 else doc['document'],
-                        "distance": doc['distance']
-                    }
-                    for doc in retrieved_docs[:3]  # Return top 3 sources
-                ]
+                "timing": self._round_timing(timing),
+                "usage": generation.usage(),
+                "sources": sources,
+                **self._session_fields(prepared)
             }
             
             logger.info("Query processed successfully")
             return result
             
+        except PipelineOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error in RAG pipeline: {e}", exc_info=True)
+            observe_failure("chat")
             return {
                 "response": "I apologize, but I encountered an error processing your question. Please try again.",
                 "error": str(e),
                 "detected_language": "en"
             }
+    
+    async def stream_query(
+        self,
+        query: str,
+        top_k: int = 5,
+        temperature: float = 0.7,
+        detect_language: bool = True,
+        force_language: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Process a user query and stream the answer as it is generated
+        
+        Yields ``(event, payload)`` pairs: one ``metadata`` event with the
+        detected language and sources, one ``token`` event per generated
+        fragment, then a ``done`` event with stage timings and the LLM's
+        token usage. Failures are
+        reported as an ``error`` event instead of raising.
+        
+        Args:
+            query: User query in any supported language
+            top_k: Number of documents to retrieve
+            temperature: LLM temperature for generation
+            detect_language: Whether to auto-detect language
+            force_language: Force a specific language (ISO code)
+            session_id: Conversation to continue (started if unknown)
+        """
+        start_time = time.time()
+        
+        try:
+            prepared = await self._run_blocking(
+                self._prepare_query, query, top_k, detect_language, force_language, session_id
+            )
+        except PipelineOverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in RAG pipeline: {e}", exc_info=True)
+            observe_failure("stream")
+            yield "error", {"error": str(e), "detected_language": "en"}
+            return
+        
+        retrieved_docs = prepared["retrieved_docs"]
+        timing = prepared["timing"]
+        cached_answer = prepared["cached_answer"]
+        
+        if cached_answer is not None:
+            sources = cached_answer["sources"]
+            retrieved_count = cached_answer["retrieved_documents"]
+        else:
+            sources = self._format_sources(retrieved_docs)
+            retrieved_count = len(retrieved_docs)
+        
+        yield "metadata", {
+            "detected_language": prepared["user_language"],
+            "language_confidence": prepared["language_confidence"],
+            "english_query": prepared["english_query"],
+            "retrieved_documents": retrieved_count,
+            "cached": cached_answer is not None,
+            "sources": sources,
+            **self._session_fields(prepared)
+        }
+        
+        # Step 5: Stream the response from Llama 3 (or replay the cached answer)
+        t_generate_start = time.time()
+        t_first_token = None
+        generations = []
+        
+        if cached_answer is not None:
+            t_first_token = time.time()
+            yield "token", {"text": cached_answer["response"]}
+            await self._record_turn(prepared, query, cached_answer["response"], [])
+        else:
+            logger.info(f"Streaming response with Llama 3 in {prepared['user_language_name']}")
+            fragments = []
+            async for fragment in self.llama_client.generate_response_stream(
+                query=prepared["standalone_query"],
+                context_documents=[doc['document'] for doc in retrieved_docs],
+                temperature=temperature,
+                target_language=prepared["user_language_name"],
+                context_scores=self._context_scores(retrieved_docs),
+                on_complete=generations.append
+            ):
+                if t_first_token is None:
+                    t_first_token = time.time()
+                fragments.append(fragment)
+                yield "token", {"text": fragment}
+            answer = "".join(fragments).strip()
+            self._cache_answer(prepared, answer, sources)
+            await self._record_turn(prepared, query, answer, retrieved_docs)
+        
+        t_generate_end = time.time()
+        total_time = t_generate_end - start_time
+        time_to_first_token = (t_first_token or t_generate_end) - start_time
+        logger.info(f"Pipeline Timing (stream): Total={total_time:.2f}s, TTFT={time_to_first_token:.2f}s, LLM={t_generate_end-t_generate_start:.2f}s")
+        
+        timing = {
+            "total": total_time,
+            "time_to_first_token": time_to_first_token,
+            **timing,
+            "generation": t_generate_end - t_generate_start
+        }
+        observe_query("stream", timing, cached=cached_answer is not None)
+        
+        done = {"timing": self._round_timing(timing)}
+        if generations:
+            done["usage"] = generations[0].usage()
+        yield "done", done
+    
+    async def _answer_prepared(self, prepared: Dict, temperature: float) -> Dict:
+        """Generate (or take from the cache) the answer to one prepared batch query"""
+        cached_answer = prepared["cached_answer"]
+        result = {
+            "detected_language": prepared["user_language"],
+            "language_confidence": prepared["language_confidence"],
+            "english_query": prepared["english_query"],
+            "cached": cached_answer is not None,
+        }
+        
+        if cached_answer is not None:
+            result.update(
+                response=cached_answer["response"],
+                retrieved_documents=cached_answer["retrieved_documents"],
+                sources=cached_answer["sources"],
+                timing={"generation": 0.0}
+            )
+            return result
+        
+        retrieved_docs = prepared["retrieved_docs"]
+        t_generate_start = time.time()
+        generation = await self.llama_client.generate(
+            query=prepared["english_query"],
+            context_documents=[doc['document'] for doc in retrieved_docs],
+            temperature=temperature,
+            target_language=prepared["user_language_name"],
+            context_scores=self._context_scores(retrieved_docs)
+        )
+        sources = self._format_sources(retrieved_docs)
+        self._cache_answer(prepared, generation.text, sources)
+        
+        result.update(
+            response=generation.text,
+            retrieved_documents=len(retrieved_docs),
+            sources=sources,
+            timing={"generation": time.time() - t_generate_start},
+            usage=generation.usage()
+        )
+        if not generation.text or ERROR_RESPONSE in generation.text:
+            result["error"] = "Generation failed"
+        return result
+    
+    async def process_batch(
+        self,
+        queries: List[Tuple[str, Optional[str]]],
+        top_k: int = 5,
+        temperature: float = 0.7,
+        max_parallel: int = 4,
+        chunk_size: int = 32
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer many independent queries, yielding each answer as soon as it is ready
+        
+        Queries are prepared in chunks of ``chunk_size`` (see _prepare_batch),
+        and at most ``max_parallel`` LLM generations run at once. The next
+        chunk is prepared while the LLM answers the previous one.
+        
+        Args:
+            queries: (query, forced language ISO code or None) pairs
+            top_k: Number of documents to retrieve per query
+            temperature: LLM temperature for generation
+            max_parallel: Concurrent LLM generations
+            chunk_size: Queries prepared together
+            
+        Yields:
+            One result per query, in completion order. Each carries its
+            position in ``queries`` as 'index', the fields of process_query,
+            and the batched stages' timings of its chunk; failed queries
+            have 'error' set.
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(max_parallel)
+        tasks: List[asyncio.Task] = []
+        # Repeated queries (same English text and language) share one generation
+        answers: Dict[Tuple[str, str], asyncio.Task] = {}
+        
+        async def generate(prepared: Dict) -> Dict:
+            async with slots:
+                return await self._answer_prepared(prepared, temperature)
+        
+        def failure(index: int, error: str) -> Dict:
+            observe_failure("batch")
+            return {
+                "index": index,
+                "response": "I apologize, but I encountered an error processing your question. Please try again.",
+                "error": error,
+                "detected_language": "en"
+            }
+        
+        async def answer(index: int, generation: asyncio.Task, chunk_timing: Dict[str, float], chunk_start: float) -> None:
+            try:
+                result = dict(await generation)
+                timing = {"total": time.time() - chunk_start, **chunk_timing, **result["timing"]}
+                # The batched stages were recorded once for the whole chunk
+                observe_query("batch", {"total": timing["total"], "generation": timing["generation"]}, cached=result["cached"])
+                result.update(index=index, timing=self._round_timing(timing))
+            except Exception as e:
+                logger.error(f"Batch query {index} failed: {e}", exc_info=True)
+                result = failure(index, str(e))
+            await results.put(result)
+        
+        async def prepare_all() -> None:
+            # Queries before this index have a result queued or an answer task on the way
+            handled = 0
+            error = "Batch preparation was cancelled"
+            try:
+                for start in range(0, len(queries), chunk_size):
+                    chunk = queries[start:start + chunk_size]
+                    chunk_start = time.time()
+                    try:
+                        prepared_chunk, chunk_timing = await self._run_blocking(
+                            self._prepare_batch, [query for query, _ in chunk], [language for _, language in chunk], top_k
+                        )
+                    except Exception as e:
+                        logger.error(f"Preparing batch queries {start}-{start + len(chunk) - 1} failed: {e}", exc_info=True)
+                        for index in range(start, start + len(chunk)):
+                            await results.put(failure(index, str(e)))
+                            handled = index + 1
+                        continue
+                    observe_stages(chunk_timing)
+                    for offset, prepared in enumerate(prepared_chunk):
+                        key = (prepared["user_language"], prepared["english_query"])
+                        if key not in answers:
+                            answers[key] = asyncio.create_task(generate(prepared))
+                            tasks.append(answers[key])
+                        tasks.append(asyncio.create_task(answer(start + offset, answers[key], chunk_timing, chunk_start)))
+                        handled = start + offset + 1
+            except Exception as e:
+                logger.error(f"Preparing batch queries failed: {e}", exc_info=True)
+                error = str(e)
+            finally:
+                # The consumer waits for one result per query: fail the rest
+                # whatever stopped preparation, including cancellation
+                for index in range(handled, len(queries)):
+                    results.put_nowait(failure(index, error))
+        
+        producer = asyncio.create_task(prepare_all())
+        try:
+            for _ in range(len(queries)):
+                yield await results.get()
+        finally:
+            # Stop outstanding work if the consumer went away early
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(producer, *tasks, return_exceptions=True)
@@ -0,0 +1,98 @@
+from sentence_transformers import CrossEncoder
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, List
+
+from .caching import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Reorders retrieved documents with a cross-encoder
+
+    The query is scored jointly with each candidate, which is far more
+    precise than embedding similarity, so a small number of documents can
+    be sent to the LLM. All uncached (query, document) pairs of a request
+    are scored in one batched forward pass, and scores are cached by
+    (query, document ID) until the corpus changes.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        cache_size: int = 4096,
+        max_length: int = 512
+    ):
+        """
+        Load the cross-encoder model
+
+        Args:
+            model_name: HuggingFace cross-encoder model name
+            batch_size: Pairs per forward pass
+            cache_size: Number of (query, document) scores kept in memory (0 disables)
+            max_length: Maximum tokens per (query, document) pair
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        logger.info(f"Loading reranker model: {model_name}")
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self.cache = LRUCache(max_size=cache_size)
+        # The model is not safe to call from several threads at once
+        self._model_lock = threading.Lock()
+
+    def rerank(self, query: str, documents: List[Dict], top_n: int) -> List[Dict]:
+        """
+        Score documents against the query and keep the best
+
+        Args:
+            query: English query
+            documents: Search results with 'id' and 'document'
+            top_n: Number of documents to keep
+
+        Returns:
+            The top_n documents, best first, each with a 'rerank_score'
+        """
+        if not documents:
+            return []
+
+        query_key = " ".join(unicodedata.normalize("NFC", query).split())
+        keys = [self._cache_key(query_key, doc) for doc in documents]
+        scores = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            with self._model_lock:
+                predicted = self.model.predict(
+                    [(query, documents[i]['document']) for i in missing],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                self.cache.put(keys[i], scores[i])
+        logger.info(f"Reranked {len(documents)} documents ({len(missing)} scored, {len(documents) - len(missing)} cached)")
+
+        ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)
+        return [{**doc, 'rerank_score': score} for doc, score in ranked[:top_n]]
+
+    def _cache_key(self, query_key: str, doc: Dict) -> str:
+        return hashlib.sha1(f"{query_key}\0{doc['id']}".encode("utf-8")).hexdigest()
+
+    def warmup(self) -> None:
+        """Score one pair (bypassing the cache)"""
+        with self._model_lock:
+            self.model.predict([("What is NPS?", "NPS is a retirement savings scheme.")], show_progress_bar=False)
+
+    def invalidate(self) -> None:
+        """Drop cached scores (documents may have changed under the same ID)"""
+        self.cache.clear()
+
+    def stats(self) -> Dict:
+        """Get cache counters"""
+        return {"model": self.model_name, "cache": self.cache.stats()}
@@ -0,0 +1,387 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Openers that only make sense as a continuation of the previous question
+# (not question words like 'how much' or 'can I', which start most standalone questions)
+_FOLLOW_UP_OPENERS = re.compile(
+    r"^(what about|how about|what if|and|also|but|same for|what else)\b",
+    re.IGNORECASE
+)
+# Pronouns referring back to something said earlier. Determiners like 'this
+# account' are left out: they usually name their subject
+_ANAPHORA = re.compile(
+    r"\b(it|its|it's|they|them|their|theirs|the same|the above|the former|the latter|this one|that one)\b"
+    r"|\b(this|that|these|those)\s*[?.!]*$",
+    re.IGNORECASE
+)
+# 'it' as a dummy subject ('is it possible to...', 'it is mandatory that...')
+_DUMMY_IT = re.compile(
+    r"\b(?:(?:is|was|will|would)\s+it(?:\s+be)?|it(?:\s+is|'s|\s+was|\s+will\s+be))\s+"
+    r"(?:possible|necessary|mandatory|compulsory|required|allowed|advisable|better|worth|safe|true|"
+    r"legal|wise|okay|ok)\s+(?:to|that|if|for)\b",
+    re.IGNORECASE
+)
+# An earlier clause can introduce what a pronoun refers to ('What is NPS and how does it work?')
+_CLAUSE_BREAK = re.compile(r"[,;]|\b(?:and|but|or|so)\b", re.IGNORECASE)
+# Acronyms and section references name their subject even in the pronoun's own clause
+_NAME = re.compile(r"\w*[A-Z]{2,}\w*|\b\d+[A-Za-z]\w*")
+_WORD = re.compile(r"\w+")
+# Words that carry no topic of their own
+_FUNCTION_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did", "can", "could",
+    "will", "would", "should", "shall", "may", "might", "must", "have", "has", "had", "of", "to",
+    "in", "on", "for", "and", "or", "but", "with", "by", "at", "as", "from", "about", "if", "what",
+    "which", "who", "whom", "whose", "why", "how", "when", "where", "i", "me", "my", "we", "our",
+    "you", "your", "it", "its", "they", "them", "their", "this", "that", "these", "those", "there",
+    "here", "so", "then", "than", "also", "too", "very", "any", "some", "please", "tell", "explain",
+    "more", "else", "same", "not", "no", "yes", "ok", "okay", "really", "s",
+}
+
+
+def _content_terms(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(text.lower()) if word not in _FUNCTION_WORDS}
+
+
+def _has_dangling_reference(text: str) -> bool:
+    """Whether a pronoun in the text refers to nothing named in the text itself"""
+    text = _DUMMY_IT.sub(" ", text)
+    for match in _ANAPHORA.finditer(text):
+        before = text[:match.start()]
+        breaks = list(_CLAUSE_BREAK.finditer(before))
+        earlier = before[:breaks[-1].start()] if breaks else ""
+        own_clause = before[len(earlier):]
+        if not _content_terms(earlier) and not _NAME.search(own_clause):
+            return True
+    return False
+
+
+def is_follow_up(english_query: str, previous_query: Optional[str] = None) -> bool:
+    """
+    Whether a query looks like it depends on the previous turn
+
+    Args:
+        english_query: Query in English
+        previous_query: Self-contained form of the previous turn's question
+
+    Returns:
+        True for continuations ('what about Tier II?'), pronouns with
+        nothing to refer to in the query ('is it taxable?', 'why is that?')
+        and queries adding no topic to the previous one ('why?', 'tell me
+        more'); False for self-contained questions such as 'How much tax
+        can I save under 80CCD(1B)?', 'What is NPS and how does it work?'
+        or 'eNPS registration'
+    """
+    text = english_query.strip()
+    if not text:
+        return False
+    if _FOLLOW_UP_OPENERS.match(text) or _has_dangling_reference(text):
+        return True
+    return previous_query is not None and _content_terms(text) <= _content_terms(previous_query)
+
+
+def rewrite_follow_up(english_query: str, previous_query: str, max_context_chars: int = 300) -> str:
+    """
+    Make a follow-up self-contained by appending the question it continues
+
+    Rule-based on purpose: a rewrite by the LLM would add a full generation
+    round trip to every follow-up on CPU.
+
+    Args:
+        english_query: Follow-up in English
+        previous_query: Self-contained form of the previous turn's question
+        max_context_chars: Length cap on the appended question; older turns
+            nested in it are cut first
+
+    Returns:
+        Standalone query, e.g. 'What about Tier II? (follow-up to: What is
+        the lock-in period of Tier I?)'
+    """
+    context = previous_query.strip()
+    if len(context) > max_context_chars:
+        context = context[:max_context_chars].rsplit(" ", 1)[0] + "..."
+    return f"{english_query.strip()} (follow-up to: {context})"
+
+
+class Session:
+    """One conversation: its language, recent turns and last retrieved documents"""
+
+    def __init__(
+        self,
+        session_id: str,
+        language: Optional[str] = None,
+        language_confidence: float = 1.0,
+        language_method: Optional[str] = None,
+        turns: Optional[List[Dict]] = None,
+        documents: Optional[List[Dict]] = None,
+        created: Optional[float] = None,
+        updated: Optional[float] = None
+    ):
+        self.session_id = session_id
+        self.language = language
+        self.language_confidence = language_confidence
+        self.language_method = language_method
+        self.turns: List[Dict] = turns or []
+        self.documents: List[Dict] = documents or []
+        self.created = created if created is not None else time.time()
+        self.updated = updated if updated is not None else self.created
+
+    @property
+    def last_turn(self) -> Optional[Dict]:
+        return self.turns[-1] if self.turns else None
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "language": self.language,
+            "language_confidence": self.language_confidence,
+            "language_method": self.language_method,
+            "turns": self.turns,
+            "documents": self.documents,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Session":
+        return cls(**data)
+
+
+class SessionStore:
+    """
+    Bounded conversation store with TTL eviction
+
+    Sessions live in memory (least recently used evicted beyond
+    ``max_sessions``), or in a SQLite file when ``path`` is set so that
+    every worker process of serve.py sees the same sessions. Each session
+    keeps at most ``max_turns`` turns, with answers truncated, and the
+    documents retrieved for its last turn.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 1800.0,
+        max_turns: int = 10,
+        max_answer_chars: int = 1000,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            ttl_seconds: Seconds of inactivity after which a session expires
+            max_turns: Turns kept per session
+            max_answer_chars: Answer length kept per turn
+            path: SQLite file shared between processes (default: in memory)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_answer_chars = max_answer_chars
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._created = 0
+        self._expired = 0
+        self._evicted = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connect()
+            # A SQLite connection must not be used across fork(): reopen it in the child
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reopen())
+
+        logger.info(
+            f"SessionStore initialized ({'sqlite ' + path if path else 'in memory'}, "
+            f"max_sessions={max_sessions}, ttl={ttl_seconds}s, max_turns={max_turns})"
+        )
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        # Concurrent readers in other worker processes while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        self._conn.commit()
+
+    def _reopen(self) -> None:
+        self._lock = threading.Lock()
+        self._connect()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def create(self, session_id: Optional[str] = None) -> Session:
+        """Start an empty session (under a new random ID by default) and store it"""
+        session = Session(session_id or self.new_id())
+        self.save(session)
+        with self._lock:
+            self._created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """
+        Look up a session
+
+        Returns:
+            The session, or None if it does not exist or has expired
+        """
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                session = self._sessions.get(session_id)
+                if session is not None and now - session.updated > self.ttl_seconds:
+                    del self._sessions[session_id]
+                    self._expired += 1
+                    session = None
+                if session is not None:
+                    self._sessions.move_to_end(session_id)
+                return session
+
+            row = self._conn.execute(
+                "SELECT data, updated FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.commit()
+                self._expired += 1
+                return None
+            return Session.from_dict(json.loads(row[0]))
+
+    def get_or_create(self, session_id: str) -> Session:
+        """The live session with this ID, or a fresh one if it is unknown or expired"""
+        return self.get(session_id) or self.create(session_id)
+
+    def record_turn(
+        self,
+        session: Session,
+        query: str,
+        english_query: str,
+        standalone_query: str,
+        response: str,
+        documents: List[Dict],
+        follow_up: bool
+    ) -> None:
+        """
+        Append a completed turn and remember its retrieved documents
+
+        Args:
+            session: Session the turn belongs to
+            query: Query as the user wrote it
+            english_query: Query translated to English
+            standalone_query: Self-contained English query used for retrieval
+            response: Answer shown to the user
+            documents: Documents retrieved for this turn, kept for the next
+                follow-up (empty for cached answers, which clears them)
+            follow_up: Whether the turn continued the previous one
+        """
+        session.turns.append({
+            "query": query,
+            "english_query": english_query,
+            "standalone_query": standalone_query,
+            "response": response[:self.max_answer_chars],
+            "follow_up": follow_up,
+            "timestamp": time.time(),
+        })
+        del session.turns[:-self.max_turns]
+        session.documents = [
+            {key: doc[key] for key in ("id", "document", "distance", "rerank_score") if key in doc}
+            for doc in documents
+        ]
+        self.save(session)
+
+    def save(self, session: Session) -> None:
+        """Store a session (replacing an older copy) and evict expired or excess sessions"""
+        session.updated = time.time()
+        with self._lock:
+            if self._conn is None:
+                self._sessions[session.session_id] = session
+                self._sessions.move_to_end(session.session_id)
+                self._evict_memory(session.updated)
+                return
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                (session.session_id, json.dumps(session.to_dict(), ensure_ascii=False), session.updated)
+            )
+            self._writes += 1
+            # Pruning scans the table, so do it every so often rather than on every write
+            if self._writes % 100 == 0:
+                self._evict_sqlite(session.updated)
+            self._conn.commit()
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Forget a session
+
+        Returns:
+            True if it existed
+        """
+        with self._lock:
+            if self._conn is None:
+                return self._sessions.pop(session_id, None) is not None
+            deleted = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            self._conn.commit()
+            return deleted > 0
+
+    def _evict_memory(self, now: float) -> None:
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.updated > self.ttl_seconds:
+                self._expired += 1
+            elif len(self._sessions) > self.max_sessions:
+                self._evicted += 1
+            else:
+                break
+            del self._sessions[oldest_id]
+
+    def _evict_sqlite(self, now: float) -> None:
+        self._expired += self._conn.execute(
+            "DELETE FROM sessions WHERE updated < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self._evicted += self._conn.execute(
+            "DELETE FROM sessions WHERE id NOT IN (SELECT id FROM sessions ORDER BY updated DESC LIMIT ?)",
+            (self.max_sessions,)
+        ).rowcount
+
+    def stats(self) -> Dict:
+        """Session counts"""
+        with self._lock:
+            if self._conn is None:
+                active = len(self._sessions)
+            else:
+                active = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                "backend": "sqlite" if self._conn is not None else "memory",
+                "active": active,
+                "created": self._created,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
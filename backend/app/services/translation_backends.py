@@ -0,0 +1,287 @@
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import torch
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSLATOR_BACKENDS = ("torch", "torch_int8", "onnx", "ctranslate2")
+
+
+class TranslationBackend:
+    """Base class: tokenizer handling shared by all backends"""
+
+    name = "base"
+
+    def __init__(
+        self,
+        model_name: str,
+        num_beams: int = 5,
+        num_threads: int = 0,
+        model_dir: Optional[str] = None
+    ):
+        """
+        Initialize the backend
+
+        Args:
+            model_name: HuggingFace model name for NLLB (used for the tokenizer)
+            num_beams: Beam width for decoding
+            num_threads: Intra-op CPU threads (0 = library default)
+            model_dir: Directory of an exported/converted model, if the backend needs one
+        """
+        self.model_name = model_name
+        self.num_beams = num_beams
+        self.num_threads = num_threads
+        self.model_dir = model_dir
+        self.device = "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # A fast tokenizer call with truncation reconfigures the shared Rust
+        # tokenizer, which raises 'Already borrowed' if two threads do it at once
+        self._tokenizer_lock = threading.Lock()
+
+    def encode_ids(self, texts: List[str], source_lang: str, max_length: int) -> List[List[int]]:
+        """
+        Tokenize texts with the source language tag added explicitly
+
+        Setting ``tokenizer.src_lang`` would mutate state shared by every
+        thread, so the language and end-of-sentence tokens are added here
+        instead, in the layout the NLLB tokenizer itself would use. The
+        tokenizer call itself is serialized (the MicroBatcher thread and
+        the batch preparation threads all encode).
+        """
+        lang_id = self.tokenizer.convert_tokens_to_ids(source_lang)
+        eos_id = self.tokenizer.eos_token_id
+
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                texts,
+                add_special_tokens=False,
+                truncation=True,
+                max_length=max_length - 2
+            )
+        if getattr(self.tokenizer, "legacy_behaviour", False):
+            return [ids + [eos_id, lang_id] for ids in encoded["input_ids"]]
+        return [[lang_id] + ids + [eos_id] for ids in encoded["input_ids"]]
+
+    def generate(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        max_length: int
+    ) -> List[str]:
+        """
+        Translate a batch of non-empty texts
+
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code (NLLB format)
+            target_lang: Target language code (NLLB format)
+            max_length: Maximum length of each generated translation
+
+        Returns:
+            One translation per input text
+        """
+        raise NotImplementedError
+
+    def info(self) -> Dict:
+        """Describe the backend configuration (for logs and benchmarks)"""
+        return {
+            "backend": self.name,
+            "model": self.model_dir or self.model_name,
+            "device": self.device,
+            "num_beams": self.num_beams,
+            "num_threads": self.num_threads,
+        }
+
+
+class TorchBackend(TranslationBackend):
+    """Full-precision PyTorch model"""
+
+    name = "torch"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.device = self._select_device()
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_dir or self.model_name)
+        model.eval()
+        self.model = self._prepare_model(model).to(self.device)
+
+    def _select_device(self) -> str:
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _prepare_model(self, model):
+        return model
+
+    def generate(self, texts, source_lang, target_lang, max_length):
+        input_ids = self.encode_ids(texts, source_lang, max_length)
+        inputs = self.tokenizer.pad({"input_ids": input_ids}, return_tensors="pt").to(self.device)
+
+        with torch.inference_mode():
+            translated_tokens = self.model.generate(
+                **inputs,
+                forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(target_lang),
+                max_length=max_length,
+                num_beams=self.num_beams,
+                early_stopping=True
+            )
+
+        return self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with Linear layers dynamically quantized to int8 (CPU only)"""
+
+    name = "torch_int8"
+
+    def _select_device(self) -> str:
+        # Dynamically quantized kernels are CPU-only
+        return "cpu"
+
+    def _prepare_model(self, model):
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class ONNXBackend(TranslationBackend):
+    """ONNX Runtime model exported with Hugging Face Optimum"""
+
+    name = "onnx"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError(
+                "The 'onnx' translator backend needs optimum[onnxruntime]: "
+                "pip install optimum[onnxruntime]"
+            ) from e
+
+        session_options = onnxruntime.SessionOptions()
+        if self.num_threads > 0:
+            session_options.intra_op_num_threads = self.num_threads
+
+        # Without an exported directory, export from the HuggingFace weights at load time
+        self.model = ORTModelForSeq2SeqLM.from_pretrained(
+            self.model_dir or self.model_name,
+            export=not self.model_dir,
+            session_options=session_options
+        )
+
+    def generate(self, texts, source_lang, target_lang, max_length):
+        input_ids = self.encode_ids(texts, source_lang, max_length)
+        inputs = self.tokenizer.pad({"input_ids": input_ids}, return_tensors="pt")
+
+        translated_tokens = self.model.generate(
+            **inputs,
+            forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(target_lang),
+            max_length=max_length,
+            num_beams=self.num_beams,
+            early_stopping=True
+        )
+
+        return self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+
+
+class CTranslate2Backend(TranslationBackend):
+    """CTranslate2 model converted with ct2-transformers-converter"""
+
+    name = "ctranslate2"
+
+    def __init__(self, *args, compute_type: str = "int8", **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.model_dir:
+            raise ValueError("The 'ctranslate2' translator backend needs TRANSLATOR_MODEL_DIR")
+        try:
+            import ctranslate2
+        except ImportError as e:
+            raise ImportError(
+                "The 'ctranslate2' translator backend needs ctranslate2: pip install ctranslate2"
+            ) from e
+
+        self.compute_type = compute_type
+        self.model = ctranslate2.Translator(
+            self.model_dir,
+            device="cpu",
+            compute_type=compute_type,
+            intra_threads=self.num_threads
+        )
+
+    def generate(self, texts, source_lang, target_lang, max_length):
+        source_tokens = [
+            self.tokenizer.convert_ids_to_tokens(ids)
+            for ids in self.encode_ids(texts, source_lang, max_length)
+        ]
+
+        results = self.model.translate_batch(
+            source_tokens,
+            target_prefix=[[target_lang]] * len(texts),
+            beam_size=self.num_beams,
+            max_decoding_length=max_length
+        )
+
+        translations = []
+        for result in results:
+            # Drop the forced target language token
+            tokens = result.hypotheses[0][1:]
+            translations.append(
+                self.tokenizer.decode(
+                    self.tokenizer.convert_tokens_to_ids(tokens),
+                    skip_special_tokens=True
+                )
+            )
+        return translations
+
+    def info(self) -> Dict:
+        return {**super().info(), "compute_type": self.compute_type}
+
+
+def create_translation_backend(
+    backend: str,
+    model_name: str,
+    num_beams: int = 5,
+    num_threads: int = 0,
+    model_dir: Optional[str] = None
+) -> TranslationBackend:
+    """
+    Build a translation backend by name
+
+    - ``torch``: full-precision PyTorch weights (the original behaviour)
+    - ``torch_int8``: PyTorch with dynamically quantized int8 Linear layers
+    - ``onnx``: ONNX Runtime via Hugging Face Optimum
+    - ``ctranslate2``: CTranslate2 (int8), usually the fastest on CPU
+
+    The onnx and ctranslate2 backends need optional packages and an
+    exported model directory (see README.md).
+
+    Args:
+        backend: One of TRANSLATOR_BACKENDS
+        model_name: HuggingFace model name for NLLB
+        num_beams: Beam width for decoding
+        num_threads: Intra-op CPU threads (0 = library default)
+        model_dir: Exported/converted model directory (onnx, ctranslate2)
+
+    Returns:
+        Loaded backend
+    """
+    classes = {
+        "torch": TorchBackend,
+        "torch_int8": QuantizedTorchBackend,
+        "onnx": ONNXBackend,
+        "ctranslate2": CTranslate2Backend,
+    }
+    if backend not in classes:
+        raise ValueError(f"Unknown translator backend '{backend}', expected one of {TRANSLATOR_BACKENDS}")
+
+    logger.info(f"Loading '{backend}' translation backend for {model_dir or model_name}")
+    return classes[backend](
+        model_name,
+        num_beams=num_beams,
+        num_threads=num_threads,
+        model_dir=model_dir or None
+    )
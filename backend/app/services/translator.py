@@ -1,34 +1,70 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
 import logging
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from .batching import MicroBatcher
+from .caching import LRUCache
+from .translation_backends import create_translation_backend
 
 logger = logging.getLogger(__name__)
 
 
 class NLLBTranslator:
     """Translation service using NLLB (No Language Left Behind) model"""
-    
-    def __init__(self, model_name: str = "facebook/nllb-200-distilled-600M"):
+
+    def __init__(
+        self,
+        model_name: str = "facebook/nllb-200-distilled-600M",
+        backend: str = "torch",
+        num_beams: int = 5,
+        num_threads: int = 0,
+        model_dir: Optional[str] = None,
+        cache_size: int = 2048,
+        batch_size: int = 16,
+        batch_wait_ms: float = 10.0
+    ):
         """
         Initialize NLLB translator
-        
+
         Args:
             model_name: HuggingFace model name for NLLB
+            backend: Inference backend ('torch', 'torch_int8', 'onnx', 'ctranslate2')
+            num_beams: Beam width for decoding
+            num_threads: Intra-op CPU threads for the backend (0 = library default)
+            model_dir: Exported/converted model directory (onnx, ctranslate2)
+            cache_size: Number of recent (text, source, target) translations to keep
+            batch_size: Maximum number of concurrent requests translated in one
+                model call; 1 disables micro-batching
+            batch_wait_ms: How long to wait for other requests to join a batch
         """
         self.model_name = model_name
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        logger.info(f"Loading NLLB model: {model_name} on device: {self.device}")
-        
+
+        logger.info(f"Loading NLLB model: {model_name} with '{backend}' backend")
+
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(self.device)
-            logger.info("NLLB model loaded successfully")
+            self.backend = create_translation_backend(
+                backend,
+                model_name,
+                num_beams=num_beams,
+                num_threads=num_threads,
+                model_dir=model_dir
+            )
+            self.tokenizer = self.backend.tokenizer
+            self.device = self.backend.device
+            logger.info(f"NLLB model loaded successfully: {self.backend.info()}")
         except Exception as e:
             logger.error(f"Failed to load NLLB model: {e}")
             raise
-    
+
+        self.cache = LRUCache(max_size=cache_size)
+        self.batcher = None
+        if batch_size > 1:
+            self.batcher = MicroBatcher(
+                self._translate_batch_for_key,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms,
+                name="nllb-batcher"
+            )
+
     def translate(
         self,
         text: str,
@@ -38,84 +74,140 @@ class NLLBTranslator:
     ) -> str:
         """
         Translate text from source language to target language
-        
+
+        Concurrent calls for the same language pair are grouped into one
+        model call by the micro-batcher.
+
         Args:
             text: Text to translate
             source_lang: Source language code (NLLB format, e.g., 'tam_Taml')
             target_lang: Target language code (NLLB format, e.g., 'eng_Latn')
             max_length: Maximum length of generated translation
-            
+
         Returns:
             Translated text
         """
         if not text or not text.strip():
             logger.warning("Empty text provided for translation")
             return ""
-        
+
         # If source and target are the same, return original text
         if source_lang == target_lang:
             logger.info(f"Source and target languages are the same ({source_lang}), skipping translation")
             return text
-        
+
+        cached = self.cache.get((text, source_lang, target_lang))
+        if cached is not None:
+            logger.info(f"Translation cache hit ({source_lang} -> {target_lang})")
+            return cached
+
         try:
             logger.info(f"Translating from {source_lang} to {target_lang}")
-            
-            # Set source language for tokenizer
-            self.tokenizer.src_lang = source_lang
-            
-            # Tokenize input
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=max_length
-            ).to(self.device)
-            
-            # Generate translation
-            translated_tokens = self.model.generate(
-                **inputs,
-                forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(target_lang),
-                max_length=max_length,
-                num_beams=5,
-                early_stopping=True
-            )
-            
-            # Decode translation
-            translated_text = self.tokenizer.batch_decode(
-                translated_tokens,
-                skip_special_tokens=True
-            )[0]
-            
+
+            if self.batcher is not None:
+                future = self.batcher.submit((source_lang, target_lang, max_length), text)
+                translated_text = future.result()
+            else:
+                translated_text = self.translate_batch([text], source_lang, target_lang, max_length)[0]
+
             logger.info(f"Translation successful: {text[:50]}... -> {translated_text[:50]}...")
             return translated_text
-            
+
         except Exception as e:
             logger.error(f"Translation failed: {e}")
             # Return original text if translation fails
             return text
-    
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        max_length: int = 512
+    ) -> List[str]:
+        """
+        Translate several texts from one language to another in a single
+        model call
+
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code (NLLB format)
+            target_lang: Target language code (NLLB format)
+            max_length: Maximum length of each generated translation
+
+        Returns:
+            Translations in the same order as texts; empty inputs map to ""
+        """
+        if source_lang == target_lang:
+            return list(texts)
+
+        results: List[Optional[str]] = [None] * len(texts)
+        # Distinct uncached texts -> positions they fill in the output
+        pending: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = ""
+                continue
+            cached = self.cache.get((text, source_lang, target_lang))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(text, []).append(i)
+
+        if pending:
+            unique_texts = list(pending)
+            translations = self.backend.generate(unique_texts, source_lang, target_lang, max_length)
+            for text, translation in zip(unique_texts, translations):
+                self.cache.put((text, source_lang, target_lang), translation)
+                for i in pending[text]:
+                    results[i] = translation
+
+        return results
+
+    def _translate_batch_for_key(self, key: Tuple[str, str, int], texts: List[str]) -> List[str]:
+        source_lang, target_lang, max_length = key
+        logger.info(f"Translating batch of {len(texts)} from {source_lang} to {target_lang}")
+        return self.translate_batch(texts, source_lang, target_lang, max_length)
+
+    def warmup(self) -> None:
+        """Run one short translation each way so the first request does not pay allocation costs"""
+        self.backend.generate(["एनपीएस क्या है?"], "hin_Deva", "eng_Latn", 32)
+        self.backend.generate(["What is NPS?"], "eng_Latn", "hin_Deva", 32)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get translation cache and batching counters"""
+        return {
+            "cache": self.cache.stats(),
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stop the micro-batcher thread"""
+        if self.batcher is not None:
+            self.batcher.close()
+
     def translate_to_english(self, text: str, source_lang: str) -> str:
         """
         Convenience method to translate any language to English
-        
+
         Args:
             text: Text to translate
             source_lang: Source language code (NLLB format)
-            
+
         Returns:
             Translated text in English
         """
         return self.translate(text, source_lang, "eng_Latn")
-    
+
     def translate_from_english(self, text: str, target_lang: str) -> str:
         """
         Convenience method to translate English to any language
-        
+
         Args:
             text: English text to translate
             target_lang: Target language code (NLLB format)
-            
+
         Returns:
             Translated text in target language
         """
@@ -0,0 +1,574 @@
+import numpy as np
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .vector_index import IndexSnapshot, PersistedVectorIndex
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKENDS = ("chroma", "numpy", "faiss")
+
+
+def matches_filter(metadata: Optional[Dict], where: Optional[Dict]) -> bool:
+    """
+    Evaluate a Chroma-style ``where`` filter against one metadata dict
+
+    Supports equality shorthand ({"source": "faq"}), the operators $eq,
+    $ne, $gt, $gte, $lt, $lte, $in and $nin, and $and / $or combinators.
+    Several top-level keys are combined with AND.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if not _compare(value, op, operand):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+class VectorBackend:
+    """
+    Storage and nearest-neighbour search over normalized embeddings
+
+    All backends use cosine distance (1 - cosine similarity) and upsert
+    semantics: adding an existing id replaces that document. ``directory``
+    is where the backend persists its data.
+    """
+
+    name = "base"
+    directory = ""
+    # Called after refresh() picks up a write made by another process
+    on_external_change: Optional[Callable[[], None]] = None
+
+    def refresh(self) -> bool:
+        """
+        Pick up writes made by another process sharing the same data
+
+        Returns:
+            True if the stored documents changed; backends that cannot tell
+            (ChromaDB) always return False
+        """
+        return False
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        """Insert or replace documents with their embeddings"""
+        raise NotImplementedError
+
+    def query(self, embedding: np.ndarray, top_k: int, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Find the nearest documents to a query embedding
+
+        Returns:
+            Dictionaries with 'id', 'document', 'metadata' and 'distance',
+            closest first
+        """
+        raise NotImplementedError
+
+    def query_batch(self, embeddings: np.ndarray, top_k: int, where: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Find the nearest documents to each row of a query matrix
+
+        Backends that can search several queries in one call override this;
+        the default runs query() once per row.
+
+        Returns:
+            One query() result per row of ``embeddings``
+        """
+        return [self.query(embedding, top_k, where=where) for embedding in embeddings]
+
+    def get(self, ids: List[str], embedding: np.ndarray, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Fetch documents by id with their distance to a query embedding
+
+        Used to score keyword-search hits that the vector search missed.
+        Unknown ids and documents not matching ``where`` are left out.
+
+        Returns:
+            Dictionaries as returned by query(), in no particular order
+        """
+        raise NotImplementedError
+
+    def iter_documents(self, batch_size: int = 512) -> Iterator[Tuple[List[str], List[str]]]:
+        """Yield (ids, documents) batches covering the whole collection"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of stored documents"""
+        raise NotImplementedError
+
+    def delete_all(self) -> None:
+        """Remove every document"""
+        raise NotImplementedError
+
+
+class ChromaBackend(VectorBackend):
+    """ChromaDB persistent collection (HNSW index in SQLite-backed storage)"""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: str, collection_name: str):
+        import chromadb
+
+        self.persist_directory = persist_directory
+        self.directory = persist_directory
+        self.collection_name = collection_name
+
+        logger.info(f"Initializing ChromaDB at: {persist_directory}")
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.collection = self._open_collection()
+
+    def _open_collection(self):
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=documents,
+            # Chroma rejects empty metadata dicts
+            metadatas=metadatas if any(metadatas) else None,
+            ids=ids
+        )
+
+    def query(self, embedding, top_k, where=None):
+        return self.query_batch(np.asarray(embedding).reshape(1, -1), top_k, where=where)[0]
+
+    def query_batch(self, embeddings, top_k, where=None):
+        embeddings = np.asarray(embeddings)
+        results = self.collection.query(
+            query_embeddings=embeddings.tolist(),
+            n_results=top_k,
+            where=where
+        )
+
+        batch_results = []
+        for q in range(embeddings.shape[0]):
+            formatted_results = []
+            if results and results['documents'] and len(results['documents']) > q:
+                for i in range(len(results['documents'][q])):
+                    formatted_results.append({
+                        'document': results['documents'][q][i],
+                        'metadata': (results['metadatas'][q][i] if results['metadatas'] else None) or {},
+                        'distance': results['distances'][q][i] if results['distances'] else 0.0,
+                        'id': results['ids'][q][i]
+                    })
+            batch_results.append(formatted_results)
+        return batch_results
+
+    def get(self, ids, embedding, where=None):
+        if not ids:
+            return []
+        results = self.collection.get(ids=ids, where=where, include=["documents", "metadatas", "embeddings"])
+        if not results["ids"]:
+            return []
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        distances = 1.0 - np.asarray(results["embeddings"], dtype=np.float32) @ query
+        return [
+            {
+                'document': results['documents'][i],
+                'metadata': (results['metadatas'][i] if results['metadatas'] else None) or {},
+                'distance': float(distances[i]),
+                'id': doc_id
+            }
+            for i, doc_id in enumerate(results['ids'])
+        ]
+
+    def iter_documents(self, batch_size=512):
+        offset = 0
+        while True:
+            results = self.collection.get(limit=batch_size, offset=offset, include=["documents"])
+            if not results["ids"]:
+                return
+            yield results["ids"], results["documents"]
+            offset += len(results["ids"])
+
+    def count(self):
+        return self.collection.count()
+
+    def delete_all(self):
+        self.client.delete_collection(name=self.collection_name)
+        self.collection = self._open_collection()
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Exact brute-force search with one matrix multiply
+
+    Embeddings live in a contiguous matrix persisted by PersistedVectorIndex
+    and memory-mapped, so every worker process shares one copy through the
+    page cache. A query is a single ``matrix @ query`` plus a partial sort,
+    which takes well under a millisecond for corpora of a few tens of
+    thousands of chunks. A batch of queries is scored in the same single
+    pass over the matrix (``matrix @ queries.T``).
+    """
+
+    name = "numpy"
+
+    def __init__(
+        self,
+        index_directory: str,
+        collection_name: str,
+        dtype: str = "float32",
+        mmap: bool = True
+    ):
+        self.directory = os.path.join(index_directory, collection_name)
+        self.storage = PersistedVectorIndex(self.directory, dtype=dtype, mmap=mmap)
+        self._change_lock = threading.Lock()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        with self._change_lock:
+            self.storage.upsert(ids, embeddings, documents, metadatas)
+            self._on_change()
+
+    def _on_change(self) -> None:
+        """Hook for subclasses that maintain a derived index (compare storage.lineage to see what changed)"""
+
+    def refresh(self) -> bool:
+        if not self.storage.refresh():
+            return False
+        with self._change_lock:
+            self._on_change()
+        if self.on_external_change is not None:
+            self.on_external_change()
+        return True
+
+    def _snapshot(self) -> IndexSnapshot:
+        # Another worker process may have written to the shared index
+        self.refresh()
+        return self.storage.snapshot
+
+    def _candidate_rows(self, metadatas: List[Dict], where: Optional[Dict]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        return np.fromiter(
+            (row for row, metadata in enumerate(metadatas) if matches_filter(metadata, where)),
+            dtype=np.int64
+        )
+
+    def query(self, embedding, top_k, where=None):
+        return self.query_batch(np.asarray(embedding, dtype=np.float32).reshape(1, -1), top_k, where=where)[0]
+
+    def query_batch(self, embeddings, top_k, where=None):
+        return self._exact_query_batch(self._snapshot(), embeddings, top_k, where)
+
+    def _exact_query_batch(self, snapshot: IndexSnapshot, embeddings, top_k, where) -> List[List[Dict]]:
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if not len(snapshot) or not queries.shape[0]:
+            return [[] for _ in range(queries.shape[0])]
+
+        rows = self._candidate_rows(snapshot.metadatas, where)
+        if rows is not None and rows.size == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        # One pass over the index scores every query: (documents, queries)
+        scores = snapshot.scores(queries, rows)
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for q in range(queries.shape[0]):
+            column = scores[:, q]
+            ranked = top[:, q][np.argsort(-column[top[:, q]])]
+            if rows is not None:
+                hits = [(int(rows[i]), float(column[i])) for i in ranked]
+            else:
+                hits = [(int(i), float(column[i])) for i in ranked]
+            results.append(self._format(snapshot, hits))
+        return results
+
+    @staticmethod
+    def _format(snapshot: IndexSnapshot, hits) -> List[Dict]:
+        return [
+            {
+                'document': snapshot.document(row),
+                'metadata': snapshot.metadatas[row],
+                'distance': 1.0 - score,
+                'id': snapshot.ids[row]
+            }
+            for row, score in hits
+        ]
+
+    def get(self, ids, embedding, where=None):
+        snapshot = self._snapshot()
+        rows = [
+            row for row in (snapshot.row(doc_id) for doc_id in ids)
+            if row is not None and matches_filter(snapshot.metadatas[row], where)
+        ]
+        if not rows:
+            return []
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = snapshot.scores(np.asarray(embedding, dtype=np.float32).ravel(), rows)
+        return self._format(snapshot, [(int(row), float(score)) for row, score in zip(rows, scores)])
+
+    def iter_documents(self, batch_size=512):
+        snapshot = self._snapshot()
+        for start in range(0, len(snapshot), batch_size):
+            rows = range(start, min(start + batch_size, len(snapshot)))
+            yield [snapshot.ids[row] for row in rows], [snapshot.document(row) for row in rows]
+
+    def count(self):
+        return len(self._snapshot())
+
+    def delete_all(self):
+        with self._change_lock:
+            self.storage.clear()
+            self._on_change()
+
+
+class FaissBackend(NumpyBackend):
+    """
+    FAISS approximate search over the same stored vectors
+
+    ``index_type`` is 'Flat' (exact), 'IVF' (inverted lists, trained once
+    enough vectors exist) or 'HNSW' (graph). ``pq_m`` > 0 adds product
+    quantization to compress the vectors held by the index. Until an IVF or
+    PQ index has enough vectors to train, queries fall back to exact search.
+    Writers never modify the index a query may be searching: they build a
+    new one and swap ``self.index``.
+
+    The built index is saved next to the vectors with the storage lineage
+    and row count it was built from, so other worker processes load it
+    instead of rebuilding, and only when it matches their own view.
+    """
+
+    name = "faiss"
+
+    def __init__(
+        self,
+        index_directory: str,
+        collection_name: str,
+        index_type: str = "Flat",
+        nlist: int = 100,
+        nprobe: int = 10,
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        pq_m: int = 0,
+        dtype: str = "float32",
+        mmap: bool = True
+    ):
+        import faiss
+
+        self._faiss = faiss
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.index = None
+        self._index_lineage = None
+        super().__init__(index_directory, collection_name, dtype=dtype, mmap=mmap)
+        self._rebuild()
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, f"faiss_{self._factory_string().replace(',', '_')}.index")
+
+    def _factory_string(self) -> str:
+        kind = self.index_type.upper()
+        if kind == "IVF":
+            return f"IVF{self.nlist},PQ{self.pq_m}" if self.pq_m else f"IVF{self.nlist},Flat"
+        if kind == "HNSW":
+            return f"HNSW{self.hnsw_m}_PQ{self.pq_m}" if self.pq_m else f"HNSW{self.hnsw_m}"
+        if kind == "FLAT":
+            return f"PQ{self.pq_m}" if self.pq_m else "Flat"
+        raise ValueError(f"Unknown FAISS index type '{self.index_type}', expected Flat, IVF or HNSW")
+
+    def _min_training_size(self) -> int:
+        # FAISS wants ~39 training points per centroid (PQ codebooks have 256)
+        needed = 0
+        if self.index_type.upper() == "IVF":
+            needed = 39 * self.nlist
+        if self.pq_m:
+            needed = max(needed, 39 * 256)
+        return needed
+
+    def _index_state(self) -> List:
+        """What the saved index must have been built from to be reused"""
+        return [*self.storage.lineage, len(self.storage.snapshot)]
+
+    def _rebuild(self) -> None:
+        snapshot = self.storage.snapshot
+        rows = len(snapshot)
+        self._index_lineage = self.storage.lineage
+        if rows == 0 or rows < self._min_training_size():
+            self.index = None
+            return
+
+        index = self._load_saved_index()
+        if index is not None:
+            self.index = index
+            return
+
+        matrix = snapshot.vectors()
+        index = self._faiss.index_factory(matrix.shape[1], self._factory_string(), self._faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            logger.info(f"Training FAISS {self._factory_string()} index on {rows} vectors")
+            index.train(matrix)
+        index.add(matrix)
+        self.index = index
+        self._save_index()
+
+    def _load_saved_index(self):
+        with self.storage.hold_lock():
+            try:
+                with open(self._index_path + ".json", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+            if state != self._index_state() or not os.path.exists(self._index_path):
+                return None
+            return self._faiss.read_index(self._index_path)
+
+    def _save_index(self) -> None:
+        state = self._index_state()
+        # Every worker process may save after the same external write: the
+        # lock orders them and a per-process tmp name keeps their files apart
+        with self.storage.hold_lock():
+            tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+            self._faiss.write_index(self.index, tmp_path)
+            # Drop the old state first: an interrupted save then reads as no saved index
+            if os.path.exists(self._index_path + ".json"):
+                os.remove(self._index_path + ".json")
+            os.replace(tmp_path, self._index_path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._index_path + ".json")
+
+    def _on_change(self) -> None:
+        snapshot = self.storage.snapshot
+        if (
+            self.index is not None
+            and self.storage.lineage == self._index_lineage
+            and len(snapshot) >= self.index.ntotal
+        ):
+            if len(snapshot) > self.index.ntotal:
+                # Append-only change: extend a copy of the index. FAISS cannot
+                # search an index while another thread adds to it, so queries
+                # keep using the old one until the reference is swapped
+                index = self._faiss.clone_index(self.index)
+                index.add(snapshot.vectors()[index.ntotal:])
+                self.index = index
+                self._save_index()
+            return
+        # Rows were overwritten (here or by another process) or the index was recreated
+        self._rebuild()
+
+    def _search_params(self, rows: Optional[np.ndarray]):
+        selector = self._faiss.IDSelectorBatch(rows) if rows is not None else None
+        kind = self.index_type.upper()
+        if kind == "IVF":
+            return self._faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if kind == "HNSW":
+            return self._faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return self._faiss.SearchParameters(sel=selector)
+
+    def query(self, embedding, top_k, where=None):
+        return self.query_batch(np.asarray(embedding, dtype=np.float32).reshape(1, -1), top_k, where=where)[0]
+
+    def query_batch(self, embeddings, top_k, where=None):
+        snapshot = self._snapshot()
+        index = self.index
+        if index is None or index.ntotal != len(snapshot):
+            return self._exact_query_batch(snapshot, embeddings, top_k, where)
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        rows = self._candidate_rows(snapshot.metadatas, where)
+        if rows is not None:
+            if rows.size == 0:
+                return [[] for _ in range(queries.shape[0])]
+            if rows.size <= max(top_k * 64, 1024):
+                # Small filtered subsets are cheaper (and exact) to scan directly
+                return self._exact_query_batch(snapshot, queries, top_k, where)
+
+        # FAISS searches all queries in one call, parallelized over its own threads
+        scores, found = index.search(queries, top_k, params=self._search_params(rows))
+        return [
+            self._format(snapshot, [(int(row), float(score)) for row, score in zip(found[q], scores[q]) if row >= 0])
+            for q in range(queries.shape[0])
+        ]
+
+    def delete_all(self):
+        super().delete_all()
+        with self.storage.hold_lock():
+            for name in os.listdir(self.directory):
+                if name.startswith("faiss_"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def create_vector_backend(
+    backend: str,
+    persist_directory: str,
+    index_directory: str,
+    collection_name: str,
+    index_dtype: str = "float32",
+    mmap: bool = True,
+    **faiss_options
+) -> VectorBackend:
+    """
+    Build a vector backend by name
+
+    Args:
+        backend: One of VECTOR_BACKENDS
+        persist_directory: ChromaDB directory (chroma)
+        index_directory: Directory for numpy/faiss index files
+        collection_name: Collection name (a sub-directory for numpy/faiss)
+        index_dtype: Stored vector type for numpy/faiss: float32, float16 or int8
+        mmap: Memory-map the numpy/faiss index files instead of reading them
+        **faiss_options: index_type, nlist, nprobe, hnsw_m, ef_search, pq_m
+
+    Returns:
+        Opened backend
+    """
+    if backend == "chroma":
+        return ChromaBackend(persist_directory, collection_name)
+    if backend == "numpy":
+        return NumpyBackend(index_directory, collection_name, dtype=index_dtype, mmap=mmap)
+    if backend == "faiss":
+        return FaissBackend(index_directory, collection_name, dtype=index_dtype, mmap=mmap, **faiss_options)
+    raise ValueError(f"Unknown vector backend '{backend}', expected one of {VECTOR_BACKENDS}")
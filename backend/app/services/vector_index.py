@@ -0,0 +1,452 @@
+import numpy as np
+import json
+import logging
+import os
+import uuid
+from contextlib import AbstractContextManager
+from typing import Dict, List, Optional, Tuple
+
+from .file_lock import InterprocessLock
+
+logger = logging.getLogger(__name__)
+
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+FORMAT_VERSION = 1
+
+SCORE_BLOCK_ROWS = 2048
+
+
+class IndexSnapshot:
+    """
+    Immutable view of the index at one point in time
+
+    Queries hold a reference to a snapshot, so a writer can publish a new
+    one without locking readers out.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        scales: Optional[np.ndarray],
+        ids: List[str],
+        metadatas: List[Dict],
+        spans: List[Tuple[int, int]],
+        documents: Optional[np.ndarray]
+    ):
+        self.matrix = matrix
+        self.scales = scales
+        self.ids = ids
+        self.metadatas = metadatas
+        self.spans = spans
+        self._documents = documents
+        self._row_of: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Inner product of the query with every (or the selected) row
+
+        ``query`` may also be a matrix with one query per row; all of them
+        are then scored in one pass over the index, and the result has one
+        column per query.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            scores = matrix @ query.T
+        else:
+            # Upcast in cache-sized blocks rather than materializing a float32 copy
+            scores = np.empty((matrix.shape[0],) + query.shape[:-1], dtype=np.float32)
+            for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+                block = matrix[start:start + SCORE_BLOCK_ROWS]
+                scores[start:start + SCORE_BLOCK_ROWS] = block.astype(np.float32) @ query.T
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            scores *= scales if scores.ndim == 1 else scales[:, None]
+        return scores
+
+    def vectors(self) -> np.ndarray:
+        """All rows as a float32 matrix (dequantized if needed)"""
+        matrix = np.asarray(self.matrix, dtype=np.float32)
+        if self.scales is not None:
+            matrix = matrix * self.scales[:, None]
+        return matrix
+
+    def row(self, doc_id: str) -> Optional[int]:
+        """Row of a document ID, or None if absent (the lookup table is built on first use)"""
+        if self._row_of is None:
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return self._row_of.get(doc_id)
+
+    def document(self, row: int) -> str:
+        """Read one document's text from the documents file"""
+        offset, length = self.spans[row]
+        return self._documents[offset:offset + length].tobytes().decode("utf-8")
+
+
+EMPTY_SNAPSHOT = IndexSnapshot(np.empty((0, 0), dtype=np.float32), None, [], [], [], None)
+
+
+class PersistedVectorIndex:
+    """
+    On-disk embedding index that worker processes open with numpy.memmap
+
+    Layout of the index directory:
+
+    - ``manifest.json``: dtype, dimension, row count and the valid length of
+      every other file; written last (atomically), so a crash mid-write or a
+      concurrent reader never sees a partial append
+    - ``vectors.bin``: contiguous row-major matrix in float32, float16 or int8
+    - ``scales.bin``: per-row float32 scale (int8 only)
+    - ``documents.bin``: UTF-8 document texts, read lazily by offset
+    - ``records.jsonl``: one line per write with row, id, metadata and the
+      document offset/length; a later line for the same row replaces it
+
+    Replacing a document leaves its old text and record behind. Once those
+    dead bytes outnumber the live ones, a write compacts both files into new
+    ones (``documents.<n>.bin``, ``records.<n>.jsonl``) and switches the
+    manifest to them, so re-ingesting the same corpus does not grow the index.
+
+    New ids are appended and existing ids are overwritten in place, so a write
+    costs time proportional to the batch rather than to the index. Opening
+    only parses the records table; vectors and documents stay in the page
+    cache, shared by every process that maps them.
+
+    Writers in different processes serialize on ``write.lock`` and reload
+    the manifest before writing, so each one appends after the other's rows
+    instead of truncating them. The manifest also counts overwritten rows
+    (see lineage), so a reader can tell whether a write it picked up only
+    appended rows.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float32", mmap: bool = True):
+        """
+        Open (or create) the index
+
+        Args:
+            directory: Index directory
+            dtype: Storage type for new indexes: float32, float16 or int8;
+                an existing index keeps the type it was written with
+            mmap: Map the files instead of reading them into memory
+        """
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unknown index dtype '{dtype}', expected one of {INDEX_DTYPES}")
+
+        self.directory = directory
+        self.dtype = dtype
+        self.mmap = mmap
+        os.makedirs(directory, exist_ok=True)
+
+        self._write_lock = InterprocessLock(self._path("write.lock"))
+        self._manifest: Dict = {}
+        self._manifest_version: Optional[Tuple[int, int]] = None
+        self._records: Dict[int, Dict] = {}
+        self._row_of: Dict[str, int] = {}
+        self.snapshot = EMPTY_SNAPSHOT
+        # Compaction swaps the files a manifest points to, so never read them unlocked
+        with self._write_lock.hold():
+            self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _current_manifest_version(self) -> Optional[Tuple[int, int]]:
+        """Identity of manifest.json on disk (replaced atomically on every write), or None"""
+        try:
+            stat = os.stat(self._path("manifest.json"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _reset(self) -> None:
+        self._manifest = {}
+        self._manifest_version = None
+        self._records = {}
+        self._row_of = {}
+        self.snapshot = EMPTY_SNAPSHOT
+
+    def _load(self) -> None:
+        manifest_path = self._path("manifest.json")
+        version = self._current_manifest_version()
+        if version is None:
+            return
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index format in {self.directory}")
+        if manifest["dtype"] != self.dtype:
+            logger.warning(
+                f"Vector index in {self.directory} is {manifest['dtype']}, not {self.dtype}; "
+                f"rebuild the index to change its dtype"
+            )
+
+        with open(self._path(manifest.get("records_file", "records.jsonl")), "rb") as f:
+            lines = f.read(manifest["records_bytes"]).splitlines()
+        # One parse of the whole table is several times faster than one per line
+        records = {record["row"]: record for record in json.loads(b"[" + b",".join(lines) + b"]")}
+
+        self._manifest = manifest
+        self._manifest_version = version
+        self._records = records
+        self._row_of = {record["id"]: row for row, record in records.items()}
+        self.snapshot = self._build_snapshot()
+        logger.info(f"Opened {manifest['rows']} x {manifest['dim']} {manifest['dtype']} vector index at {self.directory}")
+
+    @property
+    def lineage(self) -> Tuple[Optional[str], int]:
+        """
+        Identifies the existing rows' contents: it changes when rows are
+        overwritten or the index is cleared and recreated, but not when rows
+        are only appended
+        """
+        return self._manifest.get("index_id"), self._manifest.get("replacements", 0)
+
+    def hold_lock(self) -> AbstractContextManager:
+        """Hold the cross-process write lock, e.g. to write files derived from the index"""
+        return self._write_lock.hold()
+
+    def _map(self, name: str, dtype, count: int, shape=None) -> np.ndarray:
+        if count == 0:
+            return np.empty(shape or (0,), dtype=dtype)
+        if self.mmap:
+            return np.memmap(self._path(name), dtype=dtype, mode="r", shape=shape or (count,))
+        data = np.fromfile(self._path(name), dtype=dtype, count=count)
+        return data.reshape(shape) if shape else data
+
+    def _build_snapshot(self) -> IndexSnapshot:
+        manifest = self._manifest
+        rows, dim = manifest["rows"], manifest["dim"]
+        matrix = self._map("vectors.bin", manifest["dtype"], rows * dim, shape=(rows, dim))
+        scales = self._map("scales.bin", np.float32, rows) if manifest["dtype"] == "int8" else None
+        documents = self._map(manifest.get("documents_file", "documents.bin"), np.uint8, manifest["documents_bytes"])
+
+        ordered = [self._records[row] for row in range(rows)]
+        return IndexSnapshot(
+            matrix,
+            scales,
+            [record["id"] for record in ordered],
+            [record["metadata"] for record in ordered],
+            [(record["offset"], record["length"]) for record in ordered],
+            documents
+        )
+
+    def refresh(self) -> bool:
+        """
+        Pick up writes made by another process
+
+        Returns:
+            True if the index changed since it was last loaded
+        """
+        if self._current_manifest_version() == self._manifest_version:
+            return False
+        with self._write_lock.hold():
+            return self._sync()
+
+    def _sync(self) -> bool:
+        """Reload the index if another process wrote or cleared it (call with the write lock held)"""
+        version = self._current_manifest_version()
+        if version == self._manifest_version:
+            return False
+        if version is None:
+            self._reset()
+        else:
+            self._load()
+        return True
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        dtype = self._manifest.get("dtype", self.dtype)
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(dtype), None
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> Tuple[int, int]:
+        """
+        Insert new ids and overwrite existing ones
+
+        Args:
+            ids: Document IDs
+            vectors: Normalized float32 embeddings, one row per id
+            documents: Document texts
+            metadatas: Metadata dictionaries
+
+        Returns:
+            (number appended, number replaced)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._write_lock.hold():
+            # Offsets and existing rows must come from the latest write, whichever process made it
+            self._sync()
+            manifest = dict(self._manifest) or {
+                "format_version": FORMAT_VERSION,
+                "index_id": uuid.uuid4().hex,
+                "dtype": self.dtype,
+                "dim": int(vectors.shape[1]),
+                "rows": 0,
+                "documents_bytes": 0,
+                "records_bytes": 0,
+                "documents_file": "documents.bin",
+                "records_file": "records.jsonl",
+            }
+            if vectors.shape[1] != manifest["dim"]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index ({manifest['dim']})")
+            self._manifest = manifest
+            documents_file = manifest.get("documents_file", "documents.bin")
+            records_file = manifest.get("records_file", "records.jsonl")
+
+            # Last occurrence wins when a batch repeats an id
+            latest = {doc_id: i for i, doc_id in enumerate(ids)}
+            order = sorted(latest.values())
+            quantized, scales = self._quantize(vectors[order])
+            row_size = quantized.itemsize * manifest["dim"]
+
+            records = []
+            appended = replaced = 0
+            with open(self._path("vectors.bin"), "ab") as vec_file, \
+                    open(self._path(documents_file), "ab") as doc_file, \
+                    open(self._path("scales.bin"), "ab") as scale_file:
+                # Appending mode ignores seek, so in-place rows use a second handle
+                vec_file.truncate(manifest["rows"] * row_size)
+                doc_file.truncate(manifest["documents_bytes"])
+                scale_file.truncate(manifest["rows"] * 4 if scales is not None else 0)
+                overwrite = open(self._path("vectors.bin"), "r+b")
+                scale_overwrite = open(self._path("scales.bin"), "r+b") if scales is not None else None
+                try:
+                    offset = manifest["documents_bytes"]
+                    for j, i in enumerate(order):
+                        doc_id = ids[i]
+                        text = documents[i].encode("utf-8")
+                        doc_file.write(text)
+
+                        row = self._row_of.get(doc_id)
+                        if row is None:
+                            row = manifest["rows"] + appended
+                            vec_file.write(quantized[j].tobytes())
+                            if scales is not None:
+                                scale_file.write(scales[j].tobytes())
+                            appended += 1
+                        else:
+                            overwrite.seek(row * row_size)
+                            overwrite.write(quantized[j].tobytes())
+                            if scale_overwrite is not None:
+                                scale_overwrite.seek(row * 4)
+                                scale_overwrite.write(scales[j].tobytes())
+                            replaced += 1
+
+                        self._row_of[doc_id] = row
+                        record = {
+                            "row": row,
+                            "id": doc_id,
+                            "metadata": metadatas[i] or {},
+                            "offset": offset,
+                            "length": len(text),
+                        }
+                        self._records[row] = record
+                        records.append(record)
+                        offset += len(text)
+                finally:
+                    overwrite.close()
+                    if scale_overwrite is not None:
+                        scale_overwrite.close()
+
+            with open(self._path(records_file), "ab") as f:
+                f.truncate(manifest["records_bytes"])
+                payload = b"".join(
+                    json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records
+                )
+                f.write(payload)
+
+            manifest["rows"] += appended
+            manifest["replacements"] = manifest.get("replacements", 0) + replaced
+            manifest["documents_bytes"] = offset
+            manifest["records_bytes"] += len(payload)
+            live_bytes = sum(record["length"] for record in self._records.values())
+            if replaced and manifest["documents_bytes"] - live_bytes > live_bytes:
+                self._compact(manifest)
+            else:
+                self._write_manifest(manifest)
+            self.snapshot = self._build_snapshot()
+            return appended, replaced
+
+    def _compact(self, manifest: Dict) -> None:
+        """
+        Rewrite the documents and records files without replaced entries
+        (call with the write lock held)
+
+        The live entries go to new files and the manifest switches to them
+        atomically; snapshots still mapping the old files keep working.
+        """
+        old_documents = manifest.get("documents_file", "documents.bin")
+        old_records = manifest.get("records_file", "records.jsonl")
+        generation = manifest.get("compactions", 0) + 1
+        documents_file = f"documents.{generation}.bin"
+        records_file = f"records.{generation}.jsonl"
+
+        with open(self._path(old_documents), "rb") as f:
+            texts = f.read(manifest["documents_bytes"])
+        records = {}
+        offset = 0
+        with open(self._path(documents_file), "wb") as doc_file, open(self._path(records_file), "wb") as rec_file:
+            for row in range(manifest["rows"]):
+                record = self._records[row]
+                doc_file.write(texts[record["offset"]:record["offset"] + record["length"]])
+                record = dict(record, offset=offset)
+                rec_file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                records[row] = record
+                offset += record["length"]
+            records_bytes = rec_file.tell()
+
+        dead_bytes = manifest["documents_bytes"] - offset
+        manifest.update(
+            compactions=generation,
+            documents_file=documents_file,
+            records_file=records_file,
+            documents_bytes=offset,
+            records_bytes=records_bytes,
+        )
+        self._write_manifest(manifest)
+        self._records = records
+        for name in (old_documents, old_records):
+            os.remove(self._path(name))
+        logger.info(f"Compacted vector index documents in {self.directory} ({dead_bytes} bytes of replaced text dropped)")
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        path = self._path("manifest.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        self._manifest_version = self._current_manifest_version()
+
+    def clear(self) -> None:
+        """Delete every row and the index files"""
+        with self._write_lock.hold():
+            # The manifest goes first, so readers never see it pointing at removed files
+            names = ["manifest.json", "vectors.bin", "scales.bin"] + sorted(
+                name for name in os.listdir(self.directory)
+                if name.startswith("documents.") or name.startswith("records.")
+            )
+            for name in names:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self._reset()
+
+    def info(self) -> Dict:
+        """Describe the index (dtype, shape, storage mode)"""
+        return {
+            "dtype": self._manifest.get("dtype", self.dtype),
+            "rows": self._manifest.get("rows", 0),
+            "dim": self._manifest.get("dim"),
+            "mmap": self.mmap,
+        }
@@ -1,13 +1,29 @@
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+import numpy as np
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import threading
+import unicodedata
+from typing import Callable, List, Dict, Optional
 import os
 
+from .bm25_index import BM25Index, reciprocal_rank_fusion
+from .embedder import QueryEmbedder
+from .vector_backends import ChromaBackend, VectorBackend
+
 logger = logging.getLogger(__name__)
 
 
+def content_document_id(text: str) -> str:
+    """
+    Stable document ID derived from the (whitespace-normalized) text
+    
+    Re-adding the same text maps to the same ID, so ingestion is idempotent
+    and uploads never collide with unrelated documents.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return "doc_" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:20]
+
+
 class VectorStore:
     """Vector database for storing and retrieving document embeddings"""
     
@@ -15,15 +31,32 @@ class VectorStore:
         self,
         embedding_model: str = "BAAI/bge-small-en-v1.5",
         persist_directory: str = "./data/chroma_db",
-        collection_name: str = "nps_documents"
+        collection_name: str = "nps_documents",
+        embedder: Optional[QueryEmbedder] = None,
+        backend: Optional[VectorBackend] = None,
+        keyword_index: Optional[BM25Index] = None,
+        rrf_k: int = 60,
+        bm25_weight: float = 1.0,
+        hybrid_candidates: int = 20
     ):
         """
-        Initialize vector store with embedding model and ChromaDB
+        Initialize vector store with embedding model and a vector backend
         
         Args:
             embedding_model: HuggingFace model name for embeddings
             persist_directory: Directory to persist ChromaDB
             collection_name: Name of the collection in ChromaDB
+            embedder: Preconfigured query embedder (caching, batching);
+                built from embedding_model with defaults when omitted
+            backend: Storage/search backend (see create_vector_backend);
+                a ChromaDB collection in persist_directory when omitted
+            keyword_index: BM25 index kept in sync with the collection; when
+                set, searches fuse keyword and vector results (hybrid search)
+            rrf_k: Reciprocal-rank fusion damping constant
+            bm25_weight: Weight of the keyword ranking relative to the vector
+                ranking in the fusion
+            hybrid_candidates: Minimum results taken from each retriever
+                before fusion
         """
         self.embedding_model_name = embedding_model
         self.persist_directory = persist_directory
@@ -32,19 +65,84 @@ class VectorStore:
         # Create persist directory if it doesn't exist
         os.makedirs(persist_directory, exist_ok=True)
         
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedder = embedder or QueryEmbedder(embedding_model)
+        # None when the model runs in an inference worker process
+        self.embedding_model = getattr(self.embedder, "model", None)
         
-        logger.info(f"Initializing ChromaDB at: {persist_directory}")
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.backend = backend or ChromaBackend(persist_directory, collection_name)
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        self.keyword_index = keyword_index
+        self.rrf_k = rrf_k
+        self.bm25_weight = bm25_weight
+        self.hybrid_candidates = hybrid_candidates
+        if keyword_index is not None and len(keyword_index) == 0 and self.backend.count() > 0:
+            self.rebuild_keyword_index()
+        
+        # Callbacks run whenever the corpus changes (e.g. answer cache invalidation)
+        self._change_listeners: List[Callable[[], None]] = []
+        self._listeners_lock = threading.Lock()
+        # ...including writes by another worker process, seen when the backend refreshes
+        self.backend.on_external_change = self._notify_change
+        
+        logger.info(f"Vector store initialized with collection: {collection_name} ({self.backend.name} backend)")
+    
+    def add_change_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to run after documents are added or deleted
+        
+        Writes by other processes sharing the index trigger it too, once
+        this process notices them (see refresh()).
+        
+        Args:
+            callback: Zero-argument callable
+        """
+        with self._listeners_lock:
+            self._change_listeners.append(callback)
+    
+    def _notify_change(self) -> None:
+        with self._listeners_lock:
+            listeners = list(self._change_listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Corpus change listener failed: {e}")
+    
+    def refresh(self) -> bool:
+        """
+        Pick up documents written by another worker process
         
-        logger.info(f"Vector store initialized with collection: {collection_name}")
+        Searches do this on their own; call it before serving anything
+        derived from the corpus without searching (e.g. a cached answer).
+        
+        Returns:
+            True if the corpus changed (change listeners have run)
+        """
+        return self.backend.refresh()
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Normalized float32 embedding vector
+        """
+        return self.embedder.embed_query(query)
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several search queries in one encoder pass
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            Matrix of normalized embeddings, one row per query
+        """
+        return self.embedder.embed_queries(queries)
     
     def add_documents(
         self,
@@ -55,10 +153,12 @@ class VectorStore:
         """
         Add documents to the vector store
         
+        Documents whose ID already exists are replaced.
+        
         Args:
             documents: List of document texts
             metadatas: Optional list of metadata dictionaries
-            ids: Optional list of document IDs
+            ids: Optional list of document IDs (content hashes when omitted)
         """
         if not documents:
             logger.warning("No documents provided to add")
@@ -66,35 +166,46 @@ class VectorStore:
         
         # Generate IDs if not provided
         if ids is None:
-            ids = [f"doc_{i}" for i in range(len(documents))]
+            ids = [content_document_id(document) for document in documents]
         
         # Generate embeddings
         logger.info(f"Generating embeddings for {len(documents)} documents")
-        embeddings = self.embedding_model.encode(documents).tolist()
-        
-        # Add to collection
-        self.collection.add(
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        embeddings = self.embedder.encode(documents)
+        
+        self.backend.add(ids, embeddings, documents, metadatas or [{} for _ in documents])
+        if self.keyword_index is not None:
+            self.keyword_index.add(ids, documents)
         
         logger.info(f"Added {len(documents)} documents to vector store")
+        self._notify_change()
+    
+    def rebuild_keyword_index(self) -> None:
+        """Re-index every stored document in the keyword index"""
+        logger.info(f"Building BM25 index for {self.backend.count()} stored documents")
+        self.keyword_index.rebuild(self.backend.iter_documents())
+        logger.info(f"BM25 index built: {len(self.keyword_index)} documents")
     
     def search(
         self,
         query: str,
         top_k: int = 5,
-        filter_metadata: Optional[Dict] = None
+        filter_metadata: Optional[Dict] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict]:
         """
         Search for similar documents
         
+        With a keyword index, the vector and BM25 rankings are fused by
+        reciprocal rank, so exact terms such as '80CCD(1B)' or 'PRAN' are
+        found even when the embedding misses them. 'distance' is always the
+        cosine distance to the query; results are ordered by the fused rank.
+        
         Args:
             query: Search query text
             top_k: Number of results to return
-            filter_metadata: Optional metadata filter
+            filter_metadata: Optional metadata filter (Chroma 'where' syntax,
+                e.g. {"source": "faq"} or {"year": {"$gte": 2023}})
+            query_embedding: Precomputed embedding of the query (see embed_query)
             
         Returns:
             List of dictionaries containing document, metadata, and distance
@@ -106,34 +217,102 @@ class VectorStore:
         logger.info(f"Searching for: {query[:100]}...")
         
         # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])[0].tolist()
-        
-        # Search in collection
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            where=filter_metadata
-        )
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         
-        # Format results
-        formatted_results = []
-        if results and results['documents'] and len(results['documents']) > 0:
-            for i in range(len(results['documents'][0])):
-                formatted_results.append({
-                    'document': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                    'distance': results['distances'][0][i] if results['distances'] else 0.0,
-                    'id': results['ids'][0][i]
-                })
+        if self.keyword_index is None:
+            formatted_results = self.backend.query(query_embedding, top_k, where=filter_metadata)
+        else:
+            formatted_results = self._hybrid_search(query, query_embedding, top_k, filter_metadata)
         
         logger.info(f"Found {len(formatted_results)} results")
         return formatted_results
     
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Dict]]:
+        """
+        Search for several queries at once
+        
+        The queries are embedded in one encoder pass and the index is
+        searched with the whole query matrix in one call (one matrix
+        multiply for the numpy backend, one FAISS search). Keyword search,
+        if enabled, still runs per query.
+        
+        Args:
+            queries: Search query texts
+            top_k: Number of results per query
+            filter_metadata: Optional metadata filter applied to every query
+            query_embeddings: Precomputed embeddings, one row per query (see embed_queries)
+            
+        Returns:
+            One result list per query, as returned by search()
+        """
+        if not queries:
+            return []
+        
+        if query_embeddings is None:
+            query_embeddings = self.embed_queries(queries)
+        
+        candidates = top_k if self.keyword_index is None else max(top_k, self.hybrid_candidates)
+        dense_results = self.backend.query_batch(query_embeddings, candidates, where=filter_metadata)
+        if self.keyword_index is None:
+            return dense_results
+        
+        return [
+            self._hybrid_search(query, embedding, top_k, filter_metadata, dense=dense)
+            for query, embedding, dense in zip(queries, query_embeddings, dense_results)
+        ]
+    
+    def _hybrid_search(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filter_metadata: Optional[Dict],
+        dense: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        candidates = max(top_k, self.hybrid_candidates)
+        if dense is None:
+            dense = self.backend.query(query_embedding, candidates, where=filter_metadata)
+        keyword_hits = self.keyword_index.search(query, candidates)
+        if not keyword_hits:
+            return dense[:top_k]
+        
+        by_id = {result['id']: result for result in dense}
+        # Keyword-only hits still need their text, metadata (for the filter) and distance
+        missing = [doc_id for doc_id, _ in keyword_hits if doc_id not in by_id]
+        if missing:
+            for result in self.backend.get(missing, query_embedding, where=filter_metadata):
+                by_id[result['id']] = result
+        
+        fused = reciprocal_rank_fusion(
+            [
+                [result['id'] for result in dense],
+                [doc_id for doc_id, _ in keyword_hits if doc_id in by_id],
+            ],
+            k=self.rrf_k,
+            weights=[1.0, self.bm25_weight]
+        )
+        return [by_id[doc_id] for doc_id, _ in fused[:top_k]]
+    
+    def warmup(self) -> None:
+        """Run one search so index pages are faulted in before the first request"""
+        if self.get_collection_count() > 0:
+            self.search("What is NPS?", top_k=1, query_embedding=self.embedder.encode(["What is NPS?"])[0])
+    
     def get_collection_count(self) -> int:
         """Get the number of documents in the collection"""
-        return self.collection.count()
+        return self.backend.count()
     
     def delete_collection(self) -> None:
         """Delete the entire collection"""
-        self.client.delete_collection(name=self.collection_name)
+        self.backend.delete_all()
+        if self.keyword_index is not None:
+            self.keyword_index.clear()
         logger.info(f"Deleted collection: {self.collection_name}")
+        self._notify_change()
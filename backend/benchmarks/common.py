@@ -0,0 +1,119 @@
+"""
+Helpers shared by the benchmark scripts: the query corpus, latency
+summaries and result files
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+
+def load_queries(path: Optional[str] = None, languages: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Load the benchmark query corpus
+
+    Args:
+        path: JSON file with a list of {"query", "language"} objects
+            (default: benchmarks/queries.json)
+        languages: Keep only these ISO codes
+
+    Returns:
+        Query records
+    """
+    with open(path or os.path.join(BENCHMARKS_DIR, "queries.json"), encoding="utf-8") as f:
+        queries = json.load(f)
+    if languages:
+        queries = [q for q in queries if q["language"] in languages]
+    if not queries:
+        raise ValueError("No benchmark queries left after filtering")
+    return queries
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: List[float], scale: float = 1000.0, unit: str = "ms") -> Dict:
+    """
+    Summarize durations given in seconds
+
+    Args:
+        values: Durations in seconds
+        scale: Multiplier for the reported values (1000 = milliseconds)
+        unit: Suffix of the reported keys
+
+    Returns:
+        Count, mean, min, p50, p95, p99 and max
+    """
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    digits = 3 if unit == "ms" else 1
+    summary = {"count": len(ordered), f"mean_{unit}": round(sum(ordered) / len(ordered) * scale, digits)}
+    for name, p in (("p50", 50), ("p95", 95), ("p99", 99)):
+        summary[f"{name}_{unit}"] = round(percentile(ordered, p) * scale, digits)
+    summary[f"min_{unit}"] = round(ordered[0] * scale, digits)
+    summary[f"max_{unit}"] = round(ordered[-1] * scale, digits)
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the repository, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(path: str, kind: str, config: Dict, results: Dict) -> None:
+    """
+    Save a benchmark run with enough context to compare it with later runs
+
+    Args:
+        path: Output JSON file
+        kind: 'load' or 'micro'
+        config: Parameters of the run
+        results: Measurements
+    """
+    document = {
+        "kind": kind,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def print_table(rows: Dict[str, Dict], unit: str = "ms") -> None:
+    """Print latency summaries as a table"""
+    print(f"{'':<28}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  ({unit})")
+    for name, summary in rows.items():
+        if not summary.get("count"):
+            print(f"{name:<28}{0:>8}")
+            continue
+        print(
+            f"{name:<28}{summary['count']:>8}{summary[f'mean_{unit}']:>10}{summary[f'p50_{unit}']:>10}"
+            f"{summary[f'p95_{unit}']:>10}{summary[f'p99_{unit}']:>10}{summary[f'max_{unit}']:>10}"
+        )
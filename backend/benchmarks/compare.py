@@ -0,0 +1,111 @@
+"""
+Compare two benchmark result files and flag regressions
+
+Works on the JSON written by load_test.py and microbench.py. Latencies
+(*_ms) and error rates are better when lower; throughputs
+(*_per_second, *_tps) are better when higher. A metric regresses when it
+is worse than the baseline by more than --threshold (relative; error
+rates by more than --error-threshold absolute). Only the
+median and tail are compared by default (p50, p95, p99, throughput, error
+rate), since means and maxima are noisy. Runs with different load
+parameters are compared anyway, with a warning.
+
+Exits with status 1 if anything regressed, so it can gate CI.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json --threshold 0.10
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+COMPARED_SUFFIXES = ("p50_ms", "p95_ms", "p99_ms", "p50_tps", "_per_second", "error_rate")
+# Settings that do not change what is measured
+IGNORED_CONFIG = {"output", "url"}
+
+
+def flatten(node, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted.path, value) for every numeric leaf"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith(("_per_second", "_tps"))
+
+
+def compare(
+    baseline: Dict, current: Dict, threshold: float, error_threshold: float, include_all: bool
+) -> Tuple[list, list]:
+    """
+    Returns:
+        (rows, regressions); each row is (metric, baseline, current, relative change)
+    """
+    base = dict(flatten(baseline["results"]))
+    cur = dict(flatten(current["results"]))
+    rows, regressions = [], []
+    for metric in sorted(base.keys() & cur.keys()):
+        if not include_all and not metric.endswith(COMPARED_SUFFIXES):
+            continue
+        old, new = base[metric], cur[metric]
+        if old == 0:
+            change = 0.0 if new == 0 else float("inf")
+        else:
+            change = (new - old) / abs(old)
+        worse = -change if higher_is_better(metric) else change
+        rows.append((metric, old, new, change))
+        # Error rates are often 0, so compare them in absolute terms
+        if metric.endswith("error_rate"):
+            if new - old > error_threshold:
+                regressions.append((metric, old, new, change))
+        elif worse > threshold:
+            regressions.append((metric, old, new, change))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--error-threshold", type=float, default=0.01, help="Absolute error rate increase counted as a regression")
+    parser.add_argument("--all", action="store_true", help="Compare every numeric metric, not just p50/p95/p99 and rates")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    if baseline.get("kind") != current.get("kind"):
+        parser.error(f"Cannot compare a '{baseline.get('kind')}' run with a '{current.get('kind')}' run")
+
+    differing = sorted(
+        key for key in baseline.get("config", {}).keys() | current.get("config", {}).keys()
+        if key not in IGNORED_CONFIG and baseline["config"].get(key) != current["config"].get(key)
+    )
+    if differing:
+        print(f"Warning: runs differ in {', '.join(differing)}; differences may not be regressions\n")
+
+    print(f"Baseline: {baseline.get('timestamp')} ({baseline.get('git_revision') or 'unknown revision'})")
+    print(f"Current:  {current.get('timestamp')} ({current.get('git_revision') or 'unknown revision'})\n")
+
+    rows, regressions = compare(baseline, current, args.threshold, args.error_threshold, args.all)
+    flagged = {row[0] for row in regressions}
+    print(f"{'metric':<64}{'baseline':>12}{'current':>12}{'change':>10}")
+    for metric, old, new, change in rows:
+        marker = "  REGRESSION" if metric in flagged else ""
+        print(f"{metric:<64}{old:>12.3f}{new:>12.3f}{change:>+10.1%}{marker}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
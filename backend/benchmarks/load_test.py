@@ -0,0 +1,255 @@
+"""
+Load test for the chat API
+
+Replays the multilingual NPS query corpus (benchmarks/queries.json) against
+/chat or /chat/stream and reports:
+- throughput;
+- end-to-end latency percentiles (also per language);
+- time to first token when streaming;
+- server-reported per-stage latencies and LLM tokens/s;
+- status codes and error rate.
+
+Two load models are supported:
+- Closed loop (default): --concurrency clients each send their next request
+  as soon as the previous one finished.
+- Open loop (--rate): requests arrive at random (Poisson) intervals at the
+  given rate, whether or not earlier ones have finished; --concurrency
+  caps the requests in flight. Latency is measured from the scheduled
+  arrival, so time spent waiting for a free slot counts.
+
+Run it against benchmarks/ollama_stub.py to measure the backend's own
+overhead without a GPU, or against a real Ollama for end-to-end numbers.
+
+Usage:
+    python benchmarks/ollama_stub.py --port 11434 --tps 30 &
+    python benchmarks/load_test.py --concurrency 8 --requests 200 --output load.json
+    python benchmarks/load_test.py --endpoint stream --rate 4 --duration 60
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import load_queries, print_table, summarize, write_results
+
+
+class Sample:
+    """Outcome of one request"""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.latency: Optional[float] = None
+        self.time_to_first_token: Optional[float] = None
+        self.cached = False
+        self.timing: Dict[str, float] = {}
+        self.usage: Dict = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.error is None
+
+
+async def send_chat(client: httpx.AsyncClient, payload: Dict, sample: Sample, started: float) -> None:
+    response = await client.post("/chat", json=payload)
+    sample.status = response.status_code
+    sample.latency = time.perf_counter() - started
+    if response.status_code != 200:
+        sample.error = response.text[:200]
+        return
+    body = response.json()
+    sample.error = body.get("error")
+    sample.cached = body.get("cached", False)
+    sample.timing = body.get("timing") or {}
+    sample.usage = body.get("usage") or {}
+
+
+async def send_stream(client: httpx.AsyncClient, payload: Dict, sample: Sample, started: float) -> None:
+    async with client.stream("POST", "/chat/stream", json=payload) as response:
+        sample.status = response.status_code
+        if response.status_code != 200:
+            sample.error = (await response.aread()).decode("utf-8", "replace")[:200]
+            sample.latency = time.perf_counter() - started
+            return
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "token" and sample.time_to_first_token is None:
+                    sample.time_to_first_token = time.perf_counter() - started
+                elif event == "metadata":
+                    sample.cached = data.get("cached", False)
+                elif event == "done":
+                    sample.timing = data.get("timing") or {}
+                    sample.usage = data.get("usage") or {}
+                elif event == "error":
+                    sample.error = data.get("error", "error")
+    sample.latency = time.perf_counter() - started
+
+
+async def run_one(client: httpx.AsyncClient, args, query: Dict, index: int, started: float) -> Sample:
+    sample = Sample(query["language"])
+    text = query["query"]
+    if args.vary:
+        # Different text every time, so the answer cache rarely hits
+        text = f"{text} ({index})"
+    payload = {"query": text, "top_k": args.top_k, "include_timing": True}
+    send = send_stream if args.endpoint == "stream" else send_chat
+    try:
+        await send(client, payload, sample, started)
+    except (httpx.HTTPError, json.JSONDecodeError) as e:
+        sample.error = f"{type(e).__name__}: {e}"
+        sample.latency = time.perf_counter() - started
+    return sample
+
+
+async def run_load(args, queries: List[Dict]) -> Tuple[List[Sample], float]:
+    """Send the warm-up requests, then the measured ones; returns the samples and measured wall time"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        rng = random.Random(args.seed)
+        order = [rng.choice(queries) for _ in range(args.warmup)]
+        for i, query in enumerate(order):
+            await run_one(client, args, query, -i - 1, time.perf_counter())
+
+        t_start = time.perf_counter()
+        deadline = t_start + args.duration if args.duration else None
+        samples: List[Sample] = []
+        counter = iter(range(10 ** 9))
+
+        def more(i: int) -> bool:
+            if deadline is not None:
+                return time.perf_counter() < deadline
+            return i < args.requests
+
+        if not args.rate:
+            async def client_loop():
+                while True:
+                    i = next(counter)
+                    if not more(i):
+                        return
+                    samples.append(await run_one(client, args, rng.choice(queries), i, time.perf_counter()))
+
+            await asyncio.gather(*(client_loop() for _ in range(args.concurrency)))
+            return samples, time.perf_counter() - t_start
+
+        slots = asyncio.Semaphore(args.concurrency)
+        tasks = []
+
+        async def arrival(i: int, scheduled: float):
+            async with slots:
+                samples.append(await run_one(client, args, rng.choice(queries), i, scheduled))
+
+        next_arrival = time.perf_counter()
+        i = 0
+        while more(i):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(arrival(i, next_arrival)))
+            next_arrival += rng.expovariate(args.rate)
+            i += 1
+        await asyncio.gather(*tasks)
+        return samples, time.perf_counter() - t_start
+
+
+def report(samples: List[Sample], wall_seconds: float) -> Dict:
+    succeeded = [s for s in samples if s.ok]
+    statuses = Counter(str(s.status) if s.status is not None else "connection_error" for s in samples)
+
+    stages = defaultdict(list)
+    for sample in succeeded:
+        for stage, seconds in sample.timing.items():
+            # Stages that did not run (answer cache hits) are reported as 0
+            if not (sample.cached and stage in ("generation", "translation_r")):
+                stages[stage].append(seconds)
+
+    by_language = defaultdict(list)
+    for sample in succeeded:
+        by_language[sample.language].append(sample.latency)
+
+    tokens_per_second = [s.usage["tokens_per_second"] for s in succeeded if s.usage.get("tokens_per_second")]
+    completion_tokens = sum(s.usage.get("completion_tokens", 0) for s in succeeded)
+
+    return {
+        "requests": len(samples),
+        "succeeded": len(succeeded),
+        "failed": len(samples) - len(succeeded),
+        "error_rate": round((len(samples) - len(succeeded)) / len(samples), 4) if samples else 0.0,
+        "rejected": statuses.get("429", 0) + statuses.get("503", 0),
+        "status_codes": dict(statuses),
+        "errors": dict(Counter(s.error[:120] for s in samples if s.error).most_common(5)),
+        "cached": sum(1 for s in succeeded if s.cached),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_second": round(len(succeeded) / wall_seconds, 3) if wall_seconds else 0.0,
+        "completion_tokens_per_second": round(completion_tokens / wall_seconds, 1) if wall_seconds else 0.0,
+        "latency": summarize([s.latency for s in succeeded]),
+        "time_to_first_token": summarize([s.time_to_first_token for s in succeeded if s.time_to_first_token is not None]),
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+        "by_language": {language: summarize(values) for language, values in sorted(by_language.items())},
+        "llm_tokens_per_second": summarize(tokens_per_second, scale=1.0, unit="tps"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat API with the multilingual query corpus")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["chat", "stream"], default="chat")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients (closed loop) or maximum requests in flight (open loop)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open-loop arrival rate in requests/s (0 = closed loop)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests to send (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Send requests for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=5, help="Requests sent first and not counted")
+    parser.add_argument("--languages", help="Comma-separated ISO codes to keep from the corpus")
+    parser.add_argument("--queries", help="Query corpus JSON (default: benchmarks/queries.json)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--vary", action="store_true", help="Make every query unique to defeat the answer cache")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    languages = [l.strip() for l in args.languages.split(",")] if args.languages else None
+    queries = load_queries(args.queries, languages)
+
+    mode = f"open loop at {args.rate}/s" if args.rate else "closed loop"
+    amount = f"{args.duration:.0f}s" if args.duration else f"{args.requests} requests"
+    print(f"Load test: {amount} to {args.url} ({args.endpoint}), {mode}, concurrency {args.concurrency}")
+
+    samples, wall_seconds = asyncio.run(run_load(args, queries))
+    results = report(samples, wall_seconds)
+
+    print(f"\n{results['succeeded']}/{results['requests']} succeeded, error rate {results['error_rate']:.2%}, "
+          f"{results['rejected']} rejected, {results['cached']} cached")
+    print(f"Throughput: {results['throughput_per_second']} requests/s, "
+          f"{results['completion_tokens_per_second']} generated tokens/s\n")
+    rows = {"end-to-end": results["latency"]}
+    if args.endpoint == "stream":
+        rows["time to first token"] = results["time_to_first_token"]
+    rows.update({f"stage: {stage}": summary for stage, summary in results["stages"].items()})
+    rows.update({f"language: {language}": summary for language, summary in results["by_language"].items()})
+    print_table(rows)
+    if results["errors"]:
+        print("\nMost common errors:")
+        for error, count in results["errors"].items():
+            print(f"  {count} x {error}")
+
+    if args.output:
+        write_results(args.output, "load", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Microbenchmarks for the per-request building blocks
+
+Times, in this process and without HTTP:
+- detector:   LanguageDetector.detect on every corpus query
+- translator: NLLBTranslator.translate to English, cache cleared per call
+- search:     VectorStore.search on a temporary index of --docs synthetic
+              passages (--hybrid adds BM25), with a precomputed query
+              embedding (index only) and with embedding (cache cleared)
+- context:    LlamaClient._build_context packing --context-docs retrieved
+              passages into the prompt budget
+
+Models and settings come from .env like the API. Save the results with
+--output and compare runs with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/microbench.py --output micro.json
+    python benchmarks/microbench.py --only detector,context --iterations 2000
+"""
+
+import sys
+import os
+import argparse
+import logging
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCHMARKS_DIR)
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+
+from common import load_queries, print_table, summarize, write_results
+from app.config import settings
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+BENCHMARKS = ("detector", "translator", "search", "context")
+
+_PASSAGE_TOPICS = [
+    "Tier I accounts are mandatory for NPS subscribers and carry a lock-in until the age of 60.",
+    "A Tier II account is voluntary and allows withdrawals at any time without a lock-in period.",
+    "Contributions up to Rs 50,000 are deductible under Section 80CCD(1B) over and above Section 80C.",
+    "At retirement up to 60% of the corpus can be withdrawn tax-free as a lump sum.",
+    "At least 40% of the corpus must be used to purchase an annuity from an empanelled insurer.",
+    "Partial withdrawals of up to 25% of own contributions are allowed after three years.",
+    "Subscribers can choose between Active Choice and Auto Choice for asset allocation.",
+    "The pension fund manager can be changed once a financial year.",
+    "A Permanent Retirement Account Number (PRAN) identifies each subscriber.",
+    "The minimum contribution to keep a Tier I account active is Rs 1,000 per year.",
+]
+
+
+def time_calls(func: Callable, inputs: List, iterations: int, setup: Callable = None) -> Dict:
+    """Call func on the inputs round-robin and summarize the per-call latency"""
+    durations = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func(item)
+        durations.append(time.perf_counter() - t0)
+    summary = summarize(durations)
+    summary["calls_per_second"] = round(len(durations) / sum(durations), 1) if sum(durations) else 0.0
+    return summary
+
+
+def synthetic_passages(count: int, seed: int) -> List[str]:
+    """NPS-like passages, varied enough that search has to rank them"""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(_PASSAGE_TOPICS)} {rng.choice(_PASSAGE_TOPICS)} (section {i}, revision {rng.randint(1, 9)})"
+        for i in range(count)
+    ]
+
+
+def bench_detector(queries: List[Dict], args) -> Dict:
+    from app.services.language_detector import LanguageDetector
+
+    detector = LanguageDetector(settings.supported_languages_list)
+    texts = [q["query"] for q in queries]
+    return {
+        "detect": time_calls(detector.detect, texts, args.iterations),
+        "detect_script_only": time_calls(lambda text: detector.detect(text, fallback=False), texts, args.iterations),
+    }
+
+
+def bench_translator(queries: List[Dict], args) -> Dict:
+    from app.services.language_detector import LanguageDetector
+    from app.services.translator import NLLBTranslator
+
+    detector = LanguageDetector(settings.supported_languages_list)
+    translator = NLLBTranslator(
+        settings.nllb_model,
+        backend=settings.translator_backend,
+        num_beams=settings.translator_num_beams,
+        num_threads=settings.translator_num_threads,
+        model_dir=settings.translator_model_dir or None,
+        batch_size=1
+    )
+    pairs = [
+        (q["query"], detector.get_nllb_code(q["language"]))
+        for q in queries if q["language"] != "en"
+    ]
+    translator.warmup()
+    try:
+        return {
+            "translate_to_english": time_calls(
+                lambda pair: translator.translate_to_english(*pair),
+                pairs,
+                min(args.iterations, args.model_iterations),
+                setup=translator.cache.clear
+            ),
+            "translate_batch_to_english_x8": time_calls(
+                lambda batch: translator.translate_batch([text for text, _ in batch], batch[0][1], "eng_Latn"),
+                [[pair] * 8 for pair in pairs],
+                max(1, min(args.iterations, args.model_iterations) // 8),
+                setup=translator.cache.clear
+            ),
+        }
+    finally:
+        translator.close()
+
+
+def bench_search(queries: List[Dict], args) -> Dict:
+    from app.services.bm25_index import BM25Index
+    from app.services.embedder import QueryEmbedder
+    from app.services.vector_backends import create_vector_backend
+    from app.services.vector_store import VectorStore
+
+    directory = tempfile.mkdtemp(prefix="nps-bench-")
+    try:
+        embedder = QueryEmbedder(settings.embedding_model, batch_size=1)
+        backend = create_vector_backend(
+            args.search_backend,
+            persist_directory=os.path.join(directory, "chroma"),
+            index_directory=os.path.join(directory, "index"),
+            collection_name="bench",
+            index_dtype=settings.vector_index_dtype,
+            index_type=settings.faiss_index_type,
+            nlist=settings.faiss_nlist,
+            nprobe=settings.faiss_nprobe
+        )
+        keyword_index = None
+        if args.hybrid:
+            keyword_index = BM25Index(
+                os.path.join(directory, "bench.bm25.jsonl"), k1=settings.bm25_k1, b=settings.bm25_b
+            )
+        store = VectorStore(
+            embedder=embedder,
+            backend=backend,
+            keyword_index=keyword_index,
+            rrf_k=settings.rrf_k,
+            bm25_weight=settings.bm25_weight,
+            hybrid_candidates=settings.hybrid_candidates
+        )
+        passages = synthetic_passages(args.docs, args.seed)
+        for start in range(0, len(passages), 256):
+            batch = passages[start:start + 256]
+            store.add_documents(batch, ids=[f"doc-{start + i}" for i in range(len(batch))])
+
+        texts = [q["query"] for q in queries if q["language"] == "en"] or [q["query"] for q in queries]
+        embeddings = {text: embedder.encode([text])[0] for text in texts}
+        return {
+            "documents": len(passages),
+            "backend": args.search_backend,
+            "hybrid": args.hybrid,
+            "search_index_only": time_calls(
+                lambda text: store.search(text, top_k=5, query_embedding=embeddings[text]), texts, args.iterations
+            ),
+            "search_with_embedding": time_calls(
+                lambda text: store.search(text, top_k=5),
+                texts,
+                min(args.iterations, args.model_iterations),
+                setup=embedder.cache.clear
+            ),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_context(queries: List[Dict], args) -> Dict:
+    from app.services.context_builder import ContextBuilder, load_token_counter
+    from app.services.llama_client import LlamaClient
+
+    client = LlamaClient(
+        base_url=settings.ollama_base_urls_list,
+        model=settings.ollama_model,
+        context_builder=ContextBuilder(
+            token_budget=settings.context_token_budget,
+            token_counter=load_token_counter(settings.context_tokenizer or settings.embedding_model),
+            dedup_threshold=settings.context_dedup_threshold
+        )
+    )
+    rng = random.Random(args.seed)
+    pool = synthetic_passages(200, args.seed)
+    # Long passages make packing trim sentences, as with real retrieved chunks
+    cases = []
+    for q in queries:
+        documents = [" ".join(rng.sample(pool, 4)) for _ in range(args.context_docs)]
+        scores = sorted((rng.random() for _ in documents), reverse=True)
+        cases.append((q["query"], documents, scores))
+    return {
+        "build_context": time_calls(
+            lambda case: client._build_context(case[1], case[2], case[0]), cases, args.iterations
+        ),
+        "context_docs": args.context_docs,
+        "token_budget": settings.context_token_budget,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for detection, translation, search and prompt context")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per benchmark")
+    parser.add_argument("--model-iterations", type=int, default=50, help="Cap on calls that run a model")
+    parser.add_argument("--docs", type=int, default=5000, help="Passages in the search benchmark index")
+    parser.add_argument("--search-backend", default="numpy", help="Vector backend for the search benchmark")
+    parser.add_argument("--hybrid", action="store_true", help="Fuse BM25 keyword search into the search benchmark")
+    parser.add_argument("--context-docs", type=int, default=5, help="Retrieved passages per context")
+    parser.add_argument("--languages", help="Comma-separated ISO codes to keep from the corpus")
+    parser.add_argument("--queries", help="Query corpus JSON (default: benchmarks/queries.json)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    selected = [b.strip() for b in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    languages = [l.strip() for l in args.languages.split(",")] if args.languages else None
+    queries = load_queries(args.queries, languages)
+
+    runners = {
+        "detector": bench_detector,
+        "translator": bench_translator,
+        "search": bench_search,
+        "context": bench_context,
+    }
+    results = {}
+    for name in selected:
+        print(f"Running {name}...", flush=True)
+        try:
+            results[name] = runners[name](queries, args)
+        except Exception as e:
+            logger.error(f"Benchmark {name} failed: {e}", exc_info=True)
+            results[name] = {"error": str(e)}
+
+    print()
+    rows = {
+        f"{name}.{case}": summary
+        for name, cases in results.items()
+        for case, summary in cases.items()
+        if isinstance(summary, dict) and "count" in summary
+    }
+    print_table(rows)
+    for name, cases in results.items():
+        if "error" in cases:
+            print(f"{name}: failed ({cases['error']})")
+
+    if args.output:
+        write_results(args.output, "micro", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
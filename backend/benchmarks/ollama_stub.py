@@ -0,0 +1,157 @@
+"""
+Minimal Ollama stand-in for load tests
+
+Answers /api/generate (streaming and not) and /api/tags with a canned
+answer, taking as long as a real model would: prompt evaluation at
+--prompt-tps tokens/s, then --tokens tokens at --tps tokens/s, with at most
+--parallel generations at once (like OLLAMA_NUM_PARALLEL; others wait).
+Reports the same token counts and durations as Ollama, so the API's metrics
+and `usage` fields are exercised. This isolates the backend's own overhead
+from LLM speed. --error-rate answers a share of requests with HTTP 500, to
+exercise retries and ejection with several stubs behind OLLAMA_BASE_URLS.
+
+Usage:
+    python benchmarks/ollama_stub.py --port 11434 --tps 20 --tokens 120 --parallel 4
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "The National Pension System (NPS) is a voluntary, long-term retirement savings scheme regulated by PFRDA. "
+    "Subscribers contribute regularly to a Tier I account during their working life; at 60 they may withdraw up "
+    "to 60% of the corpus tax-free and must use the rest to buy an annuity that pays a monthly pension. "
+    "Contributions qualify for deductions under Section 80CCD(1) and an additional Rs 50,000 under Section "
+    "80CCD(1B). A Tier II account is an optional, flexible savings account without lock-in."
+)
+
+
+class StubState:
+    def __init__(self, args):
+        self.args = args
+        self.slots = threading.BoundedSemaphore(args.parallel)
+        self.words = ANSWER.split(" ")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: StubState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail(self) -> bool:
+        if random.random() >= self.state.args.error_rate:
+            return False
+        self._json({"error": "stub failure"}, status=500)
+        return True
+
+    def do_GET(self):
+        if self._fail():
+            return
+        if self.path.startswith("/api/tags"):
+            self._json({"models": [{"name": f"{self.state.args.model}:latest", "model": f"{self.state.args.model}:latest"}]})
+        elif self.path.startswith("/api/version"):
+            self._json({"version": "0.0.0-stub"})
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self._fail():
+            return
+        if not self.path.startswith("/api/generate"):
+            self._json({"error": "not found"}, status=404)
+            return
+
+        args = self.state.args
+        options = request.get("options") or {}
+        prompt_tokens = max(1, len(request.get("prompt", "")) // 4)
+        completion_tokens = min(args.tokens, options.get("num_predict") or args.tokens)
+        jitter = 1 + random.uniform(-args.jitter, args.jitter)
+        token_seconds = jitter / args.tps
+
+        with self.state.slots:
+            t_start = time.perf_counter()
+            prompt_seconds = prompt_tokens / args.prompt_tps * jitter
+            time.sleep(prompt_seconds)
+            words = [self.state.words[i % len(self.state.words)] for i in range(completion_tokens)]
+
+            if request.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    time.sleep(token_seconds)
+                    self._chunk({"model": args.model, "response": word if i == 0 else " " + word, "done": False})
+                eval_seconds = time.perf_counter() - t_start - prompt_seconds
+                self._chunk(self._final(request, prompt_tokens, completion_tokens, prompt_seconds, eval_seconds, t_start))
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            else:
+                time.sleep(token_seconds * completion_tokens)
+                eval_seconds = time.perf_counter() - t_start - prompt_seconds
+                self._json({
+                    "response": " ".join(words),
+                    **self._final(request, prompt_tokens, completion_tokens, prompt_seconds, eval_seconds, t_start),
+                })
+
+    def _chunk(self, payload):
+        line = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def _final(self, request, prompt_tokens, completion_tokens, prompt_seconds, eval_seconds, t_start):
+        return {
+            "model": request.get("model", self.state.args.model),
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": completion_tokens,
+            "eval_duration": int(eval_seconds * 1e9),
+            "load_duration": 0,
+            "total_duration": int((time.perf_counter() - t_start) * 1e9),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama stand-in with realistic generation timing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default="llama3")
+    parser.add_argument("--tps", type=float, default=20.0, help="Generated tokens per second")
+    parser.add_argument("--prompt-tps", type=float, default=400.0, help="Prompt tokens evaluated per second")
+    parser.add_argument("--tokens", type=int, default=120, help="Tokens per answer (capped by num_predict)")
+    parser.add_argument("--parallel", type=int, default=4, help="Generations served at once")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random +/- fraction applied to timings")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    Handler.state = StubState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Ollama stub on http://{args.host}:{args.port} ({args.tps} tokens/s, {args.tokens} tokens, {args.parallel} parallel)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
+import json
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.models import (
-    ChatRequest, ChatResponse, DocumentUpload, 
-    DocumentUploadResponse, HealthResponse
+    BatchChatRequest, ChatRequest, ChatResponse, DocumentUpload, 
+    DocumentUploadResponse, HealthResponse, IngestResponse, SessionResponse
 )
 from app.services.language_detector import LanguageDetector
 from app.services.translator import NLLBTranslator
 from app.services.vector_store import VectorStore
+from app.services.vector_backends import create_vector_backend
+from app.services.bm25_index import BM25Index
+from app.services.embedder import QueryEmbedder
 from app.services.llama_client import LlamaClient
 from app.services.rag_pipeline import RAGPipeline
+from app.services.executor import PipelineExecutor, PipelineOverloadedError
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.ingestion import DocumentIngestor, IngestionError, IngestionProgress, parse_ndjson_line
+from app.services.chunker import DocumentChunker
+from app.services.context_builder import ContextBuilder, load_token_counter
+from app.services.reranker import CrossEncoderReranker
+from app.services.model_loader import ModelLoader
+from app.services.inference_worker import InferenceWorkerPool, RemoteEmbedder, RemoteTranslator
+from app.services.metrics import render_metrics
+from app.services.health_monitor import HealthMonitor
+from app.services.session_store import SessionStore
 
 # Configure logging
 logging.basicConfig(
@@ -27,44 +47,333 @@ translator = None
 vector_store = None
 llama_client = None
 rag_pipeline = None
+pipeline_executor = None
+answer_cache = None
+document_ingestor = None
+model_loader = None
+startup_error = None
+llm_warmup_task = None
+health_monitor = None
+session_store = None
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Initialize services on startup and cleanup on shutdown"""
-    global language_detector, translator, vector_store, llama_client, rag_pipeline
+def _register_components(loader: ModelLoader) -> None:
+    """Register the heavy components; dependencies are resolved with loader.get()"""
+    warm = (lambda component: component.warmup()) if settings.startup_warmup_enabled else None
     
-    logger.info("Initializing services...")
+    embedder_options = dict(
+        model_name=settings.embedding_model,
+        cache_size=settings.embedding_cache_size,
+        cache_dir=settings.embedding_cache_dir or None,
+        batch_size=settings.embedding_batch_size,
+        batch_wait_ms=settings.embedding_batch_wait_ms
+    )
     
-    try:
-        # Initialize services
-        language_detector = LanguageDetector(settings.supported_languages_list)
-        translator = NLLBTranslator(settings.nllb_model)
-        vector_store = VectorStore(
+    def translator_options() -> dict:
+        # Read when the translator is built: serve.py sets each worker's thread share after registration
+        return dict(
+            model_name=settings.nllb_model,
+            backend=settings.translator_backend,
+            num_beams=settings.translator_num_beams,
+            num_threads=settings.translator_num_threads,
+            model_dir=settings.translator_model_dir or None,
+            cache_size=settings.translation_cache_size,
+            batch_size=settings.translation_batch_size,
+            batch_wait_ms=settings.translation_batch_wait_ms
+        )
+    
+    def create_embedder():
+        if not settings.inference_workers_enabled:
+            return QueryEmbedder(**embedder_options)
+        return RemoteEmbedder(_start_inference_workers(
+            "embedder", embedder_options, settings.inference_embedder_processes, settings.embedding_batch_size
+        ))
+    
+    def create_translator():
+        if not settings.inference_workers_enabled:
+            return NLLBTranslator(**translator_options())
+        options = {**translator_options(), "num_threads": settings.translator_num_threads or settings.inference_threads_per_process}
+        return RemoteTranslator(_start_inference_workers(
+            "translator", options, settings.inference_translator_processes, settings.translation_batch_size
+        ))
+    
+    loader.register("embedder", create_embedder, warmup=warm)
+    loader.register(
+        "vector_backend",
+        lambda: create_vector_backend(
+            settings.vector_db_type,
+            persist_directory=settings.chroma_persist_dir,
+            index_directory=settings.vector_index_dir,
+            collection_name="nps_documents",
+            index_dtype=settings.vector_index_dtype,
+            mmap=settings.vector_index_mmap,
+            index_type=settings.faiss_index_type,
+            nlist=settings.faiss_nlist,
+            nprobe=settings.faiss_nprobe,
+            hnsw_m=settings.faiss_hnsw_m,
+            ef_search=settings.faiss_hnsw_ef_search,
+            pq_m=settings.faiss_pq_m
+        )
+    )
+    
+    def create_vector_store() -> VectorStore:
+        vector_backend = loader.get("vector_backend")
+        keyword_index = None
+        if settings.hybrid_search_enabled:
+            # Persisted next to the vector data
+            keyword_index = BM25Index(
+                os.path.join(vector_backend.directory, "nps_documents.bm25.jsonl"),
+                k1=settings.bm25_k1,
+                b=settings.bm25_b
+            )
+        return VectorStore(
             embedding_model=settings.embedding_model,
-            persist_directory=settings.chroma_persist_dir
+            persist_directory=settings.chroma_persist_dir,
+            embedder=loader.get("embedder"),
+            backend=vector_backend,
+            keyword_index=keyword_index,
+            rrf_k=settings.rrf_k,
+            bm25_weight=settings.bm25_weight,
+            hybrid_candidates=settings.hybrid_candidates
         )
-        llama_client = LlamaClient(
-            base_url=settings.ollama_base_url,
-            model=settings.ollama_model
+    
+    loader.register("vector_store", create_vector_store, warmup=warm)
+    loader.register("translator", create_translator, warmup=warm, lazy=settings.translator_lazy_load)
+    # Without a tokenizer matching the LLM, the embedding model's subword tokenizer
+    # is closer to its count than the word-based estimate
+    loader.register(
+        "context_tokenizer",
+        lambda: load_token_counter(settings.context_tokenizer or settings.embedding_model)
+    )
+    if settings.reranker_enabled:
+        loader.register(
+            "reranker",
+            lambda: CrossEncoderReranker(
+                model_name=settings.reranker_model,
+                batch_size=settings.reranker_batch_size,
+                cache_size=settings.reranker_cache_size
+            ),
+            warmup=warm,
+            required=False
         )
-        rag_pipeline = RAGPipeline(
-            language_detector=language_detector,
-            translator=translator,
-            vector_store=vector_store,
-            llama_client=llama_client
+
+
+def _start_inference_workers(kind: str, options: dict, processes: int, concurrency: int) -> InferenceWorkerPool:
+    """Start the worker processes running the translator or embedder"""
+    return InferenceWorkerPool(
+        kind,
+        options,
+        processes=processes,
+        threads_per_process=settings.inference_threads_per_process,
+        concurrency=concurrency,
+        max_pending=settings.inference_max_pending,
+        timeout=settings.inference_timeout,
+        warmup=settings.startup_warmup_enabled,
+        log_level=settings.log_level
+    )
+
+
+def _initialize_services() -> None:
+    """Load the models in parallel, then wire the services together (blocking)"""
+    global language_detector, translator, vector_store, llama_client, rag_pipeline, pipeline_executor, answer_cache
+    global document_ingestor, health_monitor, session_store
+    
+    model_loader.load_all()
+    
+    language_detector = LanguageDetector(settings.supported_languages_list)
+    # A lazy translator is only loaded once a non-English query needs it
+    translator = model_loader.proxy("translator") if settings.translator_lazy_load else model_loader.get("translator")
+    vector_store = model_loader.get("vector_store")
+    embedder = vector_store.embedder
+    
+    chunker = None
+    if settings.chunking_enabled:
+        # Leave room for the embedding model's [CLS]/[SEP] tokens
+        max_tokens = min(settings.chunk_max_tokens, (embedder.max_tokens or settings.chunk_max_tokens + 2) - 2)
+        chunker = DocumentChunker(
+            max_tokens=max_tokens,
+            overlap_tokens=min(settings.chunk_overlap_tokens, max_tokens // 2),
+            token_counter=embedder.count_tokens
         )
-        
-        logger.info("All services initialized successfully")
-        
+    document_ingestor = DocumentIngestor(
+        vector_store,
+        batch_size=settings.ingest_batch_size,
+        chunker=chunker
+    )
+    reference_text = ""
+    if settings.llm_prompt_prefix_file:
+        with open(settings.llm_prompt_prefix_file, encoding="utf-8") as f:
+            reference_text = f.read()
+    llama_client = LlamaClient(
+        base_url=settings.ollama_base_urls_list,
+        model=settings.ollama_model,
+        timeout=settings.ollama_timeout,
+        connect_timeout=settings.ollama_connect_timeout,
+        max_retries=settings.ollama_max_retries,
+        retry_backoff=settings.ollama_retry_backoff,
+        max_concurrency=settings.ollama_max_concurrency,
+        max_connections=settings.ollama_max_connections,
+        keepalive_expiry=settings.ollama_keepalive_expiry,
+        context_builder=ContextBuilder(
+            token_budget=settings.context_token_budget,
+            token_counter=model_loader.get("context_tokenizer"),
+            dedup_threshold=settings.context_dedup_threshold
+        ),
+        keep_alive=settings.ollama_keep_alive,
+        num_ctx=settings.ollama_num_ctx,
+        num_thread=settings.ollama_num_thread,
+        reference_text=reference_text,
+        hedge_after=settings.ollama_hedge_after,
+        eject_after_failures=settings.ollama_eject_after_failures,
+        eject_seconds=settings.ollama_eject_seconds
+    )
+    pipeline_executor = PipelineExecutor(
+        max_workers=settings.pipeline_max_workers,
+        max_queue=settings.pipeline_max_queue,
+        queue_timeout=settings.pipeline_queue_timeout
+    )
+    if settings.answer_cache_enabled:
+        answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.answer_cache_similarity,
+            max_entries=settings.answer_cache_max_entries,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
+    if settings.sessions_enabled:
+        session_store = SessionStore(
+            max_sessions=settings.session_max_sessions,
+            ttl_seconds=settings.session_ttl_seconds,
+            max_turns=settings.session_max_turns,
+            path=settings.session_store_path or None
+        )
+    # An optional component that failed to load is simply left out
+    reranker = model_loader.peek("reranker")
+    rag_pipeline = RAGPipeline(
+        language_detector=language_detector,
+        translator=translator,
+        vector_store=vector_store,
+        llama_client=llama_client,
+        executor=pipeline_executor,
+        answer_cache=answer_cache,
+        reranker=reranker,
+        rerank_candidates=settings.rerank_candidates,
+        rerank_top_n=settings.rerank_top_n,
+        session_store=session_store,
+        followup_fetch_k=settings.session_followup_fetch_k
+    )
+    
+    health_monitor = HealthMonitor(
+        interval=settings.health_check_interval,
+        timeout=settings.health_check_timeout
+    )
+    health_monitor.register("ollama", llama_client.check_health)
+    health_monitor.register("vector_store", lambda: run_in_threadpool(vector_store.get_collection_count))
+    
+    logger.info("All services initialized successfully")
+
+
+def preload_models() -> None:
+    """
+    Load the fork-safe models in this process before worker processes are forked
+    
+    Used by serve.py: the PyTorch models (embedding, NLLB on the torch backends,
+    reranker) and the prompt tokenizer are loaded once, and their weights are
+    shared copy-on-write by every worker. The vector index (memory-mapped and
+    shared through the page cache anyway) and ONNX/CTranslate2 translators own
+    native thread pools that do not survive fork(), so each worker loads those
+    itself. Warm-up also runs in the workers.
+    """
+    global model_loader
+    
+    model_loader = ModelLoader(max_workers=settings.startup_load_workers)
+    _register_components(model_loader)
+    
+    names = ["context_tokenizer"]
+    # Inference worker processes are started by each web worker instead
+    if not settings.inference_workers_enabled:
+        names.append("embedder")
+        if settings.translator_backend in ("torch", "torch_int8") and not settings.translator_lazy_load:
+            names.append("translator")
+    if settings.reranker_enabled:
+        names.append("reranker")
+    model_loader.load(names, warmup=False)
+
+
+def _start_background_tasks() -> None:
+    """
+    Start the health probes, and load the LLM and its prompt prefixes in the
+    background (Ollama may still be starting)
+    """
+    global llm_warmup_task
+    health_monitor.start()
+    if settings.startup_warmup_enabled and settings.ollama_warmup_languages_list:
+        languages = [language_detector.get_language_name(code) for code in settings.ollama_warmup_languages_list]
+        llm_warmup_task = asyncio.create_task(llama_client.warmup(languages))
+
+
+async def _initialize_in_background() -> None:
+    global startup_error
+    try:
+        await asyncio.to_thread(_initialize_services)
     except Exception as e:
+        startup_error = str(e)
         logger.error(f"Failed to initialize services: {e}", exc_info=True)
-        raise
+        return
+    _start_background_tasks()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup and cleanup on shutdown"""
+    global model_loader
+    
+    logger.info("Initializing services...")
+    
+    # serve.py preloads the models before forking this worker
+    if model_loader is None:
+        model_loader = ModelLoader(max_workers=settings.startup_load_workers)
+        _register_components(model_loader)
+    
+    startup_task = None
+    if settings.background_model_loading:
+        # Accept traffic right away; /ready turns green once the models are loaded
+        startup_task = asyncio.create_task(_initialize_in_background())
+    else:
+        try:
+            await asyncio.to_thread(_initialize_services)
+        except Exception as e:
+            logger.error(f"Failed to initialize services: {e}", exc_info=True)
+            raise
+        _start_background_tasks()
     
     yield
     
     # Cleanup (if needed)
     logger.info("Shutting down services...")
+    if startup_task is not None and not startup_task.done():
+        await startup_task
+    if llm_warmup_task is not None and not llm_warmup_task.done():
+        llm_warmup_task.cancel()
+    if health_monitor is not None:
+        await health_monitor.stop()
+    if llama_client is not None:
+        await llama_client.close()
+    if session_store is not None:
+        session_store.close()
+    loaded_translator = model_loader.peek("translator")
+    if loaded_translator is not None:
+        loaded_translator.close()
+    loaded_embedder = model_loader.peek("embedder")
+    if loaded_embedder is not None:
+        loaded_embedder.close()
+    if pipeline_executor is not None:
+        pipeline_executor.shutdown(wait=False)
+
+
+def require_services() -> None:
+    """Dependency rejecting requests (503) until startup has finished"""
+    if rag_pipeline is None:
+        detail = f"Service failed to start: {startup_error}" if startup_error else "Service is starting, models are loading"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
 
 
 # Create FastAPI app
@@ -95,32 +404,69 @@ async def root():
     }
 
 
-@app.get("/health", response_model=HealthResponse, tags=["Health"])
+@app.get("/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the process is up (fails only if startup failed for good)"""
+    if startup_error:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": startup_error})
+    return {"status": "alive"}
+
+
+@app.get("/ready", tags=["Health"])
+async def readiness():
+    """Readiness probe: 200 once every required model is loaded and warmed up, with per-component state"""
+    ready = rag_pipeline is not None
+    content = {
+        "status": "ready" if ready else ("failed" if startup_error else "starting"),
+        "components": model_loader.status(),
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms and LLM token counts and throughput"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health", response_model=HealthResponse, tags=["Health"], dependencies=[Depends(require_services)])
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, answered from the last background probes of Ollama and the vector store"""
     try:
-        ollama_healthy = llama_client.check_health()
-        doc_count = vector_store.get_collection_count()
+        # Only the first request after startup waits for a probe round
+        if not health_monitor.has_run:
+            await health_monitor.refresh()
+        components = health_monitor.snapshot()
+        ollama_healthy = components["ollama"]["healthy"]
         
         return HealthResponse(
-            status="healthy" if ollama_healthy else "degraded",
+            status="healthy" if all(c["healthy"] for c in components.values()) else "degraded",
             ollama_connected=ollama_healthy,
-            vector_db_documents=doc_count,
-            supported_languages=settings.supported_languages_list
+            vector_db_documents=health_monitor.value("vector_store", 0),
+            supported_languages=settings.supported_languages_list,
+            components=components
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
+@app.get("/llm/stats", tags=["Health"], dependencies=[Depends(require_services)])
+async def get_llm_stats():
+    """Per-server load, decoding speed and health of the Ollama backends"""
+    return llama_client.stats()
+
+
+@app.post("/chat", response_model=ChatResponse, tags=["Chat"], dependencies=[Depends(require_services)])
 async def chat(request: ChatRequest):
     """
     Process a chat query with multilingual RAG pipeline
     
     The pipeline:
     1. Detects user language (or uses forced language)
-    2. Translates query to English
+    2. Translates query to English (and, within a session, makes a
+       follow-up self-contained using the previous question)
     3. Retrieves relevant documents from vector DB
     4. Generates response using Llama 3
     5. Translates response back to user's language
@@ -128,41 +474,195 @@ async def chat(request: ChatRequest):
     try:
         logger.info(f"Received chat request: {request.query[:100]}...")
         
-        result = rag_pipeline.process_query(
-            query=request.query,
-            top_k=request.top_k,
-            temperature=request.temperature,
-            force_language=request.language
-        )
+        async with pipeline_executor.admit():
+            result = await rag_pipeline.process_query(
+                query=request.query,
+                top_k=request.top_k,
+                temperature=request.temperature,
+                force_language=request.language,
+                session_id=request.session_id
+            )
         
+        if not request.include_timing:
+            result.pop("timing", None)
+            result.pop("usage", None)
         return ChatResponse(**result)
         
+    except PipelineOverloadedError as e:
+        logger.warning(f"Chat request rejected: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Chat endpoint error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/documents", response_model=DocumentUploadResponse, tags=["Documents"])
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that gives back its pipeline admission slot when it ends
+    
+    The slot is taken before the response is returned (so overload is still
+    a plain 429), and released here rather than in the body generator: a
+    generator that never starts, e.g. because the client disconnected
+    first, never runs its finally block.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            pipeline_executor.release()
+
+
+def _sse_event(event: str, payload: dict) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream", tags=["Chat"], dependencies=[Depends(require_services)])
+async def chat_stream(request: ChatRequest):
+    """
+    Process a chat query and stream the answer as Server-Sent Events
+    
+    Frames are sent in this order:
+    1. `metadata`: detected language, English query and sources
+    2. `token`: one frame per generated text fragment
+    3. `done`: per-stage timings, including time to first token, and LLM token usage
+    
+    An `error` frame replaces the rest of the stream if the pipeline fails.
+    """
+    logger.info(f"Received streaming chat request: {request.query[:100]}...")
+    
+    try:
+        pipeline_executor.acquire()
+    except PipelineOverloadedError as e:
+        logger.warning(f"Streaming chat request rejected: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    async def event_stream():
+        try:
+            async for event, payload in rag_pipeline.stream_query(
+                query=request.query,
+                top_k=request.top_k,
+                temperature=request.temperature,
+                force_language=request.language,
+                session_id=request.session_id
+            ):
+                yield _sse_event(event, payload)
+        except PipelineOverloadedError as e:
+            logger.warning(f"Streaming chat request dropped: {e}")
+            yield _sse_event("error", {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}", exc_info=True)
+            yield _sse_event("error", {"error": str(e)})
+    
+    return AdmittedStreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/chat/batch", tags=["Chat"], dependencies=[Depends(require_services)])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Answer many independent queries and stream the results as NDJSON
+    
+    Meant for offline evaluation and bulk FAQ generation. Queries are
+    translated in one model call per language, embedded in one pass and
+    searched as one query matrix; LLM generations run with bounded
+    parallelism. Each line is one result (the `/chat` response fields plus
+    `index`, the query's position, and its `id`), in completion order. A
+    final line `{"done": true, ...}` summarizes the batch.
+    """
+    if len(request.queries) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.queries)} queries exceeds the limit of {settings.batch_max_queries}"
+        )
+    logger.info(f"Received batch chat request with {len(request.queries)} queries")
+    
+    # The whole batch holds one request slot
+    try:
+        pipeline_executor.acquire()
+    except PipelineOverloadedError as e:
+        logger.warning(f"Batch chat request rejected: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    max_parallel = min(request.max_parallel or settings.batch_max_parallel, settings.batch_max_parallel)
+    
+    async def result_lines():
+        start_time = time.time()
+        errors = 0
+        try:
+            async for result in rag_pipeline.process_batch(
+                [(item.query, item.language) for item in request.queries],
+                top_k=request.top_k,
+                temperature=request.temperature,
+                max_parallel=max_parallel,
+                chunk_size=settings.batch_chunk_size
+            ):
+                result["id"] = request.queries[result["index"]].id
+                if not request.include_timing:
+                    result.pop("timing", None)
+                    result.pop("usage", None)
+                errors += "error" in result
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            yield json.dumps({
+                "done": True,
+                "queries": len(request.queries),
+                "errors": errors,
+                "elapsed_seconds": round(time.time() - start_time, 3)
+            }) + "\n"
+        except Exception as e:
+            logger.error(f"Batch chat error: {e}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    return AdmittedStreamingResponse(
+        result_lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/documents", response_model=DocumentUploadResponse, tags=["Documents"], dependencies=[Depends(require_services)])
 async def upload_documents(request: DocumentUpload):
     """
     Upload documents to the vector database
     
-    Documents should be in English for best results.
+    Documents should be in English for best results. Long documents are
+    split into chunks before they are embedded.
     """
     try:
         logger.info(f"Uploading {len(request.documents)} documents")
         
-        vector_store.add_documents(
-            documents=request.documents,
-            metadatas=request.metadatas,
-            ids=request.ids
-        )
+        records = [
+            {
+                "text": document,
+                "metadata": request.metadatas[i] if request.metadatas else None,
+                "id": request.ids[i] if request.ids else None,
+            }
+            for i, document in enumerate(request.documents)
+        ]
+        summary = await run_in_threadpool(document_ingestor.ingest, records)
         
-        total_docs = vector_store.get_collection_count()
+        total_docs = await run_in_threadpool(vector_store.get_collection_count)
         
         return DocumentUploadResponse(
             success=True,
             documents_added=len(request.documents),
+            chunks_added=summary["chunks_written"],
             total_documents=total_docs,
             message=f"Successfully added {len(request.documents)} documents"
         )
@@ -172,18 +672,126 @@ async def upload_documents(request: DocumentUpload):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/documents/count", tags=["Documents"])
+@app.post("/documents/ingest", response_model=IngestResponse, tags=["Documents"], dependencies=[Depends(require_services)])
+async def ingest_documents(request: Request):
+    """
+    Stream documents into the vector database as NDJSON
+    
+    Send one JSON object per line: {"text": "...", "metadata": {...}, "id": "..."}
+    (metadata and id are optional). The body is read incrementally, chunked and
+    written in batches of about INGEST_BATCH_SIZE chunks, so uploads of any size
+    use bounded memory.
+    Documents without an id get a content hash, so re-sending a file is
+    idempotent. On a malformed line the request fails with 400; batches before
+    it have already been written.
+    """
+    ingestor = document_ingestor
+    progress = IngestionProgress()
+    batch = []
+    buffer = b""
+    line_number = 0
+    
+    async def flush():
+        nonlocal batch
+        if batch:
+            await run_in_threadpool(ingestor.write_batch, batch, progress)
+            batch = []
+    
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                record = parse_ndjson_line(line.decode("utf-8"), line_number)
+                if record is not None:
+                    batch.extend(ingestor.prepare(record, progress))
+                if len(batch) >= ingestor.batch_size:
+                    await flush()
+        
+        record = parse_ndjson_line(buffer.decode("utf-8"), line_number + 1)
+        if record is not None:
+            batch.extend(ingestor.prepare(record, progress))
+        await flush()
+        
+        total_docs = await run_in_threadpool(vector_store.get_collection_count)
+        summary = progress.to_dict()
+        logger.info(f"NDJSON ingestion finished: {summary}")
+        
+        return IngestResponse(success=True, total_documents=total_docs, **summary)
+    
+    except (IngestionError, UnicodeDecodeError) as e:
+        logger.warning(f"Rejected NDJSON ingestion after {progress.written} documents: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Document ingestion error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/documents/count", tags=["Documents"], dependencies=[Depends(require_services)])
 async def get_document_count():
     """Get the total number of documents in the vector database"""
     try:
-        count = vector_store.get_collection_count()
+        count = await run_in_threadpool(vector_store.get_collection_count)
         return {"total_documents": count}
     except Exception as e:
         logger.error(f"Error getting document count: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/cache/stats", tags=["Cache"], dependencies=[Depends(require_services)])
+def get_cache_stats():
+    """Get hit/miss and batching counters for the answer, translation, embedding and rerank caches"""
+    # A plain def runs in the threadpool: with inference workers, the translator
+    # and embedder stats are pipe round trips queued behind inference work
+    reranker = rag_pipeline.reranker
+    return {
+        "answer_cache": (
+            {"enabled": True, **answer_cache.stats()} if answer_cache is not None else {"enabled": False}
+        ),
+        "translation": (
+            translator.stats() if model_loader.peek("translator") is not None else {"loaded": False}
+        ),
+        "embedding": vector_store.embedder.stats(),
+        "rerank": {"enabled": True, **reranker.stats()} if reranker is not None else {"enabled": False},
+        "sessions": (
+            {"enabled": True, **session_store.stats()} if session_store is not None else {"enabled": False}
+        ),
+    }
+
+
+def require_sessions() -> None:
+    """Dependency rejecting session requests when sessions are disabled"""
+    if session_store is None:
+        raise HTTPException(status_code=404, detail="Conversation sessions are disabled")
+
+
+@app.post("/sessions", response_model=SessionResponse, tags=["Sessions"], dependencies=[Depends(require_services), Depends(require_sessions)])
+async def create_session():
+    """Start a conversation; pass its session_id to /chat and /chat/stream"""
+    session = await run_in_threadpool(session_store.create)
+    return SessionResponse(**session.to_dict())
+
+
+@app.get("/sessions/{session_id}", response_model=SessionResponse, tags=["Sessions"], dependencies=[Depends(require_services), Depends(require_sessions)])
+async def get_session(session_id: str):
+    """Get a conversation's language and recent turns"""
+    session = await run_in_threadpool(session_store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return SessionResponse(**session.to_dict())
+
+
+@app.delete("/sessions/{session_id}", tags=["Sessions"], dependencies=[Depends(require_services), Depends(require_sessions)])
+async def delete_session(session_id: str):
+    """Forget a conversation"""
+    if not await run_in_threadpool(session_store.delete, session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"deleted": session_id}
+
+
 if __name__ == "__main__":
+    # Development server; use serve.py in production
     import uvicorn
     uvicorn.run(
         "main:app",
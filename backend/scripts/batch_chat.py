@@ -0,0 +1,148 @@
+"""
+Answer a file of queries through the /chat/batch endpoint
+
+Reads .ndjson/.jsonl files (one {"query", "id", "language"} object per
+line), .json files (a list of such objects) or .txt files (one query per
+line), or NDJSON from stdin with '-'. Queries without an id get their
+position in the input. Queries are sent in requests of --batch-size, and
+the answers are written as NDJSON in the order they complete (see
+/chat/batch).
+
+Usage:
+    python scripts/batch_chat.py faqs.ndjson --output answers.ndjson
+    cat faqs.ndjson | python scripts/batch_chat.py - --max-parallel 8 > answers.ndjson
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+from typing import Dict, Iterator, List
+
+import httpx
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+
+
+def iter_queries(path: str) -> Iterator[Dict]:
+    """Yield {"query", "id", "language"} records from one input file ('-' for stdin)"""
+    if path == "-":
+        lines = sys.stdin
+    elif path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    else:
+        lines = open(path, encoding="utf-8")
+
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".txt"):
+                yield {"query": line}
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def load_queries(paths: List[str]) -> List[Dict]:
+    queries = []
+    for path in paths:
+        for record in iter_queries(path):
+            if not isinstance(record, dict) or not record.get("query"):
+                raise ValueError(f"{path}: every record needs a 'query'")
+            queries.append({
+                "id": str(record.get("id", len(queries))),
+                "query": record["query"],
+                "language": record.get("language"),
+            })
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a file of queries through /chat/batch")
+    parser.add_argument("paths", nargs="+", help="Query files (.ndjson, .jsonl, .json, .txt), or '-' for NDJSON on stdin")
+    parser.add_argument("--url", default=f"http://localhost:{settings.api_port}", help="API base URL")
+    parser.add_argument("--output", help="Write answers as NDJSON to this file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=settings.batch_max_queries,
+                        help="Queries per request")
+    parser.add_argument("--max-parallel", type=int, help="Concurrent LLM generations (capped by the server)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--include-timing", action="store_true", help="Include per-stage timings and token usage")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the next result")
+    args = parser.parse_args()
+
+    try:
+        queries = load_queries(args.paths)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.time()
+    answered = errors = 0
+    try:
+        with httpx.Client(base_url=args.url, timeout=args.timeout) as client:
+            for start in range(0, len(queries), args.batch_size):
+                payload = {
+                    "queries": queries[start:start + args.batch_size],
+                    "top_k": args.top_k,
+                    "temperature": args.temperature,
+                    "max_parallel": args.max_parallel,
+                    "include_timing": args.include_timing,
+                }
+                with client.stream("POST", "/chat/batch", json=payload) as response:
+                    if response.status_code != 200:
+                        response.read()
+                        raise httpx.HTTPStatusError(
+                            f"{response.status_code}: {response.text}", request=response.request, response=response
+                        )
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        result = json.loads(line)
+                        if result.get("done"):
+                            continue
+                        if "index" not in result:
+                            raise RuntimeError(f"Batch failed: {result.get('error')}")
+                        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        answered += 1
+                        errors += "error" in result
+                        print(
+                            f"\r{answered}/{len(queries)} answered, {errors} errors, "
+                            f"{answered / (time.time() - started):.2f} queries/s",
+                            end="",
+                            file=sys.stderr,
+                            flush=True
+                        )
+    except (httpx.HTTPError, RuntimeError) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(file=sys.stderr)
+    print(
+        json.dumps({"queries": len(queries), "answered": answered, "errors": errors,
+                    "elapsed_seconds": round(time.time() - started, 1)}, indent=2),
+        file=sys.stderr
+    )
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
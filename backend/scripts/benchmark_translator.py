@@ -0,0 +1,187 @@
+"""
+Benchmark the NLLB translator backends on a fixed multilingual NPS query set
+
+Each backend runs in its own subprocess so that load time and memory are
+measured in isolation. Reports per-backend load time, latency, peak RSS,
+and BLEU/chrF of each backend's output against the fp32 'torch' backend.
+
+Usage:
+    python scripts/benchmark_translator.py --backends torch,torch_int8,ctranslate2 \
+        --model-dir ctranslate2=./models/nllb-ct2-int8 --output translator_bench.json
+"""
+
+import sys
+import os
+import argparse
+import json
+import statistics
+import subprocess
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+# (text, source NLLB code, target NLLB code)
+BENCHMARK_PAIRS = [
+    # User queries -> English (the per-request path)
+    ("என்பிஎஸ் என்றால் என்ன?", "tam_Taml", "eng_Latn"),
+    ("என்பிஎஸ் கணக்கை ஆன்லைனில் எப்படி திறப்பது?", "tam_Taml", "eng_Latn"),
+    ("NPS में टैक्स बेनिफिट क्या है?", "hin_Deva", "eng_Latn"),
+    ("धारा 80CCD(1B) के तहत कितनी अतिरिक्त कटौती मिलती है?", "hin_Deva", "eng_Latn"),
+    ("ఎన్‌పిఎస్ టైర్ II ఖాతా నుండి డబ్బు ఎప్పుడు తీసుకోవచ్చు?", "tel_Telu", "eng_Latn"),
+    ("എൻപിഎസിൽ കുറഞ്ഞ വാർഷിക നിക്ഷേപം എത്രയാണ്?", "mal_Mlym", "eng_Latn"),
+    ("এনপিএস-এ ৬০ বছর বয়সে কত টাকা তোলা যায়?", "ben_Beng", "eng_Latn"),
+    ("एनपीएस खाते साठी कोणती कागदपत्रे लागतात?", "mar_Deva", "eng_Latn"),
+    ("એનપીએસમાં ફંડ મેનેજર કેવી રીતે બદલવો?", "guj_Gujr", "eng_Latn"),
+    ("ಎನ್‌ಪಿಎಸ್ ಪ್ರಾನ್ ಸಂಖ್ಯೆ ಎಂದರೇನು?", "kan_Knda", "eng_Latn"),
+    ("ਐਨਪੀਐਸ ਵਿੱਚ ਐਨੂਇਟੀ ਕੀ ਹੈ?", "pan_Guru", "eng_Latn"),
+    # English answers -> user language
+    ("You can claim an additional deduction of up to Rs 50,000 under Section 80CCD(1B).", "eng_Latn", "hin_Deva"),
+    ("At 60, you may withdraw up to 60% of the corpus tax-free; the rest buys an annuity.", "eng_Latn", "tam_Taml"),
+    ("Partial withdrawal is allowed after three years, up to 25% of your own contributions.", "eng_Latn", "tel_Telu"),
+    ("The minimum annual contribution to a Tier I account is Rs 1,000.", "eng_Latn", "ben_Beng"),
+]
+
+REFERENCE_BACKEND = "torch"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    if sys.platform == "win32":
+        # Windows has no getrusage; psutil reports the peak working set
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_backend(backend: str, model_dir: str, num_beams: int, num_threads: int, repeats: int) -> dict:
+    """Load one backend in this process and time it on the benchmark set"""
+    from app.services.translation_backends import create_translation_backend
+
+    t_load = time.perf_counter()
+    translator = create_translation_backend(
+        backend,
+        settings.nllb_model,
+        num_beams=num_beams,
+        num_threads=num_threads,
+        model_dir=model_dir or None
+    )
+    load_seconds = time.perf_counter() - t_load
+
+    # Warm-up so first-call allocation is not counted
+    translator.generate([BENCHMARK_PAIRS[0][0]], BENCHMARK_PAIRS[0][1], BENCHMARK_PAIRS[0][2], 256)
+
+    latencies = []
+    outputs = []
+    for _ in range(repeats):
+        outputs = []
+        for text, src, tgt in BENCHMARK_PAIRS:
+            t0 = time.perf_counter()
+            outputs.append(translator.generate([text], src, tgt, 256)[0])
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    return {
+        **translator.info(),
+        "load_seconds": round(load_seconds, 2),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1),
+            "p50": round(latencies[len(latencies) // 2], 1),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "outputs": outputs,
+    }
+
+
+def quality_delta(outputs: list, references: list) -> dict:
+    """BLEU and chrF of outputs against the fp32 outputs"""
+    try:
+        import sacrebleu
+    except ImportError:
+        return {"error": "pip install sacrebleu to compute BLEU/chrF"}
+
+    return {
+        "bleu_vs_fp32": round(sacrebleu.corpus_bleu(outputs, [references]).score, 2),
+        "chrf_vs_fp32": round(sacrebleu.corpus_chrf(outputs, [references]).score, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NLLB translator backends")
+    parser.add_argument("--backends", default="torch,torch_int8",
+                        help="Comma-separated backends (torch, torch_int8, onnx, ctranslate2)")
+    parser.add_argument("--model-dir", action="append", default=[],
+                        help="backend=path for exported models, e.g. ctranslate2=./models/nllb-ct2")
+    parser.add_argument("--num-beams", type=int, default=settings.translator_num_beams)
+    parser.add_argument("--num-threads", type=int, default=settings.translator_num_threads)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    model_dirs = dict(item.split("=", 1) for item in args.model_dir)
+
+    if args.worker:
+        result = run_backend(
+            args.worker, model_dirs.get(args.worker, ""), args.num_beams, args.num_threads, args.repeats
+        )
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if REFERENCE_BACKEND not in backends:
+        backends.insert(0, REFERENCE_BACKEND)
+
+    results = {}
+    for backend in backends:
+        print(f"Benchmarking '{backend}'...", flush=True)
+        cmd = [
+            sys.executable, os.path.abspath(__file__),
+            "--worker", backend,
+            "--num-beams", str(args.num_beams),
+            "--num-threads", str(args.num_threads),
+            "--repeats", str(args.repeats),
+        ]
+        for item in args.model_dir:
+            cmd += ["--model-dir", item]
+        proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
+        if proc.returncode != 0:
+            print(f"  failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'unknown error'}")
+            results[backend] = {"error": proc.stderr.strip()[-2000:]}
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    references = results.get(REFERENCE_BACKEND, {}).get("outputs")
+    print()
+    print(f"{'backend':<14}{'load s':>8}{'mean ms':>10}{'p95 ms':>10}{'RSS MB':>10}{'BLEU':>8}{'chrF':>8}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<14}  error")
+            continue
+        if references:
+            result.update(quality_delta(result["outputs"], references))
+        print(
+            f"{backend:<14}{result['load_seconds']:>8}{result['latency_ms']['mean']:>10}"
+            f"{result['latency_ms']['p95']:>10}{result['peak_rss_mb']:>10}"
+            f"{result.get('bleu_vs_fp32', '-'):>8}{result.get('chrf_vs_fp32', '-'):>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Bulk-ingest documents into the vector store
+
+Reads .txt/.md files (one document each) and .ndjson/.jsonl files (one
+{"text", "metadata", "id"} object per line), walking directories
+recursively, or NDJSON from stdin with '-'. Documents are embedded and
+written in fixed-size batches with content-hash ids, so the corpus never
+has to fit in memory and re-running the same import is idempotent.
+
+Usage:
+    python scripts/ingest_documents.py ./circulars ./faq.ndjson --batch-size 128
+    cat docs.ndjson | python scripts/ingest_documents.py -
+"""
+
+import sys
+import os
+import argparse
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.ingestion import DocumentIngestor, IngestionError, iter_files, iter_ndjson
+from init_vector_db import create_chunker, create_vector_store
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+# init_vector_db configures INFO logging on import; keep the progress line readable
+logging.getLogger().setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def print_progress(progress: dict) -> None:
+    print(
+        f"\r{progress['documents_received']} documents, {progress['chunks_written']} chunks written, "
+        f"{progress['batches']} batches, {progress['chunks_per_second']} chunks/s",
+        end="",
+        flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest documents into the vector store")
+    parser.add_argument("paths", nargs="+", help="Files or directories to ingest, or '-' for NDJSON on stdin")
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size,
+                        help="Documents embedded and written per batch")
+    args = parser.parse_args()
+
+    vector_store = create_vector_store()
+
+    records = iter_ndjson(sys.stdin) if args.paths == ["-"] else iter_files(args.paths)
+    ingestor = DocumentIngestor(vector_store, batch_size=args.batch_size, chunker=create_chunker(vector_store))
+
+    try:
+        summary = ingestor.ingest(records, progress_callback=print_progress)
+    except IngestionError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print()
+    summary["total_documents"] = vector_store.get_collection_count()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.vector_store import VectorStore
+from app.services.vector_backends import create_vector_backend
+from app.services.bm25_index import BM25Index
+from app.services.chunker import DocumentChunker
+from app.services.ingestion import DocumentIngestor
 from app.config import settings
 import logging
 
@@ -166,15 +170,60 @@ NPS_DOCUMENTS = [
 ]
 
 
+def create_vector_store() -> VectorStore:
+    """Open the vector store configured by VECTOR_DB_TYPE (and HYBRID_SEARCH_ENABLED)"""
+    backend = create_vector_backend(
+        settings.vector_db_type,
+        persist_directory=settings.chroma_persist_dir,
+        index_directory=settings.vector_index_dir,
+        collection_name="nps_documents",
+        index_dtype=settings.vector_index_dtype,
+        mmap=settings.vector_index_mmap,
+        index_type=settings.faiss_index_type,
+        nlist=settings.faiss_nlist,
+        nprobe=settings.faiss_nprobe,
+        hnsw_m=settings.faiss_hnsw_m,
+        ef_search=settings.faiss_hnsw_ef_search,
+        pq_m=settings.faiss_pq_m
+    )
+    keyword_index = None
+    if settings.hybrid_search_enabled:
+        keyword_index = BM25Index(
+            os.path.join(backend.directory, "nps_documents.bm25.jsonl"),
+            k1=settings.bm25_k1,
+            b=settings.bm25_b
+        )
+    return VectorStore(
+        embedding_model=settings.embedding_model,
+        persist_directory=settings.chroma_persist_dir,
+        backend=backend,
+        keyword_index=keyword_index,
+        rrf_k=settings.rrf_k,
+        bm25_weight=settings.bm25_weight,
+        hybrid_candidates=settings.hybrid_candidates
+    )
+
+
+def create_chunker(vector_store: VectorStore):
+    """Build the document chunker configured by CHUNK_* (None if disabled)"""
+    if not settings.chunking_enabled:
+        return None
+    embedder = vector_store.embedder
+    # Leave room for the embedding model's [CLS]/[SEP] tokens
+    max_tokens = min(settings.chunk_max_tokens, (embedder.max_tokens or settings.chunk_max_tokens + 2) - 2)
+    return DocumentChunker(
+        max_tokens=max_tokens,
+        overlap_tokens=min(settings.chunk_overlap_tokens, max_tokens // 2),
+        token_counter=embedder.count_tokens
+    )
+
+
 def initialize_vector_db():
     """Initialize vector database with NPS knowledge"""
     try:
         logger.info("Initializing Vector Store...")
         
-        vector_store = VectorStore(
-            embedding_model=settings.embedding_model,
-            persist_directory=settings.chroma_persist_dir
-        )
+        vector_store = create_vector_store()
         
         # Check if documents already exist
         existing_count = vector_store.get_collection_count()
@@ -187,11 +236,6 @@ def initialize_vector_db():
                 logger.info("Deleting existing collection...")
                 vector_store.delete_collection()
                 
-                # Recreate vector store
-                vector_store = VectorStore(
-                    embedding_model=settings.embedding_model,
-                    persist_directory=settings.chroma_persist_dir
-                )
             else:
                 logger.info("Keeping existing documents. Exiting.")
                 return
@@ -199,20 +243,20 @@ def initialize_vector_db():
         # Add documents
         logger.info(f"Adding {len(NPS_DOCUMENTS)} documents to vector store...")
         
-        # Generate IDs
-        ids = [f"nps_doc_{i}" for i in range(len(NPS_DOCUMENTS))]
-        
-        # Generate metadata
-        metadatas = [{"source": "nps_knowledge_base", "doc_id": i} for i in range(len(NPS_DOCUMENTS))]
-        
-        vector_store.add_documents(
-            documents=NPS_DOCUMENTS,
-            metadatas=metadatas,
-            ids=ids
+        # Each document is split into chunks with IDs nps_doc_{i}:{chunk}
+        records = [
+            {"text": document, "id": f"nps_doc_{i}", "metadata": {"source": "nps_knowledge_base", "doc_id": i}}
+            for i, document in enumerate(NPS_DOCUMENTS)
+        ]
+        ingestor = DocumentIngestor(
+            vector_store,
+            batch_size=settings.ingest_batch_size,
+            chunker=create_chunker(vector_store)
         )
+        ingestor.ingest(records)
         
         final_count = vector_store.get_collection_count()
-        logger.info(f"✅ Successfully initialized vector store with {final_count} documents!")
+        logger.info(f"✅ Successfully initialized vector store with {final_count} chunks!")
         
     except Exception as e:
         logger.error(f"Failed to initialize vector database: {e}", exc_info=True)
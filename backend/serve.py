@@ -0,0 +1,191 @@
+"""
+Production server: preforked uvicorn workers sharing one copy of the models
+
+The master process loads the PyTorch models once (see main.preload_models),
+binds the listening socket and forks the workers. Model weights are never
+written after loading, so the workers share them copy-on-write and memory
+grows by a few hundred MB per worker instead of by a full model set. Each
+worker gets its own share of the CPU cores for PyTorch intra-op threads, and
+the master restarts workers that die.
+
+Usage:
+    python serve.py                      # SERVE_WORKERS / SERVE_THREADS_PER_WORKER, auto-sized
+    python serve.py --workers 4 --threads-per-worker 4 --port 8000
+
+Platforms without fork() (Windows) fall back to a single uvicorn process.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+# Forked workers must not inherit busy tokenizer thread pools
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from app.config import settings
+
+logger = logging.getLogger("serve")
+
+
+def plan_workers(workers: int, threads_per_worker: int, cpus: int):
+    """
+    Split the CPU cores between workers and their intra-op threads
+
+    Args:
+        workers: Worker processes (0 = auto)
+        threads_per_worker: Intra-op threads per worker (0 = auto)
+        cpus: Available cores
+
+    Returns:
+        (workers, threads_per_worker); auto-sizing aims for 4 threads per
+        worker, which keeps single-query model latency low while scaling
+        throughput with cores
+    """
+    if workers <= 0 and threads_per_worker <= 0:
+        threads_per_worker = min(4, cpus)
+    if workers <= 0:
+        workers = max(1, cpus // threads_per_worker)
+    if threads_per_worker <= 0:
+        threads_per_worker = max(1, cpus // workers)
+    return workers, threads_per_worker
+
+
+def set_torch_threads(threads: int) -> None:
+    """Limit PyTorch intra-op threads in this process (no-op without torch)"""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def run_worker(app_module, sock: socket.socket, threads: int) -> None:
+    """Serve requests in a forked worker until it is told to stop"""
+    import uvicorn
+
+    set_torch_threads(threads)
+    # Backends loaded in the worker (ONNX/CTranslate2 translators) get the same share;
+    # main.py reads this setting when the worker builds its translator. Inference
+    # worker processes are sized by INFERENCE_THREADS_PER_PROCESS instead
+    if not settings.translator_num_threads and not settings.inference_workers_enabled:
+        settings.translator_num_threads = threads
+
+    config = uvicorn.Config(app_module.app, log_level=settings.log_level.lower(), access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with preforked workers sharing the models")
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--port", type=int, default=settings.api_port)
+    parser.add_argument("--workers", type=int, default=settings.serve_workers,
+                        help="Worker processes (0 = cores / threads per worker)")
+    parser.add_argument("--threads-per-worker", type=int, default=settings.serve_threads_per_worker,
+                        help="PyTorch intra-op threads per worker (0 = cores / workers)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    workers, threads = plan_workers(args.workers, args.threads_per_worker, os.cpu_count() or 1)
+
+    if not hasattr(os, "fork"):
+        import uvicorn
+        logger.warning("fork() is not available; serving with a single process")
+        uvicorn.run("main:app", host=args.host, port=args.port)
+        return
+
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # Samples of a previous run must not be aggregated into this one
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(metrics_dir, name))
+
+    # Load with one thread: the children must not inherit a busy OpenMP pool
+    set_torch_threads(1)
+    import main as app_module
+
+    t0 = time.perf_counter()
+    app_module.preload_models()
+    logger.info(f"Models preloaded in {time.perf_counter() - t0:.1f}s; forking {workers} workers x {threads} threads")
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Keep the garbage collector from touching (and so copying) the preloaded objects
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(app_module, sock, threads)
+            except Exception:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None:
+            continue
+        if metrics_dir:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid)
+        if stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < 5:
+            # Avoid a tight crash loop
+            time.sleep(1)
+        spawn()
+
+    sock.close()
+    logger.info("All workers stopped")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
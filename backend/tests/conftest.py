@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Tests import the app the way main.py does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ollama_stub import Handler, StubState
+
+
+@pytest.fixture
+def ollama_stub():
+    """
+    Start benchmarks/ollama_stub.py servers in this process
+
+    Returns a function taking the stub's options and returning its base URL.
+    Its ``args`` maps each URL to the running stub's options, which tests may
+    change (e.g. set ``error_rate`` to 0 to let a failing server recover).
+    """
+    servers = []
+
+    def start(
+        tps: float = 200.0,
+        tokens: int = 20,
+        parallel: int = 4,
+        prompt_tps: float = 1e6,
+        error_rate: float = 0.0
+    ) -> str:
+        args = argparse.Namespace(
+            model="llama3", tps=tps, prompt_tps=prompt_tps, tokens=tokens, parallel=parallel, jitter=0.0,
+            error_rate=error_rate
+        )
+        handler = type("StubHandler", (Handler,), {"state": StubState(args)})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        start.args[url] = args
+        return url
+
+    start.args = {}
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
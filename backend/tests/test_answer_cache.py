@@ -0,0 +1,18 @@
+import numpy as np
+
+from app.services.answer_cache import SemanticAnswerCache
+
+
+def test_answer_generated_before_an_invalidation_is_not_stored():
+    cache = SemanticAnswerCache()
+    embedding = np.ones(4, dtype=np.float32)
+
+    generation = cache.generation
+    assert cache.lookup(embedding, "en") is None
+    # The corpus changes while the answer is being generated
+    cache.invalidate()
+    cache.store(embedding, "en", {"response": "stale"}, generation=generation)
+    assert cache.lookup(embedding, "en") is None
+
+    cache.store(embedding, "en", {"response": "fresh"}, generation=cache.generation)
+    assert cache.lookup(embedding, "en") == {"response": "fresh"}
@@ -0,0 +1,69 @@
+import multiprocessing
+
+from app.services.bm25_index import BM25Index
+
+
+def _ids(index: BM25Index, query: str):
+    return sorted(doc_id for doc_id, _ in index.search(query, top_k=1000))
+
+
+def test_appends_from_two_instances_are_both_kept(tmp_path):
+    path = str(tmp_path / "bm25.log")
+    first = BM25Index(path)
+    second = BM25Index(path)  # opened before the first one writes
+
+    first.add(["a1"], ["pension fund"])
+    second.add(["b1"], ["pension scheme"])
+    first.add(["a2"], ["pension account"])
+
+    assert _ids(BM25Index(path), "pension") == ["a1", "a2", "b1"]
+    assert _ids(second, "pension") == ["a1", "a2", "b1"]
+
+
+def test_compaction_is_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / "bm25.log")
+    writer = BM25Index(path)
+    reader = BM25Index(path)
+    writer.add(["doc"], ["first version"])
+    assert _ids(reader, "first") == ["doc"]
+
+    # Rewriting one document over and over compacts the log to a single line
+    for i in range(1100):
+        writer.add(["doc"], [f"version {i}"])
+    writer.add(["other"], ["another document with a longer text than the compacted log"])
+
+    assert _ids(reader, "first") == []
+    assert _ids(reader, "version") == ["doc"]
+    assert _ids(reader, "another") == ["other"]
+
+
+def test_clear_is_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / "bm25.log")
+    writer = BM25Index(path)
+    reader = BM25Index(path)
+    writer.add(["a", "b"], ["tax saving", "tax benefit"])
+    assert _ids(reader, "tax") == ["a", "b"]
+
+    writer.clear()
+    writer.add(["c"], ["tax rebate on a much longer line of text"])
+
+    assert _ids(reader, "tax") == ["c"]
+
+
+def _add_many(path: str, prefix: str) -> None:
+    index = BM25Index(path)
+    for i in range(200):
+        index.add([f"{prefix}{i}"], [f"annuity {prefix} {i}"])
+
+
+def test_concurrent_appends_from_two_processes(tmp_path):
+    path = str(tmp_path / "bm25.log")
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_add_many, args=(path, prefix)) for prefix in ("x", "y")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert _ids(BM25Index(path), "annuity") == sorted(f"{prefix}{i}" for prefix in ("x", "y") for i in range(200))
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.executor import PipelineExecutor, PipelineOverloadedError
+
+
+def test_request_waiting_past_queue_timeout_fails_without_running():
+    executor = PipelineExecutor(max_workers=1, max_queue=4, queue_timeout=0.2)
+    unblock = threading.Event()
+    ran = []
+
+    async def scenario():
+        busy = asyncio.ensure_future(executor.run(unblock.wait, 5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(PipelineOverloadedError) as error:
+            await executor.run(ran.append, "queued")
+        waited = time.monotonic() - started
+        unblock.set()
+        assert await busy
+        return error.value, waited
+
+    error, waited = asyncio.run(scenario())
+    executor.shutdown()
+    assert error.status_code == 503
+    # Failed at the deadline, not once the busy worker freed up
+    assert waited < 1.0
+    assert ran == []
+    assert executor.stats()["timed_out"] == 1
+    assert executor.stats()["completed"] == 1
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from app.services.llama_client import LlamaClient
+
+
+def test_abandoned_stream_stops_the_ollama_generation(ollama_stub):
+    # One generation at a time, 5 s long: a second request only starts once the first one stops
+    url = ollama_stub(tps=20, tokens=100, parallel=1)
+
+    async def scenario():
+        client = LlamaClient(url, max_retries=0)
+        backend = client.router.backends[0]
+        opened = []
+        generate = backend.client.generate
+
+        async def tracked_generate(**kwargs):
+            opened.append(await generate(**kwargs))
+            return opened[-1]
+
+        backend.client.generate = tracked_generate
+        stream = client.generate_response_stream("What is NPS?", ["NPS is a pension scheme."])
+        assert await stream.__anext__()
+        # The client disconnects mid-answer
+        await stream.aclose()
+        assert backend.in_flight == 0
+        # Closed right away, not whenever the garbage collector gets to it
+        assert opened[0].ag_frame is None
+
+        started = time.monotonic()
+        answer = await client.generate_response("What is NPS?", ["NPS is a pension scheme."], max_tokens=2)
+        await client.close()
+        return answer, time.monotonic() - started
+
+    answer, waited = asyncio.run(scenario())
+    assert answer
+    assert waited < 2.0
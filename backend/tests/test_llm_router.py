@@ -0,0 +1,103 @@
+import asyncio
+
+from app.services.llama_client import ERROR_RESPONSE, LlamaClient
+from app.services.llm_router import LLMRouter, OllamaBackend
+
+CONTEXT = ["NPS is a voluntary retirement savings scheme regulated by PFRDA."]
+
+
+def assert_idle(client):
+    for backend in client.router.backends:
+        assert backend.in_flight == 0
+        assert not backend.slots.locked()
+
+
+def test_each_backend_serves_at_most_max_concurrency_requests():
+    async def scenario():
+        backend = OllamaBackend("http://127.0.0.1:9", max_concurrency=2)
+        router = LLMRouter([backend])
+        running = []
+        peak = 0
+
+        async def request(chosen):
+            nonlocal peak
+            running.append(chosen)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.05)
+            running.remove(chosen)
+            return "ok"
+
+        async def one():
+            result, chosen = await router.call(request)
+            router.release(chosen)
+            return result
+
+        results = await asyncio.gather(*(one() for _ in range(6)))
+        await router.close()
+        return results, peak, backend.in_flight
+
+    results, peak, in_flight = asyncio.run(scenario())
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert in_flight == 0
+
+
+def test_slow_first_token_is_hedged_and_the_slow_request_cancelled(ollama_stub):
+    # The slow server takes seconds to evaluate the prompt; the healthy one answers at once
+    slow_url = ollama_stub(prompt_tps=20)
+    healthy_url = ollama_stub()
+
+    async def scenario():
+        client = LlamaClient([slow_url, healthy_url], max_retries=0, max_concurrency=1, hedge_after=0.2)
+        slow, healthy = client.router.backends
+        # Measured as the faster server, so the request goes there first
+        slow.tokens_per_second, healthy.tokens_per_second = 1000.0, 1.0
+        answer = await client.generate_response("What is NPS?", CONTEXT, max_tokens=5)
+        try:
+            return answer, client.stats(), slow.requests, healthy.hedges_won
+        finally:
+            assert_idle(client)
+            await client.close()
+
+    answer, stats, slow_requests, hedges_won = asyncio.run(scenario())
+    assert answer != ERROR_RESPONSE
+    assert slow_requests == 1
+    assert hedges_won == 1
+    assert stats["hedged_requests"] == 1
+    assert [b["in_flight"] for b in stats["backends"]] == [0, 0]
+
+
+def test_failing_server_is_ejected_and_readmitted_once_it_recovers(ollama_stub):
+    failing_url = ollama_stub(error_rate=1.0)
+    healthy_url = ollama_stub()
+
+    async def scenario():
+        client = LlamaClient(
+            [failing_url, healthy_url], max_retries=1, retry_backoff=0.01, eject_after_failures=2, eject_seconds=60
+        )
+        failing, healthy = client.router.backends
+        failing.tokens_per_second, healthy.tokens_per_second = 1000.0, 1.0
+
+        # Fails on the preferred server, succeeds on the retry elsewhere
+        assert await client.generate_response("What is NPS?", CONTEXT, max_tokens=5) != ERROR_RESPONSE
+        assert failing.consecutive_failures == 1
+        assert not failing.is_ejected()
+        assert_idle(client)
+
+        # The failing probe is the second failure in a row
+        assert await client.check_health()
+        assert failing.is_ejected()
+        assert all(client.router.pick() is healthy for _ in range(20))
+
+        # A passing probe puts it back before the ejection would end
+        ollama_stub.args[failing_url].error_rate = 0.0
+        assert await client.check_health()
+        assert not failing.is_ejected()
+        requests = failing.requests
+        assert await client.generate_response("What is NPS?", CONTEXT, max_tokens=5) != ERROR_RESPONSE
+        assert failing.requests == requests + 1
+        assert failing.consecutive_failures == 0
+        assert_idle(client)
+        await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services import rag_pipeline
+from app.services.rag_pipeline import RAGPipeline
+
+
+def _pipeline() -> RAGPipeline:
+    # Only the batching logic runs: preparation and generation are replaced below
+    pipeline = RAGPipeline.__new__(RAGPipeline)
+    pipeline.executor = None
+    pipeline._prepare_batch = lambda queries, languages, top_k: (
+        [{"user_language": "en", "english_query": query} for query in queries],
+        {"translation": 0.0},
+    )
+    return pipeline
+
+
+def _collect(pipeline: RAGPipeline, count: int):
+    async def scenario():
+        queries = [(f"question {i}", None) for i in range(count)]
+        return [result async for result in pipeline.process_batch(queries, chunk_size=2)]
+
+    return asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+
+
+def test_batch_ends_when_preparation_fails_outside_a_chunk(monkeypatch):
+    def broken_stages(timing):
+        raise RuntimeError("metrics unavailable")
+
+    monkeypatch.setattr(rag_pipeline, "observe_stages", broken_stages)
+    results = _collect(_pipeline(), 5)
+    assert sorted(result["index"] for result in results) == list(range(5))
+    assert all(result["error"] == "metrics unavailable" for result in results)
+
+
+def test_batch_ends_when_preparation_is_cancelled():
+    pipeline = _pipeline()
+
+    async def cancelled(func, *args):
+        raise asyncio.CancelledError()
+
+    pipeline._run_blocking = cancelled
+    results = _collect(pipeline, 3)
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    assert all("error" in result for result in results)
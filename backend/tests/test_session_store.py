@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.session_store import SessionStore, is_follow_up, rewrite_follow_up
+
+
+PREVIOUS = "What is the lock-in period of NPS Tier I?"
+
+
+@pytest.mark.parametrize("query", [
+    "What about Tier II?",
+    "How about for government employees?",
+    "And the lock-in period?",
+    "Is it taxable?",
+    "Can they withdraw early?",
+    "Can I withdraw from it?",
+    "Why is that?",
+    "Is the same true for Tier II?",
+    "Why?",
+    "Tell me more",
+    "Tier I lock-in?",
+])
+def test_follow_ups(query):
+    assert is_follow_up(query, PREVIOUS)
+
+
+@pytest.mark.parametrize("query", [
+    "Can I withdraw from NPS after 3 years?",
+    "How much tax can I save under 80CCD(1B)?",
+    "How long is the lock-in period for Tier I?",
+    "What documents are needed to open this account?",
+    "Which fund manager has the best returns?",
+    "What is the minimum contribution for Tier I?",
+    "What is NPS and how does it work?",
+    "Is it possible to open NPS online?",
+    "Can I withdraw from NPS and what are its tax rules?",
+    "Does NPS allow me to withdraw it early?",
+    "eNPS registration",
+    "",
+])
+def test_standalone_questions(query):
+    assert not is_follow_up(query, PREVIOUS)
+
+
+def test_query_without_new_terms_needs_a_previous_turn():
+    assert is_follow_up("Tier I lock-in?", PREVIOUS)
+    assert not is_follow_up("Tier I lock-in?")
+
+
+def test_rewrite_appends_previous_question():
+    assert rewrite_follow_up("What about Tier II?", "What is the lock-in of Tier I?") == (
+        "What about Tier II? (follow-up to: What is the lock-in of Tier I?)"
+    )
+
+
+@pytest.mark.parametrize("path", [None, "sessions.db"])
+def test_record_turn_keeps_last_turns_and_documents(tmp_path, path):
+    store = SessionStore(max_turns=2, path=str(tmp_path / path) if path else None)
+    session = store.create()
+    for i in range(3):
+        documents = [{"id": f"doc{i}", "document": "text", "distance": 0.1, "metadata": {}}] if i < 2 else []
+        store.record_turn(session, f"q{i}", f"q{i}", f"q{i}", f"a{i}", documents, follow_up=i > 0)
+
+    stored = store.get(session.session_id)
+    assert [turn["query"] for turn in stored.turns] == ["q1", "q2"]
+    # A turn without retrieval (cached answer) clears the carried documents
+    assert stored.documents == []
+    store.close()
@@ -0,0 +1,71 @@
+import json
+import os
+
+import numpy as np
+
+from app.services.vector_backends import FaissBackend
+from app.services.vector_index import PersistedVectorIndex
+
+
+def _vectors(count: int, seed: int, dim: int = 8) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _add(backend: FaissBackend, ids, vectors) -> None:
+    backend.add(ids, vectors, [f"text of {doc_id}" for doc_id in ids], [{}] * len(ids))
+
+
+def test_external_overwrite_rebuilds_the_faiss_index(tmp_path):
+    reader = FaissBackend(str(tmp_path), "docs")
+    _add(reader, ["a", "b", "c"], _vectors(3, 0))
+    # Another process writing the shared vectors without touching the saved FAISS index
+    writer = PersistedVectorIndex(reader.directory)
+
+    # Same row count, new vector for 'b': only a rebuild puts it in the index
+    replacement = _vectors(1, 1)
+    writer.upsert(["b"], replacement, ["b replaced"], [{}])
+    hit = reader.query(replacement[0], 1)[0]
+    assert hit["id"] == "b"
+    assert hit["distance"] < 1e-5
+    assert reader.index.ntotal == 3
+
+
+def test_external_append_extends_the_faiss_index(tmp_path):
+    writer = FaissBackend(str(tmp_path), "docs")
+    reader = FaissBackend(str(tmp_path), "docs")
+    _add(writer, ["a", "b"], _vectors(2, 0))
+    assert reader.query(_vectors(1, 5)[0], 1)
+
+    appended = _vectors(1, 2)
+    _add(writer, ["c"], appended)
+    assert reader.query(appended[0], 1)[0]["id"] == "c"
+    assert reader.index.ntotal == 3
+
+
+def test_saved_index_is_reused_only_for_the_state_it_was_built_from(tmp_path):
+    writer = FaissBackend(str(tmp_path), "docs")
+    _add(writer, ["a", "b"], _vectors(2, 0))
+    saved = writer._index_path + ".json"
+    with open(saved, encoding="utf-8") as f:
+        assert json.load(f) == [*writer.storage.lineage, 2]
+    assert not [name for name in os.listdir(writer.directory) if name.endswith(".tmp")]
+
+    # A stale saved index (e.g. from a worker that saved an older state) is not loaded
+    with open(saved, "w", encoding="utf-8") as f:
+        json.dump([writer.storage.lineage[0], 99, 2], f)
+    fresh = FaissBackend(str(tmp_path), "docs")
+    with open(saved, encoding="utf-8") as f:
+        assert json.load(f) == [*writer.storage.lineage, 2]
+    assert fresh.index.ntotal == 2
+
+
+def test_appends_never_modify_the_index_being_searched(tmp_path):
+    backend = FaissBackend(str(tmp_path), "docs")
+    _add(backend, ["a", "b"], _vectors(2, 0))
+    searched = backend.index
+
+    _add(backend, ["c"], _vectors(1, 2))
+    assert searched.ntotal == 2
+    assert backend.index is not searched
+    assert backend.index.ntotal == 3
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from app.services.vector_index import PersistedVectorIndex
+
+
+def _vectors(count: int, seed: int, dim: int = 8) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _upsert(directory: str, ids, seed: int) -> None:
+    index = PersistedVectorIndex(directory)
+    index.upsert(ids, _vectors(len(ids), seed), [f"text of {doc_id}" for doc_id in ids], [{}] * len(ids))
+
+
+def test_writes_from_two_instances_are_both_kept(tmp_path):
+    directory = str(tmp_path)
+    first = PersistedVectorIndex(directory)
+    second = PersistedVectorIndex(directory)  # opened before the first one writes
+
+    first.upsert(["a1", "a2"], _vectors(2, 0), ["a1 text", "a2 text"], [{}, {}])
+    second.upsert(["b1"], _vectors(1, 1), ["b1 text"], [{}])
+    first.upsert(["a3", "b1"], _vectors(2, 2), ["a3 text", "b1 replaced"], [{}, {"v": 2}])
+
+    reopened = PersistedVectorIndex(directory).snapshot
+    assert reopened.ids == ["a1", "a2", "b1", "a3"]
+    assert [reopened.document(row) for row in range(4)] == ["a1 text", "a2 text", "b1 replaced", "a3 text"]
+    assert reopened.metadatas[2] == {"v": 2}
+    assert second.refresh()
+    assert second.snapshot.ids == reopened.ids
+
+
+def test_concurrent_writes_from_two_processes(tmp_path):
+    directory = str(tmp_path)
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_upsert_many, args=(directory, prefix))
+        for prefix in ("x", "y")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    snapshot = PersistedVectorIndex(directory).snapshot
+    assert sorted(snapshot.ids) == sorted(f"{prefix}{i}" for prefix in ("x", "y") for i in range(20))
+    for row, doc_id in enumerate(snapshot.ids):
+        assert snapshot.document(row) == f"text of {doc_id}"
+
+
+def _upsert_many(directory: str, prefix: str) -> None:
+    for i in range(20):
+        _upsert(directory, [f"{prefix}{i}"], seed=i)
+
+
+def test_clear_is_seen_by_other_instances(tmp_path):
+    directory = str(tmp_path)
+    writer = PersistedVectorIndex(directory)
+    reader = PersistedVectorIndex(directory)
+    writer.upsert(["a"], _vectors(1, 0), ["a"], [{}])
+    assert reader.refresh()
+
+    writer.clear()
+    assert reader.refresh()
+    assert len(reader.snapshot) == 0
+
+    reader.upsert(["b"], _vectors(1, 1), ["b"], [{}])
+    assert PersistedVectorIndex(directory).snapshot.ids == ["b"]
+
+
+def test_reingesting_the_same_documents_does_not_grow_the_files(tmp_path):
+    directory = str(tmp_path)
+    index = PersistedVectorIndex(directory)
+    reader = PersistedVectorIndex(directory)
+    ids = [f"doc{i}" for i in range(10)]
+    texts = [f"text of document {i} " * 20 for i in range(10)]
+    for round_ in range(10):
+        index.upsert(ids, _vectors(10, round_), texts, [{"round": round_}] * 10)
+
+    live_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    sizes = {
+        name: os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory) if name.startswith(("documents", "records"))
+    }
+    assert len(sizes) == 2
+    assert sum(size for name, size in sizes.items() if name.startswith("documents")) <= 2 * live_bytes
+
+    assert reader.refresh()
+    for snapshot in (index.snapshot, reader.snapshot, PersistedVectorIndex(directory).snapshot):
+        assert snapshot.ids == ids
+        assert [snapshot.document(row) for row in range(10)] == texts
+        assert snapshot.metadatas[0] == {"round": 9}
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.services.vector_backends import NumpyBackend
+from app.services.vector_store import VectorStore
+
+
+class _Embedder:
+    """Deterministic stand-in for the sentence-transformer"""
+
+    def encode(self, texts):
+        vectors = np.stack([
+            np.random.default_rng(sum(map(ord, text))).normal(size=8) for text in texts
+        ]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _store(tmp_path) -> VectorStore:
+    return VectorStore(
+        persist_directory=str(tmp_path),
+        embedder=_Embedder(),
+        backend=NumpyBackend(str(tmp_path), "docs")
+    )
+
+
+def test_listeners_run_for_writes_by_another_instance(tmp_path):
+    writer = _store(tmp_path)
+    reader = _store(tmp_path)
+    changes = []
+    reader.add_change_listener(lambda: changes.append(True))
+
+    assert not reader.refresh()
+    writer.add_documents(["NPS Tier I has a lock-in until 60"], ids=["tier1"])
+    assert reader.refresh()
+    assert changes == [True]
+    assert not reader.refresh()
+
+    # A search notices the write too
+    writer.add_documents(["Tier II accounts have no lock-in"], ids=["tier2"])
+    assert reader.get_collection_count() == 2
+    assert changes == [True, True]
+
+    writer.delete_collection()
+    assert reader.refresh()
+    assert reader.get_collection_count() == 0
+    assert changes == [True, True, True]
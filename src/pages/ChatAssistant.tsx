@@ -87,8 +87,8 @@ export default function ChatAssistant() {
     setIsTyping(true);
 
     try {
-      // Call the backend RAG API
-      const response = await fetch("http://localhost:8000/chat", {
+      // Call the backend RAG API and stream the answer as it is generated
+      const response = await fetch("http://localhost:8000/chat/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -101,23 +101,65 @@ export default function ChatAssistant() {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error(`API error: ${response.status}`);
       }
 
-      const data = await response.json();
-
-      const aiMsg: Message = {
-        id: (Date.now() + 1).toString(),
-        role: "assistant",
-        content: data.response,
-        timestamp: new Date(),
+      const aiMsgId = (Date.now() + 1).toString();
+      let content = "";
+      const appendToken = (token: string) => {
+        const next = content + token;
+        if (!content) {
+          // First token: replace the typing indicator with the message itself
+          setIsTyping(false);
+          setMessages((prev) => [
+            ...prev,
+            { id: aiMsgId, role: "assistant", content: next, timestamp: new Date() },
+          ]);
+        } else {
+          setMessages((prev) =>
+            prev.map((m) => (m.id === aiMsgId ? { ...m, content: next } : m))
+          );
+        }
+        content = next;
       };
-      setMessages((prev) => [...prev, aiMsg]);
 
-      // Log detected language for debugging
-      if (data.detected_language && data.detected_language !== "en") {
-        console.log(`Detected language: ${data.detected_language}`);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Server-Sent Events frames are separated by a blank line
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          const frame = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "token") {
+            appendToken(payload.text);
+          } else if (event === "metadata") {
+            // Log detected language for debugging
+            if (payload.detected_language && payload.detected_language !== "en") {
+              console.log(`Detected language: ${payload.detected_language}`);
+            }
+          } else if (event === "error" && !content) {
+            throw new Error(payload.error);
+          }
+        }
+      }
+
+      if (!content) {
+        throw new Error("Empty response from AI service");
       }
 
     } catch (error) {